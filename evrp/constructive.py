@@ -0,0 +1,144 @@
+# evrp/constructive.py
+from __future__ import annotations
+
+import random
+from typing import List, Optional
+
+import numpy as np
+
+from .data import Problem, distance_array
+from .split import decode
+from .timewindows import route_time_feasible
+
+# ---------------------------
+# Shared helpers
+# ---------------------------
+
+def _np_rng(rng: Optional[random.Random]) -> np.random.Generator:
+    rng = rng or random
+    return np.random.default_rng(rng.getrandbits(32))
+
+
+def _route_cost(route: List[int], dist: float, problem: Problem, alpha: float, init_soc: float) -> float:
+    """dist + LL cost; the LL solver is only called when the route needs charging."""
+    if alpha * dist <= init_soc:
+        return dist if route_time_feasible(route, problem) else float("inf")
+    from evrp.heuristics import solve_ll_exact
+    ok, ll = solve_ll_exact(route, problem)
+    return dist + ll if ok else float("inf")
+
+
+def _fit_fleet(routes: List[List[int]], problem: Problem) -> List[List[int]]:
+    """
+    Return exactly problem.vehicles routes (depot-delimited). When the
+    construction opened more routes than vehicles, the customer order is
+    re-cut by the fleet-limited split.
+    """
+    depot = problem.depot
+    if len(routes) > problem.vehicles:
+        tour = [c for r in routes for c in r]
+        return decode(tour, problem)
+    out = [[depot] + r + [depot] for r in routes]
+    while len(out) < problem.vehicles:
+        out.append([depot, depot])
+    return out
+
+
+# ---------------------------
+# Clarke-Wright savings
+# ---------------------------
+
+def savings_solution(problem: Problem, rng: Optional[random.Random] = None, noise: float = 0.1) -> List[List[int]]:
+    """
+    Energy-aware parallel Clarke-Wright savings.
+    Savings s_ij = d0i + d0j - dij are computed for all customer pairs at once
+    and perturbed by a multiplicative U(1-noise, 1+noise) factor so repeated
+    calls give different solutions. A merge is applied when it respects the
+    vehicle capacity and lowers dist + LL cost of the two routes (the LL
+    solver runs only when the merged route exceeds the range of one charge).
+    """
+    cust = np.asarray(problem.customers, dtype=np.int64)
+    n = len(cust)
+    if n == 0:
+        return _fit_fleet([], problem)
+    D = distance_array(problem)
+    depot = problem.depot
+    d0 = D[depot, cust]
+    S = d0[:, None] + d0[None, :] - D[np.ix_(cust, cust)]
+    if noise > 0:
+        S = S * _np_rng(rng).uniform(1.0 - noise, 1.0 + noise, size=S.shape)
+    iu, ju = np.triu_indices(n, k=1)
+    s = S[iu, ju]
+    keep = s > 0
+    iu, ju, s = iu[keep], ju[keep], s[keep]
+    order = np.argsort(-s, kind="stable")
+
+    alpha = getattr(problem, "energy_consumption", 1.0)
+    init_soc = (getattr(problem, "init_soc_ratio", 1.0) or 1.0) * problem.energy_capacity
+    demands = problem.demands or {}
+    Q = problem.capacity
+    Dl = problem.distance_matrix
+
+    routes = {k: [int(c)] for k, c in enumerate(cust)}   # route id -> customer chain
+    owner = list(range(n))                              # customer index -> route id
+    load = {k: demands.get(int(c), 0) for k, c in enumerate(cust)}
+    dist = {k: 2.0 * float(d0[k]) for k in range(n)}
+    cost = {k: _route_cost([depot, int(c), depot], dist[k], problem, alpha, init_soc)
+            for k, c in enumerate(cust)}
+    pos = {int(c): k for k, c in enumerate(cust)}
+
+    for t in order:
+        a, b = int(iu[t]), int(ju[t])
+        ra, rb = owner[a], owner[b]
+        if ra == rb or load[ra] + load[rb] > Q:
+            continue
+        A, B = routes[ra], routes[rb]
+        ca, cb = int(cust[a]), int(cust[b])
+        # both customers must be route endpoints; orient A -> ca | cb -> B
+        if A[-1] != ca:
+            if A[0] != ca:
+                continue
+            A = A[::-1]
+        if B[0] != cb:
+            if B[-1] != cb:
+                continue
+            B = B[::-1]
+        merged = A + B
+        new_dist = dist[ra] + dist[rb] - Dl[depot][ca] - Dl[depot][cb] + Dl[ca][cb]
+        new_cost = _route_cost([depot] + merged + [depot], new_dist, problem, alpha, init_soc)
+        if not new_cost < cost[ra] + cost[rb]:
+            continue
+        routes[ra], load[ra], dist[ra], cost[ra] = merged, load[ra] + load[rb], new_dist, new_cost
+        for c in B:
+            owner[pos[c]] = ra
+        del routes[rb], load[rb], dist[rb], cost[rb]
+
+    return _fit_fleet(list(routes.values()), problem)
+
+
+# ---------------------------
+# Sweep
+# ---------------------------
+
+def sweep_solution(problem: Problem, rng: Optional[random.Random] = None, jitter: float = 0.05) -> List[List[int]]:
+    """
+    Sweep (polar-angle) construction: customers are ordered by their angle
+    around the depot, starting from a random ray in a random direction (with a
+    small angular jitter), and the resulting giant tour is cut into capacity-
+    and energy-feasible routes by the fleet-limited split.
+    """
+    cust = np.asarray(problem.customers, dtype=np.int64)
+    if len(cust) == 0:
+        return _fit_fleet([], problem)
+    g = _np_rng(rng)
+    xy = np.asarray(problem.coords, dtype=np.float64)
+    dx = xy[cust, 0] - xy[problem.depot, 0]
+    dy = xy[cust, 1] - xy[problem.depot, 1]
+    theta = np.arctan2(dy, dx)
+    theta = (theta - g.uniform(-np.pi, np.pi)) % (2.0 * np.pi)
+    if jitter > 0:
+        theta = theta + g.normal(0.0, jitter, size=theta.shape)
+    if g.random() < 0.5:
+        theta = -theta
+    tour = cust[np.argsort(theta, kind="stable")].tolist()
+    return decode(tour, problem)
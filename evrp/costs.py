@@ -1,6 +1,6 @@
 # evrp/costs.py
 from __future__ import annotations
-from typing import List
+from typing import List, Optional
 from .data import Problem
 
 def calculate_travel_cost(solution: List[List[int]], problem: Problem) -> float:
@@ -11,16 +11,106 @@ def calculate_travel_cost(solution: List[List[int]], problem: Problem) -> float:
             total += D[route[i]][route[i+1]]
     return total
 
-def full_cost(solution, problem, ul_only: bool = False):
+def count_evals(problem, n: int = 1) -> None:
+    """Add n solution evaluations to the problem's running counter (problem._n_evals)."""
+    problem._n_evals = getattr(problem, "_n_evals", 0) + n
+
+
+def eval_count(problem) -> int:
+    return getattr(problem, "_n_evals", 0)
+
+
+def overload_cost(excess: float, problem) -> float:
+    """
+    Cost of carrying `excess` demand above the vehicle capacity on one route:
+    0 when not overloaded, inf by default (hard capacity), or
+    problem.capacity_penalty per unit of excess when that knob is set, which
+    lets the search cross capacity-infeasible regions in a controlled way.
+    """
+    if excess <= 1e-9:
+        return 0.0
+    penalty = getattr(problem, "capacity_penalty", None)
+    return excess * penalty if penalty else float("inf")
+
+
+def capacity_cost(solution, problem) -> float:
+    """Summed overload_cost of the routes of a solution (O(total route length))."""
+    demands = problem.demands or {}
+    Q = problem.capacity
+    total = 0.0
+    for route in solution:
+        load = 0
+        for c in route:
+            load += demands.get(c, 0)
+        if load > Q:
+            total += overload_cost(load - Q, problem)
+    return total
+
+
+class _BoundExceeded(float):
+    """
+    Type of BOUND_EXCEEDED: an infinite float, so plain comparisons keep
+    working, that stays the same object when pickled (process pools), copied
+    or added to a (non-negative) cost. float(), NumPy and tolist() still
+    produce a plain inf, so test before converting.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls, "inf")
+        return cls._instance
+
+    def __reduce__(self):
+        return (_BoundExceeded, ())
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __add__(self, other):
+        return self if other >= 0 else float.__add__(self, other)
+
+    __radd__ = __add__
+
+    def __repr__(self) -> str:
+        return "BOUND_EXCEEDED"
+
+
+# Returned by full_cost(..., upper_bound=x) when the candidate provably costs
+# more than x; test `c is BOUND_EXCEEDED` to tell it apart from an
+# infeasible (plain inf) solution.
+BOUND_EXCEEDED = _BoundExceeded()
+
+
+def full_cost(solution, problem, ul_only: bool = False, upper_bound: Optional[float] = None):
     """
     Compute total cost of a solution.
     If ul_only=True, only the upper-level (distance-based) cost is computed
     without solving the lower-level (energy/charging) problem.
+    If upper_bound is given, evaluation stops as soon as the partial cost
+    exceeds it and BOUND_EXCEEDED is returned. Routes are then solved at the
+    LL longest first (most likely to need costly charging), and routes that
+    can be driven on the initial charge are skipped (their LL cost is 0).
+    Route loads are checked first: an overloaded solution is inf without any
+    distance or LL work, unless problem.capacity_penalty prices the excess.
     """
     # --- UL distance computation ---
     D = getattr(problem, "distance_matrix", None)
     if D is None:
         raise ValueError("Problem instance missing distance matrix.")
+    penalty = 0.0
+    if not ul_only:
+        count_evals(problem)
+        penalty = capacity_cost(solution, problem)
+        if penalty == float("inf"):
+            return penalty
+
+    if upper_bound is not None and not ul_only:
+        return _bounded_full_cost(solution, problem, D, upper_bound, penalty)
 
     base_distance = 0.0
     for route in solution:
@@ -37,7 +127,40 @@ def full_cost(solution, problem, ul_only: bool = False):
     if not ok:
         return float("inf")
 
-    return base_distance + ll_cost
+    return base_distance + ll_cost + penalty
+
+
+def _bounded_full_cost(solution, problem, D, upper_bound: float, penalty: float = 0.0):
+    route_dist = []
+    total = penalty
+    for route in solution:
+        d = 0.0
+        for i in range(len(route) - 1):
+            d += D[route[i]][route[i + 1]]
+        route_dist.append(d)
+        total += d
+        if total > upper_bound:
+            return BOUND_EXCEEDED
+
+    from evrp.heuristics import solve_ll_exact
+    from evrp.timewindows import time_windows
+    alpha = getattr(problem, "energy_consumption", 1.0)
+    init_soc = (getattr(problem, "init_soc_ratio", 1.0) or 1.0) * problem.energy_capacity
+    tw = time_windows(problem)
+    for r in sorted(range(len(solution)), key=lambda k: -route_dist[k]):
+        if alpha * route_dist[r] <= init_soc:
+            if tw is None:
+                break  # this and all shorter routes need no charging
+            if not tw.feasible(solution[r]):
+                return float("inf")
+            continue
+        ok, ll_cost = solve_ll_exact(solution[r], problem)
+        if not ok:
+            return float("inf")
+        total += ll_cost
+        if total > upper_bound:
+            return BOUND_EXCEEDED
+    return total
 
 # Back-compat
 
@@ -0,0 +1,181 @@
+# evrp/crossover.py
+from __future__ import annotations
+
+import random
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .data import Problem
+from .split import split, split_linear, to_giant_tour
+
+# ---------------------------
+# Mating pool as a permutation array
+# ---------------------------
+# Every solution of the pool is reduced to its giant tour (evrp.split) and
+# relabelled to 0..n-1, so the pool is one (P, n) int array and each operator
+# builds all P children at once. Child k recombines rows k and k+1 (mod P);
+# tournament winners come in random order, so this is a random pairing.
+
+def tours_array(pool: Sequence[List[List[int]]], problem: Problem) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (T, customers): T[k] is the giant tour of pool[k] with customer
+    customers[i] written as label i. Raises ValueError when a solution does
+    not visit every customer exactly once.
+    """
+    customers = np.asarray(sorted(problem.customers), dtype=np.int64)
+    label = np.full(int(max(len(problem.coords), customers.max() + 1)), -1, dtype=np.int64)
+    label[customers] = np.arange(len(customers))
+    T = np.empty((len(pool), len(customers)), dtype=np.int64)
+    for k, sol in enumerate(pool):
+        tour = to_giant_tour(sol, problem)
+        if len(tour) != len(customers):
+            raise ValueError("Crossover needs solutions that visit every customer exactly once.")
+        T[k] = label[tour]
+    return T, customers
+
+
+# ---------------------------
+# Order crossover (OX)
+# ---------------------------
+
+def order_crossover(A: np.ndarray, B: np.ndarray, gen: np.random.Generator) -> np.ndarray:
+    """
+    OX on every row pair: the child keeps A[lo:hi] in place and fills the
+    other positions, starting after the segment and wrapping around, with
+    the remaining labels in the order they appear in B from position hi.
+    """
+    P, n = A.shape
+    rows = np.arange(P)
+    cols = np.arange(n)
+    i, j = gen.integers(0, n, P), gen.integers(0, n, P)
+    lo, hi = np.minimum(i, j), np.maximum(i, j) + 1
+    seg = (cols >= lo[:, None]) & (cols < hi[:, None])
+
+    in_seg = np.zeros((P, n), dtype=bool)
+    in_seg[rows[:, None], A] = seg
+    rot = (hi[:, None] + cols) % n                    # positions hi, hi+1, ..., lo-1 come first
+    Brot = np.take_along_axis(B, rot, axis=1)
+    keep = ~np.take_along_axis(in_seg, Brot, axis=1)
+    filler = np.take_along_axis(Brot, np.argsort(~keep, axis=1, kind="stable"), axis=1)
+
+    child = A.copy()
+    r, k = np.nonzero(cols[None, :] < (n - (hi - lo))[:, None])
+    child[r, rot[r, k]] = filler[r, k]
+    return child
+
+
+# ---------------------------
+# Edge recombination (ERX)
+# ---------------------------
+# Edge table adj[p, v] = the (cyclic) neighbours of v in A[p] and B[p], -1
+# once used. The child is grown one position per step for all rows at once:
+# the next node is a neighbour of the current one, preferring edges common to
+# both parents, then the neighbour with the fewest remaining edges, ties at
+# random; a row without unused neighbours jumps to a random unvisited node.
+
+def _edge_table(A: np.ndarray, B: np.ndarray) -> np.ndarray:
+    P, n = A.shape
+    rows = np.arange(P)[:, None]
+    adj = np.empty((P, n, 4), dtype=np.int64)
+    for s, X in enumerate((A, B)):
+        adj[rows, X, 2 * s] = np.roll(X, 1, axis=1)
+        adj[rows, X, 2 * s + 1] = np.roll(X, -1, axis=1)
+    return adj
+
+
+def _drop_node(adj: np.ndarray, rows: np.ndarray, v: np.ndarray) -> None:
+    """Remove v[p] from the edge lists of its neighbours."""
+    for s in range(4):
+        nb = adj[rows, v, s]
+        ok = nb >= 0
+        rr, nn = rows[ok], nb[ok]
+        lists = adj[rr, nn]
+        lists[lists == v[ok][:, None]] = -1
+        adj[rr, nn] = lists
+
+
+def _unique_count(lists: np.ndarray) -> np.ndarray:
+    """Distinct non-negative entries along the last axis (length 4)."""
+    valid = lists >= 0
+    seen = np.zeros(lists.shape, dtype=bool)
+    for t in range(1, 4):
+        seen[..., t] = (lists[..., :t] == lists[..., t:t + 1]).any(axis=-1)
+    return (valid & ~seen).sum(axis=-1)
+
+
+def edge_recombination(A: np.ndarray, B: np.ndarray, gen: np.random.Generator) -> np.ndarray:
+    P, n = A.shape
+    if n < 3:
+        return A.copy()
+    rows = np.arange(P)
+    adj = _edge_table(A, B)
+    visited = np.zeros((P, n), dtype=bool)
+    child = np.empty((P, n), dtype=np.int64)
+
+    cur = A[:, 0].copy()
+    child[:, 0] = cur
+    visited[rows, cur] = True
+    _drop_node(adj, rows, cur)
+    for t in range(1, n):
+        cand = adj[rows, cur]                                        # (P, 4)
+        valid = cand >= 0
+        common = valid & ((cand[:, :, None] == cand[:, None, :]).sum(axis=2) > 1)
+        degree = _unique_count(adj[rows[:, None], np.where(valid, cand, 0)])
+        key = np.where(valid, np.where(common, 0, 8) + degree + gen.random((P, 4)), np.inf)
+        nxt = cand[rows, np.argmin(key, axis=1)]
+
+        dead = ~valid.any(axis=1)
+        if dead.any():
+            r = gen.random((int(dead.sum()), n))
+            r[visited[dead]] = np.inf
+            nxt[dead] = np.argmin(r, axis=1)
+
+        child[:, t] = nxt
+        visited[rows, nxt] = True
+        _drop_node(adj, rows, nxt)
+        cur = nxt
+    return child
+
+
+OPERATORS = {"ox": order_crossover, "erx": edge_recombination}
+
+
+# ---------------------------
+# Pool-level recombination
+# ---------------------------
+
+def decode_child(tour: Sequence[int], problem: Problem) -> List[List[int]]:
+    """
+    Fleet-limited split of a child tour on distance only (no LL call: the
+    child is evaluated with the rest of the generation); if the fleet cannot
+    serve the tour, the unlimited linear split is used.
+    """
+    tour = list(tour)
+    _, routes = split(tour, problem, max_routes=problem.vehicles, ll=False)
+    if not routes and tour:
+        _, routes = split_linear(tour, problem)
+    while len(routes) < problem.vehicles:
+        routes.append([problem.depot, problem.depot])
+    return routes
+
+
+def recombine(pool: Sequence[List[List[int]]], problem: Problem, rng: random.Random,
+              method: str = "ox", n_children: Optional[int] = None) -> List[List[List[int]]]:
+    """
+    n_children (default len(pool)) offspring of the mating pool: child k
+    recombines pool[k] and pool[k + 1] with `method` ("ox" or "erx") and is
+    decoded back into routes with decode_child.
+    """
+    try:
+        op = OPERATORS[method]
+    except KeyError:
+        raise ValueError(f"Unknown crossover: {method!r}") from None
+    m = len(pool) if n_children is None else min(n_children, len(pool))
+    if m <= 0 or len(pool) < 2:
+        return []
+    T, customers = tours_array(pool, problem)
+    gen = np.random.default_rng(rng.getrandbits(64))
+    idx = np.arange(m)
+    children = customers[op(T[idx], T[(idx + 1) % len(pool)], gen)]
+    return [decode_child(tour.tolist(), problem) for tour in children]
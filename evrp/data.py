@@ -19,7 +19,7 @@ class Problem:
     customers: List[int] = field(default_factory=list)
     stations: List[int] = field(default_factory=list)
 
-    # Time windows — not used (kept for future compatibility)
+    # Time windows (enforced when has_time_windows; see evrp.timewindows)
     has_time_windows: bool = False
     ready_time: Dict[int, float] = field(default_factory=dict)
     due_time: Dict[int, float] = field(default_factory=dict)
@@ -39,6 +39,7 @@ class Problem:
     energy_cost: float = 4.22  # $/kWh  (fixed per project spec)
     charge_rate: Optional[float] = None  # kW (global fallback; station may override)
     fixed_charge_time_h: float = 0.5  # 30 minutes overhead per recharge (optional)
+    speed: Optional[float] = None  # km/h; travel time = distance / speed (1.0 if unset)
 
     # Demands (capacity). Defaults to zero unless a DEMAND section is added later.
     demands: Dict[int, int] = field(default_factory=dict)
@@ -78,6 +79,22 @@ def build_distance_matrix(coords: List[Tuple[float, float]]) -> List[List[float]
     return D
 
 
+def distance_array(problem: "Problem"):
+    """
+    Return the distance matrix as a float64 NumPy array (1-based, row/col 0 zero).
+    Built once and cached on the problem; rebuilt if the matrix was replaced.
+    """
+    import numpy as np
+
+    D = problem.distance_matrix
+    cached = getattr(problem, "_distance_array", None)
+    if cached is not None and cached[0] is D:
+        return cached[1]
+    arr = np.asarray(D, dtype=np.float64)
+    problem._distance_array = (D, arr)
+    return arr
+
+
 # =========================
 # Loader for EVRP instances
 # =========================
@@ -91,6 +108,7 @@ def load_evrp(path: str) -> Problem:
       - DEMAND_SECTION: customer demands
       - STATIONS_COORD_SECTION: station node IDs
       - DEPOT_SECTION: depot node ID
+      - TIME_WINDOW_SECTION (optional): node_id ready due [service]
 
     Note: ENERGY_CONSUMPTION is ignored and forced to 1.0 per project spec.
     """
@@ -113,6 +131,8 @@ def load_evrp(path: str) -> Problem:
     reading_demands = False
     reading_stations = False
     reading_depot = False
+    reading_tw = False
+    windows: Dict[int, Tuple[float, float, float]] = {}
 
     with open(path, "r", encoding="utf-8") as f:
         for raw in f:
@@ -132,6 +152,7 @@ def load_evrp(path: str) -> Problem:
                 reading_demands = False
                 reading_stations = False
                 reading_depot = False
+                reading_tw = False
                 continue
 
             elif line.startswith("DEMAND_SECTION"):
@@ -139,6 +160,7 @@ def load_evrp(path: str) -> Problem:
                 reading_demands = True
                 reading_stations = False
                 reading_depot = False
+                reading_tw = False
                 continue
 
             elif line.startswith("STATIONS_COORD_SECTION"):
@@ -146,6 +168,7 @@ def load_evrp(path: str) -> Problem:
                 reading_demands = False
                 reading_stations = True
                 reading_depot = False
+                reading_tw = False
                 continue
 
             elif line.startswith("DEPOT_SECTION"):
@@ -153,6 +176,15 @@ def load_evrp(path: str) -> Problem:
                 reading_demands = False
                 reading_stations = False
                 reading_depot = True
+                reading_tw = False
+                continue
+
+            elif line.startswith("TIME_WINDOW_SECTION"):
+                reading_coords = False
+                reading_demands = False
+                reading_stations = False
+                reading_depot = False
+                reading_tw = True
                 continue
 
             # ============ HEADER PARSING ============
@@ -208,6 +240,13 @@ def load_evrp(path: str) -> Problem:
                     elif station_id > 0:
                         station_nodes.append(station_id)
 
+            elif reading_tw:
+                # Parse: node_id ready due [service]
+                parts = line.split()
+                if len(parts) >= 3 and parts[0].isdigit():
+                    service = float(parts[3]) if len(parts) >= 4 else 0.0
+                    windows[int(parts[0])] = (float(parts[1]), float(parts[2]), service)
+
             elif reading_depot:
                 # Parse: depot_node_id (usually 1, then -1 to end)
                 if line.lstrip('-').isdigit():
@@ -257,6 +296,13 @@ def load_evrp(path: str) -> Problem:
         if station not in problem.demands:
             problem.demands[station] = 0
 
+    if windows:
+        problem.has_time_windows = True
+        for node, (ready, due, service) in windows.items():
+            problem.ready_time[node] = ready
+            problem.due_time[node] = due
+            problem.service_duration[node] = service
+
     return problem
 
 
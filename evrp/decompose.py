@@ -0,0 +1,238 @@
+# evrp/decompose.py
+from __future__ import annotations
+
+import contextlib
+import copy
+import io
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+
+from .cluster import kmeans, sqdist
+from .costs import full_cost
+from .data import Problem, distance_array
+from .parallel import close_pool
+from .split import decode
+
+# ---------------------------
+# Cluster-first partition
+# ---------------------------
+
+def partition_customers(problem: Problem, n_parts: int, rng: Optional[random.Random] = None,
+                        rounds: int = 20) -> Tuple[List[List[int]], List[List[float]]]:
+    """k-means on customer coordinates; returns (customer groups, centers), empty groups dropped."""
+    cust = list(problem.customers or [])
+    points = [list(problem.coords[c]) for c in cust]
+    centers, labels = kmeans(points, n_parts, rounds=rounds, rng=rng)
+    groups: List[List[int]] = [[] for _ in centers]
+    for c, lab in zip(cust, labels):
+        groups[lab].append(c)
+    keep = [k for k, g in enumerate(groups) if g]
+    return [groups[k] for k in keep], [centers[k] for k in keep]
+
+
+def _border_stations(problem: Problem, centers: List[List[float]], border: float) -> List[List[int]]:
+    """
+    Station set of each part: a station belongs to every part whose center is
+    within (1 + border) times its distance to the nearest center, so stations
+    near a border are shared by the parts on both sides.
+    """
+    out: List[List[int]] = [[] for _ in centers]
+    for b in problem.stations or []:
+        p = list(problem.coords[b])
+        d = [math.sqrt(sqdist(p, c)) for c in centers]
+        lim = (1.0 + border) * min(d)
+        for k, dk in enumerate(d):
+            if dk <= lim:
+                out[k].append(b)
+    return out
+
+
+def subproblem(problem: Problem, customers: List[int], stations: List[int], vehicles: int) -> Problem:
+    """
+    Shallow copy of `problem` restricted to some customers / stations. Coords,
+    the distance matrix and its NumPy array are shared; per-run caches (LL
+    route memo, tabu list, surrogate) are not, since LL costs depend on the
+    station set.
+    """
+    sub = copy.copy(problem)
+    for attr in [a for a in vars(sub) if a.startswith("_") and a != "_distance_array"]:
+        delattr(sub, attr)
+    sub.customers = list(customers)
+    sub.stations = list(stations) or list(problem.stations or [])
+    sub.vehicles = max(1, vehicles)
+    return sub
+
+
+def _fleet_shares(problem: Problem, groups: List[List[int]]) -> List[int]:
+    """
+    Vehicles per part: each part gets what its demand needs (at least one),
+    the rest of the fleet is handed out by largest remainder of the customer
+    share, so the parts together use at most problem.vehicles when possible.
+    """
+    demands = problem.demands or {}
+    Q = problem.capacity or 0
+    need = [max(1, math.ceil(sum(demands.get(c, 0) for c in g) / Q) if Q else 1) for g in groups]
+    spare = problem.vehicles - sum(need)
+    if spare <= 0:
+        return need
+    n_cust = sum(len(g) for g in groups)
+    quota = [spare * len(g) / n_cust for g in groups]
+    extra = [int(q) for q in quota]
+    order = sorted(range(len(groups)), key=lambda k: quota[k] - extra[k], reverse=True)
+    for k in order[:spare - sum(extra)]:
+        extra[k] += 1
+    return [n + e for n, e in zip(need, extra)]
+
+
+# ---------------------------
+# Solve / merge / polish
+# ---------------------------
+
+def _solve_part(args):
+    """Pool worker: run the hyper-heuristic on one sub-problem (stdout silenced)."""
+    from .optimize import main_optimization_metrics
+
+    sub, cfg, seed = args
+    with contextlib.redirect_stdout(io.StringIO()):
+        sol, cost = main_optimization_metrics(sub, cfg, random.Random(seed))
+    return [list(r) for r in sol], cost
+
+
+def _part_cfg(cfg: SimpleNamespace, part: int, pooled: bool) -> SimpleNamespace:
+    """
+    cfg for one part. In a worker process the run logger, memory profiler and
+    live metrics would be pickled copies whose records never reach the parent,
+    so they are dropped (the parent logs one "part" record per finished part).
+    In-process, records are stamped with the part id, since every part
+    restarts its generation count in the same log.
+    """
+    fields = dict(vars(cfg))
+    if pooled:
+        for k in ("run_logger", "mem_profiler", "live_metrics"):
+            fields.pop(k, None)
+        return SimpleNamespace(**fields)
+    logger = fields.get("run_logger")
+    if logger is not None:
+        fields["run_logger"] = logger.bind(part=part)
+    prof = fields.get("mem_profiler")
+    if prof is not None:
+        prof = copy.copy(prof)          # shares the record list, not the open phase
+        prof._phase = None
+        prof.run_logger = fields.get("run_logger")
+        fields["mem_profiler"] = prof
+    return SimpleNamespace(**fields)
+
+
+def merge_routes(problem: Problem, parts: List[List[List[int]]]) -> List[List[int]]:
+    """
+    Concatenate the non-empty routes of all parts into one solution with
+    problem.vehicles routes. When the parts opened more routes than there are
+    vehicles (per-part fleets are rounded up), the pair of routes whose
+    concatenation adds the least distance within capacity is joined, until the
+    fleet fits; if no such pair exists the customers are re-split.
+    """
+    depot = problem.depot
+    D = problem.distance_matrix
+    demands = problem.demands or {}
+    routes = [[c for c in r if c != depot] for sol in parts for r in sol]
+    routes = [r for r in routes if r]
+    loads = [sum(demands.get(c, 0) for c in r) for r in routes]
+    while len(routes) > problem.vehicles:
+        best = None
+        for a in range(len(routes)):
+            A = routes[a]
+            for b in range(len(routes)):
+                if a == b or loads[a] + loads[b] > problem.capacity:
+                    continue
+                B = routes[b]
+                for rev in (False, True):
+                    head = B[-1] if rev else B[0]
+                    extra = D[A[-1]][head] - D[A[-1]][depot] - D[depot][head]
+                    if best is None or extra < best[0]:
+                        best = (extra, a, b, rev)
+        if best is None:
+            return decode([c for r in routes for c in r], problem)
+        _, a, b, rev = best
+        routes[a] = routes[a] + (routes[b][::-1] if rev else routes[b])
+        loads[a] += loads[b]
+        del routes[b], loads[b]
+    out = [[depot] + r + [depot] for r in routes]
+    while len(out) < problem.vehicles:
+        out.append([depot, depot])
+    return out
+
+
+def polish(sol: List[List[int]], problem: Problem, rng: random.Random, rounds: int = 1) -> List[List[int]]:
+    """Inter-route VND (2-opt / relocate / swap, see _vnd_with_sa) on the merged solution."""
+    from .operators import _vnd_with_sa
+
+    best, best_c = sol, full_cost(sol, problem)
+    for _ in range(rounds):
+        cand = _vnd_with_sa(best, problem, rng)
+        c = full_cost(cand, problem)
+        if not c < best_c:
+            break
+        best, best_c = cand, c
+    return best
+
+
+def decompose_solve(problem: Problem, cfg: SimpleNamespace, rng: random.Random,
+                    n_parts: Optional[int] = None, workers: Optional[int] = None):
+    """
+    Cluster-first route-second: partition customers with k-means, solve each
+    part independently (in parallel with `workers` > 1) with the
+    hyper-heuristic, merge the routes and polish them with inter-route moves
+    on the full instance. Returns (best_solution, cost) like
+    main_optimization_metrics.
+
+    n_parts defaults to ceil(#customers / problem.decompose_size) (default 100).
+    """
+    n_cust = len(problem.customers or [])
+    if n_parts is None:
+        n_parts = max(1, math.ceil(n_cust / getattr(problem, "decompose_size", 100)))
+    if n_parts <= 1 or n_cust < 2 * n_parts:
+        from .optimize import main_optimization_metrics
+        return main_optimization_metrics(problem, cfg, rng)
+
+    distance_array(problem)   # built once, shared by every part
+    groups, centers = partition_customers(problem, n_parts, rng)
+    stations = _border_stations(problem, centers, getattr(cfg, "decompose_border", 0.25))
+    fleets = _fleet_shares(problem, groups)
+    subs = [subproblem(problem, g, s, v) for g, s, v in zip(groups, stations, fleets)]
+    seeds = [rng.getrandbits(32) for _ in subs]
+    print(f"[decompose] {len(subs)} parts: sizes={[len(g) for g in groups]} vehicles={fleets}")
+
+    run_logger = getattr(cfg, "run_logger", None)
+
+    def log_part(k, cost):
+        if run_logger is not None:
+            run_logger.log("part", part=k, best=cost, customers=len(groups[k]), vehicles=fleets[k])
+
+    pooled = bool(workers and workers > 1)
+    results: List[Tuple[List[List[int]], float]] = [None] * len(subs)
+    if pooled:
+        for sub in subs:
+            sub.vnd_workers = 0     # no nested VND pools inside part workers
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futs = {pool.submit(_solve_part, (sub, _part_cfg(cfg, k, True), seed)): k
+                    for k, (sub, seed) in enumerate(zip(subs, seeds))}
+            for fut in as_completed(futs):
+                k = futs[fut]
+                results[k] = fut.result()
+                log_part(k, results[k][1])
+    else:
+        for k, (sub, seed) in enumerate(zip(subs, seeds)):
+            results[k] = _solve_part((sub, _part_cfg(cfg, k, False), seed))
+            log_part(k, results[k][1])
+
+    merged = merge_routes(problem, [sol for sol, _ in results])
+    merged_c = full_cost(merged, problem)
+    print(f"[decompose] merged cost={merged_c:.2f} (sum of parts={sum(c for _, c in results):.2f})")
+    best = polish(merged, problem, rng, getattr(cfg, "polish_rounds", 1))
+    close_pool(problem)
+    best_c = full_cost(best, problem)
+    print(f"[decompose] polished cost={best_c:.2f}")
+    return best, best_c
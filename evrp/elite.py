@@ -2,10 +2,12 @@
 from __future__ import annotations
 from typing import List, Tuple, Sequence, Iterable, Optional, Union
 from random import Random
+from array import array
 from .cluster import embed_solution, nearest_centroid_idx, kmeans
+from .solution import Solution
 
-# (cost, sol, embedding)
-EliteEntry = Tuple[float, List[List[int]], List[float]]
+# (cost, sol, embedding) — sol is a compact Solution, embedding an array('d')
+EliteEntry = Tuple[float, Solution, Sequence[float]]
 
 def update_elite_archive(
     elite: List[EliteEntry],
@@ -14,8 +16,10 @@ def update_elite_archive(
     dim: int = 32,          # <-- default embedding size
     max_size: int = 100     # <-- default archive cap
 ):
-    emb = embed_solution(sol, dim)
-    elite.append((cost, sol, emb))
+    emb = array("d", embed_solution(sol, dim))
+    compact = Solution.from_routes(sol)
+    compact.cost = cost
+    elite.append((cost, compact, emb))
     elite.sort(key=lambda e: e[0])
     if len(elite) > max_size:
         del elite[max_size:]
@@ -36,9 +40,9 @@ def _normalize_points(points: List[List[float]]) -> List[List[float]]:
     norm = []
     for p in points:
         if len(p) < target:
-            norm.append(p + [0.0] * (target - len(p)))
+            norm.append(list(p) + [0.0] * (target - len(p)))
         elif len(p) > target:
-            norm.append(p[:target])
+            norm.append(list(p[:target]))
         else:
             norm.append(p)
     return norm
@@ -32,3 +32,166 @@ def decorate_with_pevrp_params(problem, seed=42, charge_rate_kW=None):
         problem.station_wait_cost.setdefault(b, 0.0)
 
     return problem
+
+
+# ---------------------------
+# Synthetic instances
+# ---------------------------
+
+def _customer_coords(rng, n, side, layout, n_clusters):
+    """Uniform, clustered (Gaussian blobs) or mixed (half / half) customer layout."""
+    def uniform(m):
+        return [(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(m)]
+
+    def clustered(m):
+        k = n_clusters or max(2, int(round(m ** 0.5 / 3)))
+        seeds = uniform(k)
+        sigma = side / (4.0 * k ** 0.5)
+        out = []
+        for _ in range(m):
+            cx, cy = seeds[rng.randrange(k)]
+            out.append((min(side, max(0.0, rng.gauss(cx, sigma))),
+                        min(side, max(0.0, rng.gauss(cy, sigma)))))
+        return out
+
+    if layout == "uniform":
+        return uniform(n)
+    if layout == "clustered":
+        return clustered(n)
+    if layout == "mixed":
+        return clustered(n // 2) + uniform(n - n // 2)
+    raise ValueError(f"Unknown layout: {layout!r}")
+
+
+def _demands(rng, n, kind, lo, hi):
+    """uniform U[lo, hi], unitary (all 1) or small_large (70% from the low tenth of the range)."""
+    if kind == "uniform":
+        return [rng.randint(lo, hi) for _ in range(n)]
+    if kind == "unitary":
+        return [1] * n
+    if kind == "small_large":
+        cut = max(lo, lo + (hi - lo) // 10)
+        return [rng.randint(lo, cut) if rng.random() < 0.7 else rng.randint(cut, hi) for _ in range(n)]
+    raise ValueError(f"Unknown demand distribution: {kind!r}")
+
+
+def generate_problem(n_customers, station_density=0.05, layout="uniform", demand="uniform",
+                     demand_range=(1, 100), route_size=10, side=400.0, n_clusters=None,
+                     energy_capacity=None, seed=42, name=None, with_matrix=True):
+    """
+    Build a random EVRP Problem (same conventions as load_evrp: node 1 is the
+    depot, then customers, then stations; energy_consumption = 1).
+
+    Stations (n_customers * station_density, at least 1) sit on a jittered
+    regular lattice so the whole square is covered. Capacity fits about
+    `route_size` average customers; the fleet is the capacity bound plus 10%.
+    The default ENERGY_CAPACITY is 1.5x a round trip (2x) over the longest hop
+    between a node and its nearest station or between neighboring stations,
+    so every node can be reached from a station and left again. Coordinates
+    are rounded to 3 decimals so write_evrp / load_evrp round-trip exactly.
+
+    with_matrix=False skips the dense distance matrix (O(n^2) memory, ~0.5 GB
+    as nested lists at 3000 customers); use it when the instance is only
+    written with write_evrp. Only node-to-station distances are computed then.
+    """
+    import math
+
+    import numpy as np
+
+    from .data import Problem, distance_array
+
+    rng = random.Random(seed)
+    cust_xy = _customer_coords(rng, n_customers, side, layout, n_clusters)
+    n_st = max(1, int(round(n_customers * station_density)))
+    g = math.ceil(n_st ** 0.5)
+    step = side / g
+    cells = [(a, b) for a in range(g) for b in range(g)]
+    rng.shuffle(cells)
+    st_xy = [((a + 0.5 + rng.uniform(-0.25, 0.25)) * step, (b + 0.5 + rng.uniform(-0.25, 0.25)) * step)
+             for a, b in cells[:n_st]]
+    depot_xy = (side / 2.0, side / 2.0)
+
+    coords = [(-1.0, -1.0)] + [(round(x, 3), round(y, 3)) for x, y in [depot_xy] + cust_xy + st_xy]
+    depot = 1
+    customers = list(range(2, n_customers + 2))
+    stations = list(range(n_customers + 2, n_customers + 2 + n_st))
+
+    lo, hi = demand_range
+    dem = _demands(rng, n_customers, demand, lo, hi)
+    demands = {depot: 0, **{c: d for c, d in zip(customers, dem)}, **{b: 0 for b in stations}}
+    capacity = max(max(dem), int(math.ceil(route_size * sum(dem) / n_customers)))
+    vehicles = int(math.ceil(1.1 * sum(dem) / capacity)) + 1
+
+    xy = np.asarray(coords, dtype=np.float64)
+
+    def dist(rows, cols):
+        a, b = xy[rows], xy[cols]
+        return np.hypot(a[:, None, 0] - b[None, :, 0], a[:, None, 1] - b[None, :, 1])
+
+    if energy_capacity is None:
+        st = np.asarray(stations)
+        to_station = dist(np.arange(1, len(coords)), st).min(axis=1)   # every node -> nearest station
+        if len(st) > 1:
+            s2s = dist(st, st) + np.diag(np.full(len(st), np.inf))
+            hop = max(float(to_station.max()), float(s2s.min(axis=1).max()))
+        else:
+            hop = float(to_station.max())
+        energy_capacity = float(math.ceil(1.5 * 2.0 * hop))
+
+    problem = Problem(
+        name=name or f"S-n{len(coords) - 1}-k{vehicles}-s{n_st}-{layout}-{seed}",
+        vehicles=vehicles,
+        capacity=capacity,
+        depot=depot,
+        customers=customers,
+        stations=stations,
+        coords=coords,
+        energy_capacity=energy_capacity,
+        energy_consumption=1.0,
+        waiting_cost=5.0,
+        energy_cost=4.22,
+    )
+    problem.demands = demands
+    if with_matrix:
+        idx = np.arange(len(coords))
+        arr = dist(idx, idx)
+        arr[0, :] = 0.0
+        arr[:, 0] = 0.0
+        problem.distance_matrix = arr.tolist()
+        problem._distance_array = (problem.distance_matrix, arr)
+        distance_array(problem)
+    return problem
+
+
+def write_evrp(problem, path, comment="Synthetic instance (evrp.generators)"):
+    """Write a Problem in the .evrp format read by evrp.data.load_evrp."""
+    n = len(problem.coords) - 1
+    lines = [
+        f"NAME: {problem.name}",
+        f"COMMENT: {comment}",
+        "TYPE: EVRP",
+        f"VEHICLES: {problem.vehicles}",
+        f"DIMENSION: {n}",
+        f"STATIONS: {len(problem.stations)}",
+        f"CAPACITY: {problem.capacity}",
+        f"ENERGY_CAPACITY: {problem.energy_capacity:g}",
+        f"ENERGY_CONSUMPTION: {problem.energy_consumption:.2f}",
+        "EDGE_WEIGHT_TYPE: EUC_2D",
+        "NODE_COORD_SECTION",
+    ]
+    lines += [f"{i} {x:.3f} {y:.3f}" for i, (x, y) in enumerate(problem.coords) if i > 0]
+    lines.append("DEMAND_SECTION")
+    stations = set(problem.stations)
+    lines += [f"{i} {problem.demands.get(i, 0)}" for i in range(1, n + 1) if i not in stations]
+    lines.append("STATIONS_COORD_SECTION")
+    lines += [str(b) for b in problem.stations]
+    lines += ["DEPOT_SECTION", str(problem.depot), "-1"]
+    if getattr(problem, "has_time_windows", False):
+        lines.append("TIME_WINDOW_SECTION")
+        for i in sorted(set(problem.ready_time) | set(problem.due_time)):
+            lines.append(f"{i} {problem.ready_time.get(i, 0.0):g} {problem.due_time.get(i, float('inf')):g} "
+                         f"{problem.service_duration.get(i, 0.0):g}")
+    lines.append("EOF")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
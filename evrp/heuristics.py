@@ -7,6 +7,7 @@ from typing import List, Tuple, Optional
 
 from evrp.costs import full_cost
 from evrp.operators import apply_ul_operator
+from evrp.zobrist import solution_hash
 from evrp.elite import update_elite_archive, cluster_elite_archive
 from .cluster import embed_solution, nearest_centroid_idx, sqdist
 from .solution import quick_repair
@@ -47,11 +48,13 @@ def find_nearest_centroid(solution: List[List[int]], centroids: List[List[float]
 # Unified Lower-level (energy) solver
 # ---------------------------
 
-def solve_ll(sol_or_route, problem, rng: Optional[random.Random] = None, return_trace: bool = False):
+def _route_solver(problem, return_trace: bool = False):
     """
-    Lower-Level EVRP solver (charge-to-full) that injects charging stations directly
-    into the route. Returns:
-        (ok: bool, ll_solution_with_stations, ll_cost: float, trace)
+    Build the single-route charge-to-full solver shared by solve_ll and the
+    batched evaluator (evrp.ll_batch). The returned callable is
+        _one_route(route, start=0, soc=None) -> (ok, route_with_stations, ll_cost, trace)
+    where `start`/`soc` resume the walk at leg `start` with the given state of
+    charge (the legs before `start` are assumed to be driven without charging).
     """
     # Precompute frequently accessed attributes
     D = problem.distance_matrix
@@ -70,43 +73,77 @@ def solve_ll(sol_or_route, problem, rng: Optional[random.Random] = None, return_
     K = getattr(problem, "k_nearest_stations", 5)
     init_soc = (getattr(problem, "init_soc_ratio", 1.0) or 1.0) * BMAX
 
+    # Time windows (evrp.timewindows): the clock is the service start at the
+    # current node; a leg is rejected when its arrival exceeds the latest start
+    # of the rest of the route, which charging stops can only delay further.
+    from .timewindows import time_windows
+    tw = time_windows(problem)
+
     # Cache for station candidates with distance precomputation
     _cand_cache = {}
+    # Many stations: take the K nearest from the grid index instead of sorting
+    # every station. Detours can reorder at most one slot per detoured station,
+    # so K + (#detoured) nearest by distance always contain the K best by
+    # distance + detour; stations farther than one full charge are unreachable.
+    use_index = len(stations) > getattr(problem, "spatial_min_stations", 64)
+    n_detoured = sum(1 for b in stations if detour_km.get(b, 0.0)) if use_index else 0
+    use_index = use_index and 4 * (K + n_detoured) < len(stations)
 
     def candidate_stations(i: int, j: int) -> List[int]:
         """Get feasible stations between i and j with caching."""
         if i not in _cand_cache:
             # Pre-sort stations by distance + detour
-            _cand_cache[i] = sorted(stations,
+            if use_index:
+                from .spatial import nearest_stations
+                pool = [b for b in nearest_stations(problem, i, K + n_detoured)
+                        if D[i][b] + detour_km.get(b, 0.0) <= ev_range_km]
+            else:
+                pool = stations
+            _cand_cache[i] = sorted(pool,
                                     key=lambda b: D[i][b] + detour_km.get(b, 0.0))[:K]
 
         # Filter stations that can reach destination j
         max_dist_to_j = ev_range_km
         return [b for b in _cand_cache[i] if D[b][j] <= max_dist_to_j]
 
-    def _one_route(route: List[int]):
+    def _one_route(route: List[int], start: int = 0, soc: Optional[float] = None):
         """Solve charging for a single route."""
         if len(route) < 2:
             result = (True, route, 0.0, [] if return_trace else None)
             return result
 
-        soc = init_soc
+        soc = init_soc if soc is None else soc
         ll_cost = 0.0
         legs_trace = [] if return_trace else None
-        route_with_stations = [route[0]]  # start at depot
-
-        for t in range(len(route) - 1):
+        route_with_stations = list(route[:start + 1])  # start at depot
+        if return_trace:
+            for t in range(start):
+                legs_trace.append({"i": route[t], "j": route[t + 1], "stop": None, "cost": 0.0})
+
+        if tw is not None:
+            latest = tw.latest_starts(route)
+            clock = tw.ready[route[0]]
+            for t in range(start):  # legs driven without charging
+                clock = max(clock + tw.service[route[t]] + tw.travel(route[t], route[t + 1]),
+                            tw.ready[route[t + 1]])
+                if clock > latest[t + 1] + 1e-9:
+                    return False, route, float("inf"), [] if return_trace else None
+
+        for t in range(start, len(route) - 1):
             i, j = route[t], route[t + 1]
             need_direct = alpha * D[i][j]
 
             # Try direct drive first (common case optimization)
             if soc >= need_direct:
+                if tw is not None:
+                    clock = max(clock + tw.service[i] + tw.travel(i, j), tw.ready[j])
+                    if clock > latest[t + 1] + 1e-9:
+                        return False, route, float("inf"), [] if return_trace else None
                 soc -= need_direct
                 route_with_stations.append(j)
                 if return_trace:
                     legs_trace.append({"i": i, "j": j, "stop": None, "cost": 0.0})
-                else:
-                    pass
+                continue
 
 
             # Need charging - find best station
@@ -127,16 +164,26 @@ def solve_ll(sol_or_route, problem, rng: Optional[random.Random] = None, return_
                 # Calculate cost
                 soc_arr_b = soc - need_ib
                 energy_to_full = BMAX - soc_arr_b  # Always positive due to need_ib check
+                if tw is not None:
+                    t_j = (clock + tw.service[i] + tw.travel(i, b, detour_b)
+                           + tw.charge_time(b, energy_to_full) + tw.travel(b, j))
+                    t_j = max(t_j, tw.ready[j])
+                    if t_j > latest[t + 1] + 1e-9:
+                        continue
                 wbk = wait_cost.get(b, wait_def)
                 rbk = price_map.get(b, price_def)
                 cand_cost = D[i][b] + detour_b + wbk + rbk * energy_to_full
 
                 if cand_cost < best_cost:
                     best_cost, best_b = cand_cost, b
+                    if tw is not None:
+                        best_clock = t_j
 
             if best_b is None:
                 # No feasible station found
                 return False, route, float("inf"), [] if return_trace else None
+            if tw is not None:
+                clock = best_clock
 
             # Apply charging stop
             detour_best = detour_km.get(best_b, 0.0)
@@ -156,8 +203,19 @@ def solve_ll(sol_or_route, problem, rng: Optional[random.Random] = None, return_
 
         return True, route_with_stations, ll_cost, legs_trace
 
+    return _one_route
+
+
+def solve_ll(sol_or_route, problem, rng: Optional[random.Random] = None, return_trace: bool = False):
+    """
+    Lower-Level EVRP solver (charge-to-full) that injects charging stations directly
+    into the route. Returns:
+        (ok: bool, ll_solution_with_stations, ll_cost: float, trace)
+    """
+    _one_route = _route_solver(problem, return_trace)
+
     # --- Main execution ---
-    is_multi_route = sol_or_route and isinstance(sol_or_route[0], list)
+    is_multi_route = sol_or_route and isinstance(sol_or_route[0], (list, tuple))
 
     if is_multi_route:
         total_cost = 0.0
@@ -181,9 +239,45 @@ def solve_ll(sol_or_route, problem, rng: Optional[random.Random] = None, return_
 def solve_ll_exact(sol_or_route, problem, rng: Optional[random.Random] = None):
     """Stable API: return exactly (ok: bool, ll_cost: float)."""
 
+    from .route_store import route_cost_store
+    store = route_cost_store(problem)
+    if store is not None:
+        return _stored_ll_exact(sol_or_route, problem, store)
     ok, _same_input, ll_cost, _trace = solve_ll(sol_or_route, problem, rng, return_trace=False)
     return bool(ok), float(ll_cost)
 
+def _stored_ll_exact(sol_or_route, problem, store):
+    """
+    solve_ll_exact route by route: the in-process route memo
+    (segments.route_ll_cache) first, then the persistent store
+    (evrp.route_store), then the solver; both caches are warmed.
+    """
+    from .segments import route_ll_cache
+    from .zobrist import route_hash
+    routes = sol_or_route if sol_or_route and isinstance(sol_or_route[0], (list, tuple)) else [sol_or_route]
+    memo = route_ll_cache(problem)
+    one_route = None
+    total = 0.0
+    for route in routes:
+        key = route_hash(route)
+        c = memo.get(key)
+        if c is not None:
+            problem._ll_hits = getattr(problem, "_ll_hits", 0) + 1
+        else:
+            problem._ll_misses = getattr(problem, "_ll_misses", 0) + 1
+            c = store.get(key)
+            if c is None:
+                if one_route is None:
+                    one_route = _route_solver(problem)
+                ok, _, c, _ = one_route(route)
+                c = c if ok else float("inf")
+                store.put(key, c)
+            memo[key] = c
+        if not isfinite(c):
+            return False, float("inf")
+        total += c
+    return True, total
+
 def _solve_ll_exact3(solution, problem, rng=None):
     """
     Normalize various return shapes from solve_ll / solve_ll_exact
@@ -249,7 +343,7 @@ def is_promising_ul(sol_or_route, problem) -> bool:
                 return True
         return False
 
-    if sol_or_route and isinstance(sol_or_route[0], list):
+    if sol_or_route and isinstance(sol_or_route[0], (list, tuple)):
         for route in sol_or_route:
             for t in range(len(route) - 1):
                 if not arc_ok(route[t], route[t + 1]):
@@ -266,8 +360,21 @@ def is_promising_ul(sol_or_route, problem) -> bool:
 # ---------------------------
 # UL Heuristics (actions)
 # ---------------------------
+# Each returns the child routes, or (routes, Zobrist hash) with with_hash=True
+# (the hash maintained by the VND, see _vnd_with_sa).
+
+def _ul_step(start, problem, rng, with_hash):
+    """apply_ul_operator + quick_repair."""
+    child, h = apply_ul_operator(start, problem, rng, with_hash=True)
+    repaired = quick_repair(child, problem)
+    if not with_hash:
+        return repaired
+    if any(len(a) != len(b) for a, b in zip(repaired, child)):   # depots were added
+        h = solution_hash(repaired)
+    return repaired, h
+
 
-def heuristic_h1_full_hierarchical(parent, elite, centroids, problem, rng):
+def heuristic_h1_full_hierarchical(parent, elite, centroids, problem, rng, with_hash=False):
     """
     H1 – Full Hierarchical:
     Solve LL exactly for each UL solution, align with nearest centroid,
@@ -289,11 +396,10 @@ def heuristic_h1_full_hierarchical(parent, elite, centroids, problem, rng):
             if best_e is not None:
                 start = best_e
 
-    child = apply_ul_operator(start, problem, rng)
-    return quick_repair(child, problem)
+    return _ul_step(start, problem, rng, with_hash)
 
 
-def heuristic_h2_selective_ll(parent, elite, problem, rng):
+def heuristic_h2_selective_ll(parent, elite, problem, rng, with_hash=False):
     """
     H2 – Selective LL Evaluation:
     Evaluate LL only for promising ULs, then apply UL operator for exploration.
@@ -307,33 +413,29 @@ def heuristic_h2_selective_ll(parent, elite, problem, rng):
                 max_size=getattr(problem, "elite_max", 120)
             )
 
-    child = apply_ul_operator(parent, problem, rng)
-    return quick_repair(child, problem)
+    return _ul_step(parent, problem, rng, with_hash)
 
 
-def heuristic_h3_relaxed_ll(parent, problem, rng):
+def heuristic_h3_relaxed_ll(parent, problem, rng, with_hash=False):
     """
     H3 – Relaxed LL:
     Skip LL solving; perform quick UL exploration only.
     """
-    child = apply_ul_operator(parent, problem, rng)
-    return quick_repair(child, problem)
+    return _ul_step(parent, problem, rng, with_hash)
 
 
-def heuristic_h4_similarity_based(parent, centroids, elite, problem, rng):
+def heuristic_h4_similarity_based(parent, centroids, elite, problem, rng, with_hash=False):
     """
     H4 – Similarity-based:
     Start from the elite solution closest to the parent’s nearest centroid.
     """
     centroids, _ = _ensure_centroids(elite, centroids, rng)
     if not centroids:
-        child = apply_ul_operator(parent, problem, rng)
-        return quick_repair(child, problem)
+        return _ul_step(parent, problem, rng, with_hash)
 
     ci = find_nearest_centroid(parent, centroids, problem)
     if ci < 0:
-        child = apply_ul_operator(parent, problem, rng)
-        return quick_repair(child, problem)
+        return _ul_step(parent, problem, rng, with_hash)
 
     target = centroids[ci]
     best_sol, best_d = None, float("inf")
@@ -343,12 +445,11 @@ def heuristic_h4_similarity_based(parent, centroids, elite, problem, rng):
             best_d, best_sol = d, sol
 
     start = best_sol if best_sol is not None else parent
-    child = apply_ul_operator(start, problem, rng)
-    return quick_repair(child, problem)
+    return _ul_step(start, problem, rng, with_hash)
 #ok, sol, ll_cost, trace = heuristics.solve_ll(solution, problem, return_trace=True)
 def get_used_stations(ll_solution, problem):
     """Extract all stations used in the solution"""
-    if ll_solution and isinstance(ll_solution[0], list):
+    if ll_solution and isinstance(ll_solution[0], (list, tuple)):
         # Multiple routes
         stations = []
         for route in ll_solution:
@@ -0,0 +1,194 @@
+# evrp/livemetrics.py
+from __future__ import annotations
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from .costs import eval_count
+from .memprof import current_rss_mb, peak_rss_mb
+from .runlog import _json_safe
+from .segments import ll_cache_stats
+
+# ---------------------------
+# Live metrics endpoint
+# ---------------------------
+# A small HTTP server on a daemon thread of the optimizing process:
+#   GET /metrics       Prometheus text exposition format
+#   GET /metrics.json  the same snapshot as JSON
+# The optimizer reports once per generation (cfg.live_metrics, duck-typed like
+# cfg.run_logger); evaluation and LL cache counters are read from the problem
+# when a scrape arrives, so throughput stays current inside long generations.
+# Nothing is computed unless the endpoint is scraped.
+
+MB = 1024.0 * 1024.0
+
+
+class LiveMetrics:
+    """
+    Live run state served over HTTP. `meta` (e.g. instance, seed) becomes
+    Prometheus labels and JSON fields; evaluations/s is averaged over the
+    last `window` seconds. port=0 picks a free port (see .port).
+    """
+
+    def __init__(self, port: int = 9108, host: str = "127.0.0.1",
+                 meta: Optional[Dict[str, Any]] = None, window: float = 30.0):
+        self.host = host
+        self.port = port
+        self.meta = {k: str(v) for k, v in (meta or {}).items()}
+        self.window = window
+        self.problem = None
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._evals0 = 0
+        self._samples: deque = deque()
+        self._state: Dict[str, Any] = {"running": 0, "generation": None, "best_cost": None,
+                                       "action": None, "heuristic_uses": {}}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # --- optimizer side ---
+
+    def start(self) -> "LiveMetrics":
+        self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.live = self
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="evrp-metrics", daemon=True).start()
+        return self
+
+    def attach(self, problem) -> None:
+        """Called when a run starts; counters are reported relative to this point."""
+        with self._lock:
+            self.problem = problem
+            self._t0 = time.perf_counter()
+            self._evals0 = eval_count(problem)
+            self._samples.clear()
+            self._samples.append((self._t0, 0))
+            self._state.update(running=1, generation=None, best_cost=None, action=None, heuristic_uses={})
+
+    def generation(self, gen: int, best: float, action: str) -> None:
+        with self._lock:
+            uses = self._state["heuristic_uses"]
+            uses[action] = uses.get(action, 0) + 1
+            self._state.update(generation=gen, best_cost=best, action=action)
+
+    def finish(self, best: float) -> None:
+        with self._lock:
+            self._state.update(running=0, best_cost=best)
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # --- scrape side ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        with self._lock:
+            snap = dict(self._state, heuristic_uses=dict(self._state["heuristic_uses"]))
+            problem = self.problem
+            evals = eval_count(problem) - self._evals0 if problem is not None else 0
+            # rate against the newest sample at least `window` old (or the run start)
+            samples = self._samples
+            while len(samples) > 1 and now - samples[1][0] >= self.window:
+                samples.popleft()
+            t_old, e_old = samples[0] if samples else (self._t0, 0)
+            samples.append((now, evals))
+        snap.update(self.meta)
+        snap["uptime_s"] = now - self._t0
+        snap["evaluations"] = evals
+        snap["evals_per_s"] = (evals - e_old) / (now - t_old) if now > t_old else 0.0
+        hits, misses = ll_cache_stats(problem) if problem is not None else (0, 0)
+        snap["ll_cache_hits"], snap["ll_cache_misses"] = hits, misses
+        snap["ll_cache_hit_rate"] = hits / (hits + misses) if hits + misses else None
+        store = getattr(problem, "_route_store", None)
+        if store is not None:
+            snap["route_store_hits"], snap["route_store_misses"] = store.stats()
+        rss, peak = current_rss_mb(), peak_rss_mb()
+        snap["rss_mb"] = rss
+        snap["peak_rss_mb"] = peak
+        return snap
+
+    def prometheus(self) -> str:
+        s = self.snapshot()
+        labels = ",".join(f'{k}="{_escape(v)}"' for k, v in self.meta.items())
+        lines = []
+
+        def metric(name, kind, help_, value, extra=""):
+            if value is None:
+                return
+            lines.append(f"# HELP evrp_{name} {help_}")
+            lines.append(f"# TYPE evrp_{name} {kind}")
+            lab = ",".join(x for x in (labels, extra) if x)
+            lines.append(f"evrp_{name}{{{lab}}} {_num(value)}" if lab else f"evrp_{name} {_num(value)}")
+
+        metric("running", "gauge", "1 while the optimization loop runs.", s["running"])
+        metric("generation", "gauge", "Last completed generation.", s["generation"])
+        metric("best_cost", "gauge", "Best full cost found so far.", s["best_cost"])
+        metric("uptime_seconds", "gauge", "Seconds since the run started.", s["uptime_s"])
+        metric("evaluations_total", "counter", "Solution evaluations this run.", s["evaluations"])
+        metric("evaluations_per_second", "gauge",
+               f"Solution evaluations per second over the last {self.window:g} s.", s["evals_per_s"])
+        metric("ll_cache_hits_total", "counter", "Route LL memo hits.", s["ll_cache_hits"])
+        metric("ll_cache_misses_total", "counter", "Route LL memo misses.", s["ll_cache_misses"])
+        metric("ll_cache_hit_ratio", "gauge", "Route LL memo hit rate.", s["ll_cache_hit_rate"])
+        metric("route_store_hits_total", "counter", "Persistent route-cost store hits.", s.get("route_store_hits"))
+        metric("route_store_misses_total", "counter", "Persistent route-cost store misses.",
+               s.get("route_store_misses"))
+        metric("rss_bytes", "gauge", "Resident set size.", None if s["rss_mb"] is None else s["rss_mb"] * MB)
+        metric("peak_rss_bytes", "gauge", "Peak resident set size.",
+               None if s["peak_rss_mb"] is None else s["peak_rss_mb"] * MB)
+        if s["heuristic_uses"]:
+            lines.append("# HELP evrp_heuristic_uses_total Generations in which each heuristic was applied.")
+            lines.append("# TYPE evrp_heuristic_uses_total counter")
+            for h, n in sorted(s["heuristic_uses"].items()):
+                lab = ",".join(x for x in (labels, f'heuristic="{_escape(h)}"') if x)
+                lines.append(f"evrp_heuristic_uses_total{{{lab}}} {n}")
+        return "\n".join(lines) + "\n"
+
+    def __enter__(self) -> "LiveMetrics":
+        return self.start() if self._server is None else self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _num(v) -> str:
+    v = float(v)
+    if math.isnan(v):
+        return "NaN"
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(v) if not v.is_integer() else str(int(v))
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    server_version = "evrp-metrics/1.0"
+
+    def do_GET(self):
+        live = self.server.live
+        if self.path == "/metrics":
+            body, ctype = live.prometheus().encode(), "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path == "/metrics.json":
+            body, ctype = json.dumps(_json_safe(live.snapshot())).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass  # scrapes would interleave with the generation log
@@ -0,0 +1,170 @@
+# evrp/ll_batch.py
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .data import Problem, distance_array
+from .heuristics import _route_solver
+from .timewindows import time_windows
+
+# ---------------------------
+# Padded route matrices
+# ---------------------------
+
+def pad_routes(routes: Sequence[Sequence[int]], fill: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stack routes into a (n_routes, max_len) int32 matrix plus their lengths.
+    Padding uses node 0, whose row/col in the 1-based distance matrix is zero,
+    so padded legs cost nothing.
+    """
+    n = len(routes)
+    lengths = np.fromiter((len(r) for r in routes), dtype=np.int32, count=n)
+    width = int(lengths.max()) if n else 0
+    R = np.full((n, max(width, 1)), fill, dtype=np.int32)
+    for k, r in enumerate(routes):
+        if len(r):
+            R[k, :len(r)] = r
+    return R, lengths
+
+
+def demand_array(problem: Problem) -> np.ndarray:
+    """Node demands as a float array indexed by node id (0 for depot/stations/padding)."""
+    cached = getattr(problem, "_demand_array", None)
+    if cached is not None and cached[0] is problem.demands:
+        return cached[1]
+    q = np.zeros(len(problem.coords), dtype=np.float64)
+    for i, d in (problem.demands or {}).items():
+        q[i] = d
+    problem._demand_array = (problem.demands, q)
+    return q
+
+
+def leg_distances(R: np.ndarray, problem: Problem) -> np.ndarray:
+    """(n_routes, max_len - 1) matrix of leg distances of a padded route matrix."""
+    D = distance_array(problem)
+    if R.shape[1] < 2:
+        return np.zeros((R.shape[0], 0))
+    return D[R[:, :-1], R[:, 1:]]
+
+
+# ---------------------------
+# Batched lower-level solver
+# ---------------------------
+
+def solve_ll_batch(
+    routes,
+    problem: Problem,
+    lengths: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lower-level cost of many routes at once.
+
+    `routes` is either a list of routes or a padded int matrix (see pad_routes,
+    `lengths` then required). Leg energies, cumulative SoC and the first
+    depletion leg are computed with array ops; only routes that actually run
+    out of energy are handed to the scalar station-insertion logic, resumed at
+    their first depleted leg. With time windows, the charge-free routes are
+    checked by evrp.timewindows (ok=False, cost inf when late). Returns:
+        (ok: bool[n], ll_cost: float[n], first_depletion: int[n], -1 if none)
+    """
+    if isinstance(routes, np.ndarray):
+        R = routes
+        if lengths is None:
+            raise ValueError("lengths is required when passing a padded route matrix.")
+    else:
+        R, lengths = pad_routes(routes)
+
+    n = R.shape[0]
+    ok = np.ones(n, dtype=bool)
+    cost = np.zeros(n, dtype=np.float64)
+    first = np.full(n, -1, dtype=np.int64)
+    if n == 0 or R.shape[1] < 2:
+        return ok, cost, first
+
+    alpha = getattr(problem, "energy_consumption", 1.0)
+    init_soc = (getattr(problem, "init_soc_ratio", 1.0) or 1.0) * problem.energy_capacity
+
+    energy = alpha * leg_distances(R, problem)
+    used = np.cumsum(energy, axis=1)
+    soc_after = init_soc - used                      # SoC after each leg, no charging
+    depleted = soc_after < 0.0
+    needs = depleted.any(axis=1)
+    first[needs] = depleted[needs].argmax(axis=1)
+
+    if needs.any():
+        one_route = _route_solver(problem)
+        for k in np.flatnonzero(needs):
+            t = int(first[k])
+            soc = init_soc if t == 0 else float(soc_after[k, t - 1])
+            route = R[k, :lengths[k]].tolist()
+            ok_k, _, c, _ = one_route(route, start=t, soc=soc)
+            ok[k] = ok_k
+            cost[k] = c
+
+    tw = time_windows(problem)
+    if tw is not None:
+        for k in np.flatnonzero(~needs):
+            if not tw.feasible(R[k, :lengths[k]].tolist()):
+                ok[k] = False
+                cost[k] = np.inf
+    return ok, cost, first
+
+
+def full_cost_batch(
+    solutions: Sequence[List[List[int]]],
+    problem: Problem,
+    upper_bound: Optional[float] = None,
+) -> List[float]:
+    """
+    Vectorized full_cost over a whole population: all routes of all solutions
+    go through one padded matrix, then are reduced back per solution.
+    With `upper_bound`, solutions whose distance alone exceeds it skip the LL
+    pass and get costs.BOUND_EXCEEDED, as full_cost does. Overloaded routes
+    make their solution inf (or add problem.capacity_penalty per unit of
+    excess) and, when hard, keep it out of the LL pass.
+    """
+    from .costs import BOUND_EXCEEDED, count_evals
+
+    count_evals(problem, len(solutions))
+    routes: List[List[int]] = []
+    owner: List[int] = []
+    for s_idx, sol in enumerate(solutions):
+        for route in sol:
+            routes.append(route)
+            owner.append(s_idx)
+    if not routes:
+        return [0.0] * len(solutions)
+
+    R, lengths = pad_routes(routes)
+    dist = leg_distances(R, problem).sum(axis=1)
+    owner_arr = np.asarray(owner)
+    m = len(solutions)
+    ul = np.bincount(owner_arr, weights=dist, minlength=m)
+
+    excess = np.maximum(demand_array(problem)[R].sum(axis=1) - problem.capacity, 0.0)
+    penalty = getattr(problem, "capacity_penalty", None)
+    if penalty:
+        ul = ul + penalty * np.bincount(owner_arr, weights=excess, minlength=m)
+    else:
+        ul[np.bincount(owner_arr, weights=excess, minlength=m) > 1e-9] = np.inf
+
+    ok = np.ones(len(routes), dtype=bool)
+    ll_cost = np.zeros(len(routes))
+    live = np.isfinite(ul[owner_arr])
+    if upper_bound is not None:
+        live &= ul[owner_arr] <= upper_bound
+    if live.any():
+        ok_l, ll_l, _ = solve_ll_batch(R[live], problem, lengths[live])
+        ok[live], ll_cost[live] = ok_l, ll_l
+
+    totals = ul + np.bincount(owner_arr, weights=np.where(ok, ll_cost, 0.0), minlength=m)
+    infeasible = (np.bincount(owner_arr, weights=~ok, minlength=m) > 0) | np.isinf(ul)
+    totals[infeasible] = np.inf
+    out = totals.tolist()
+    if upper_bound is not None:
+        for k in range(m):
+            if out[k] > upper_bound and not infeasible[k]:
+                out[k] = BOUND_EXCEEDED
+    return out
@@ -0,0 +1,174 @@
+# evrp/memprof.py
+from __future__ import annotations
+
+import contextlib
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ---------------------------
+# Process memory
+# ---------------------------
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process (MB), None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size (MB) from /proc, None where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# ---------------------------
+# Container sizes
+# ---------------------------
+
+def _routes_bytes(sol) -> int:
+    """Shallow footprint of one solution: the route lists plus their int objects."""
+    if hasattr(sol, "nbytes"):
+        return sol.nbytes
+    total = sys.getsizeof(sol)
+    for r in sol:
+        total += sys.getsizeof(r) + 28 * len(r)
+    return total
+
+
+def structure_sizes(population=None, elite=None, cost_cache=None, history=None, problem=None) -> Dict[str, Any]:
+    """Entry counts and approximate bytes of the optimizer's growing containers."""
+    out: Dict[str, Any] = {}
+    if population is not None:
+        out["pop_n"] = len(population)
+        out["pop_bytes"] = sum(_routes_bytes(s) for s in population)
+    if elite is not None:
+        out["elite_n"] = len(elite)
+        out["elite_bytes"] = sum(_routes_bytes(e[1]) + sys.getsizeof(e[2]) for e in elite)
+    if cost_cache is not None:
+        out["cost_cache_n"] = len(cost_cache)
+        out["cost_cache_bytes"] = sys.getsizeof(cost_cache) + 56 * len(cost_cache)
+    if history is not None:
+        out["history_n"] = len(history)
+    if problem is not None:
+        ll = getattr(problem, "_ll_route_cache", None)
+        out["ll_cache_n"] = len(ll) if ll is not None else 0
+        tabu = getattr(problem, "_tabu", None)
+        out["tabu_n"] = len(tabu) if tabu is not None else 0
+        dist = getattr(problem, "_distance_array", None)
+        out["dist_array_bytes"] = int(dist[1].nbytes) if dist is not None else 0
+    return out
+
+
+# ---------------------------
+# Profiler
+# ---------------------------
+
+class MemoryProfiler:
+    """
+    Opt-in memory profiling of a run. Records, into a RunLogger (kind="mem")
+    and an in-memory list:
+      - per phase (begin()/end() or `with prof.phase(name):`): current / peak RSS and the
+        top tracemalloc allocation sites that grew during the phase;
+      - per generation (`prof.generation(gen, ...)`): RSS and the sizes of the
+        population, elite archive and caches (see structure_sizes).
+    tracemalloc slows allocation-heavy code noticeably, so it is only started
+    when `trace` is True; RSS and container sizes are cheap.
+    """
+
+    def __init__(self, run_logger=None, trace: bool = True, top: int = 10, frames: int = 1,
+                 every: int = 1):
+        self.run_logger = run_logger
+        self.trace = trace
+        self.top = top
+        self.frames = frames
+        self.every = max(1, every)
+        self.records: List[Dict[str, Any]] = []
+        self._started_trace = False
+        self._phase = None
+
+    def start(self) -> "MemoryProfiler":
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_trace = True
+        return self
+
+    def stop(self) -> None:
+        if self._started_trace:
+            tracemalloc.stop()
+            self._started_trace = False
+
+    def _emit(self, rec: Dict[str, Any]) -> None:
+        self.records.append(rec)
+        if self.run_logger is not None:
+            self.run_logger.log("mem", **rec)
+
+    def begin(self, name: str) -> None:
+        """Start a phase; phases do not nest (a running one is closed first)."""
+        if self._phase is not None:
+            self.end()
+        before = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        if before is not None:
+            tracemalloc.reset_peak()
+        self._phase = (name, before, time.perf_counter())
+
+    def end(self) -> None:
+        name, before, t0 = self._phase
+        self._phase = None
+        rec: Dict[str, Any] = {
+            "phase": name,
+            "wall_s": time.perf_counter() - t0,
+            "rss_mb": current_rss_mb(),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        if before is not None and tracemalloc.is_tracing():
+            after = tracemalloc.take_snapshot()
+            cur, peak = tracemalloc.get_traced_memory()
+            rec["traced_mb"] = cur / 1048576.0
+            rec["traced_peak_mb"] = peak / 1048576.0
+            rec["top"] = [
+                {"site": str(st.traceback[0]) if st.traceback else "?",
+                 "kb": st.size_diff / 1024.0, "count": st.count_diff}
+                for st in after.compare_to(before, "lineno")[:self.top]
+            ]
+        self._emit(rec)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def generation(self, gen: int, **containers) -> None:
+        if gen % self.every:
+            return
+        rec = {"phase": "gen", "gen": gen, "rss_mb": current_rss_mb(), "peak_rss_mb": peak_rss_mb()}
+        rec.update(structure_sizes(**containers))
+        self._emit(rec)
+
+    def summary(self) -> str:
+        peak = peak_rss_mb()
+        lines = [f"[mem] peak RSS: {peak:.1f} MB" if peak is not None else "[mem] peak RSS: n/a"]
+        for rec in self.records:
+            if rec["phase"] == "gen" or "top" not in rec:
+                continue
+            lines.append(f"[mem] phase {rec['phase']}: traced peak {rec['traced_peak_mb']:.1f} MB")
+            for site in rec["top"][:3]:
+                lines.append(f"[mem]   {site['kb']:+.1f} KB  {site['site']}")
+        return "\n".join(lines)
@@ -1,38 +1,42 @@
 import math, random
-from .solution import clone_solution
-from .costs import full_cost
+import numpy as np
+from .solution import as_routes, clone_solution
+from .costs import full_cost, BOUND_EXCEEDED, count_evals
+from .data import distance_array
+from .segments import SolutionSegments, apply_move
+from .surrogate import get_surrogate
+from .parallel import neighborhood_pool
+from .zobrist import solution_hash
 
 def _valid_customer_pos(route):
     # positions 1..len-2 (exclude depots)
     return range(1, max(1, len(route)-1))
 
-def _two_opt_once(sol, problem, rng):
+# --- Move enumerators (descriptors, see evrp.segments) ---
+
+def _two_opt_moves(sol):
     for r_idx, route in enumerate(sol):
         n = len(route)
         if n < 4: continue
         for i in range(1, n-2):
             for j in range(i+1, n-1):
-                cand = clone_solution(sol)
-                cand[r_idx] = route[:i] + list(reversed(route[i:j+1])) + route[j+1:]
-                yield cand
+                yield ("2opt", r_idx, i, j)
 
-def _relocate_once(sol, problem, rng):
+def _relocate_moves(sol):
     R = len(sol)
     for a in range(R):
         ra = sol[a]
         if len(ra) < 3: continue
         for i in _valid_customer_pos(ra):
-            node = ra[i]
             for b in range(R):
                 rb = sol[b]
-                for j in range(1, len(rb)):  # insert before last depot
+                # insert before last depot (route a is one node shorter after the pop)
+                last = len(rb) - 1 if a == b else len(rb)
+                for j in range(1, last):
                     if a == b and (j == i or j == i+1): continue
-                    cand = clone_solution(sol)
-                    cand[a].pop(i)
-                    cand[b].insert(j, node)
-                    yield cand
+                    yield ("relocate", a, i, b, j)
 
-def _swap_once(sol, problem, rng):
+def _swap_moves(sol):
     R = len(sol)
     for a in range(R):
         ra = sol[a]
@@ -42,16 +46,290 @@ def _swap_once(sol, problem, rng):
             if len(rb) < 3: continue
             for i in _valid_customer_pos(ra):
                 for j in _valid_customer_pos(rb):
-                    cand = clone_solution(sol)
-                    cand[a][i], cand[b][j] = cand[b][j], cand[a][i]
-                    yield cand
+                    yield ("swap", a, i, b, j)
+
+def _or_opt_moves(sol, chain_lengths=(2, 3)):
+    R = len(sol)
+    for a in range(R):
+        ra = sol[a]
+        for L in chain_lengths:
+            for i in range(1, len(ra) - L):
+                for b in range(R):
+                    rb = sol[b]
+                    last = len(rb) - L if a == b else len(rb)
+                    for j in range(1, last):
+                        if a == b and j == i: continue
+                        yield ("oropt", a, i, L, b, j)
+
+# --- Candidate generators (full solutions) ---
+
+def _two_opt_once(sol, problem, rng):
+    for m in _two_opt_moves(sol):
+        yield apply_move(clone_solution(sol), m)
+
+def _relocate_once(sol, problem, rng):
+    for m in _relocate_moves(sol):
+        yield apply_move(clone_solution(sol), m)
+
+def _swap_once(sol, problem, rng):
+    for m in _swap_moves(sol):
+        yield apply_move(clone_solution(sol), m)
+
+def _or_opt_once(sol, problem, rng):
+    for m in _or_opt_moves(sol):
+        yield apply_move(clone_solution(sol), m)
+
+_MOVES = {
+    _two_opt_once: _two_opt_moves,
+    _relocate_once: _relocate_moves,
+    _swap_once: _swap_moves,
+    _or_opt_once: _or_opt_moves,
+}
 
 def _accept(old_cost, new_cost, T, rng):
     if new_cost <= old_cost: return True
     return T > 1e-12 and (rng.random() < math.exp(-(new_cost-old_cost)/T))
 
-def _vnd_with_sa(parent, problem, rng, T0=0.02, max_passes=2):
-    current = clone_solution(parent)
+def _draw_threshold(cur_cost, best_cost, T, rng):
+    """
+    Draw the SA uniform before evaluating a candidate and return (u, bound):
+    any candidate costing more than `bound` is rejected whatever its exact
+    cost, so it can be evaluated with full_cost(..., upper_bound=bound).
+    """
+    if T <= 1e-12:
+        return None, max(best_cost, cur_cost)
+    u = rng.random()
+    if u <= 0.0:
+        return u, float("inf")
+    return u, max(best_cost, cur_cost - T * math.log(u))
+
+def _drawn_bound(u, cur_cost, best_cost, T):
+    """The bound _draw_threshold gives for an already drawn uniform u (None when T = 0)."""
+    if u is None:
+        return max(best_cost, cur_cost)
+    return float("inf") if u <= 0.0 else max(best_cost, cur_cost - T * math.log(u))
+
+def _accept_drawn(cur_cost, best_cost, new_cost, T, u):
+    if new_cost < best_cost or new_cost <= cur_cost: return True
+    return u is not None and u < math.exp(-(new_cost-cur_cost)/T)
+
+def _tabu_memory(problem):
+    """
+    Recently visited solution hashes (insertion-ordered dict used as a set),
+    shared by all VND calls of a run; None when problem.tabu_tenure is unset.
+    """
+    if not getattr(problem, "tabu_tenure", 0):
+        return None
+    tabu = getattr(problem, "_tabu", None)
+    if tabu is None:
+        tabu = problem._tabu = {}
+    return tabu
+
+def _tabu_add(tabu, h, tenure):
+    tabu.pop(h, None)
+    tabu[h] = True
+    while len(tabu) > tenure:
+        del tabu[next(iter(tabu))]
+
+def _screen_moves(segs, moves, top_k):
+    """
+    Rank a neighborhood by surrogate cost and keep the top_k moves (best
+    first) for exact evaluation.
+    """
+    moves = list(moves)
+    if len(moves) > top_k:
+        est = [segs.estimate(m) for m in moves]
+        order = sorted(range(len(moves)), key=est.__getitem__)[:top_k]
+        kept = [moves[i] for i in order]
+    else:
+        kept = moves
+    segs.surrogate.record_screening(len(moves), len(kept))
+    return kept
+
+def _repair_penalty(problem):
+    """Cost per unit of excess load while repairing an overloaded start (problem.capacity_repair_penalty)."""
+    p = getattr(problem, "capacity_repair_penalty", None)
+    return p if p is not None else 2.0 * float(distance_array(problem).max())
+
+def _n_two_opt(sol):
+    return sum((len(r) - 2) * (len(r) - 3) // 2 for r in sol if len(r) >= 4)
+
+def _loosest_bounds(thr, cur_cost):
+    """
+    Upper bound on the serial loop's running best_cost before each move k:
+    max(cur_cost, thr[0..k-1]). best_cost only moves to the cost of an
+    accepted move j, which is at most max(best_cost, thr[j]), so by induction
+    it never exceeds this prefix max, even when SA accepts a worse move.
+    """
+    prev = np.empty(len(thr))
+    prev[0] = cur_cost
+    if len(thr) > 1:
+        prev[1:] = np.maximum.accumulate(np.maximum(thr[:-1], cur_cost))
+    return prev
+
+def _two_opt_scan(segs, cur_cost, T, rng, tabu):
+    """
+    The 2-opt neighborhood of _vnd_with_sa without a per-move Python
+    evaluation. The SA uniforms are drawn exactly as the serial loop draws
+    them; the cost bound of every move comes from one vectorized pass
+    (SolutionSegments.two_opt_bounds). Moves whose bound exceeds their
+    acceptance threshold are dropped, charge-free ones take their exact
+    vectorized cost, and only the rest go through evaluate (LL included).
+    Returns the same (best_move, best_cost) as the move-by-move loop.
+    """
+    R, I, J, lb, exact = segs.two_opt_bounds()
+    n = len(lb)
+    best_move, best_cost = None, cur_cost
+    if not n:
+        return best_move, best_cost
+    if T <= 1e-12:
+        us = None
+        thr = np.full(n, -math.inf)
+    else:
+        us = [rng.random() for _ in range(n)]
+        with np.errstate(divide="ignore"):
+            thr = cur_cost - T * np.log(np.array(us))
+    # the serial bound of move k is max(running best_cost, thr[k]), and
+    # _loosest_bounds caps the running best, so this mask is a superset of
+    # what passes; the slack covers rounding differences with the scalar
+    # computations
+    cand = np.flatnonzero(lb <= np.maximum(_loosest_bounds(thr, cur_cost), thr) + 1e-6)
+    evaluated = 0
+    for k in cand.tolist():
+        bound = _drawn_bound(us[k] if us else None, cur_cost, best_cost, T)
+        if lb[k] > bound + 1e-6:
+            continue
+        move = ("2opt", int(R[k]), int(I[k]), int(J[k]))
+        if exact[k]:
+            c = float(lb[k])
+            if c > bound:
+                continue
+        else:
+            c = segs.evaluate(move, upper_bound=bound)
+            evaluated += 1
+        if c is not BOUND_EXCEEDED and _accept_drawn(cur_cost, best_cost, c, T, us[k] if us else None):
+            if tabu is not None and segs.candidate_hash(move) in tabu:
+                continue
+            best_move, best_cost = move, c
+    count_evals(segs.problem, n - evaluated)  # the moves the serial loop would have scored
+    return best_move, best_cost
+
+def _parallel_scan(pool, segs, moves, cur_cost, T, rng, tabu):
+    """
+    A relocate / swap neighborhood of _vnd_with_sa scored in the worker pool
+    (evrp.parallel). The SA uniforms are drawn up front in move order, each
+    move is evaluated against the loosest bound it can face in the serial
+    loop (_loosest_bounds), and the acceptance rule is then replayed in move
+    order, so the result is the serial one for the same seed.
+    """
+    n = len(moves)
+    us = None if T <= 1e-12 else [rng.random() for _ in range(n)]
+    if us is None:
+        bounds = [cur_cost] * n
+    else:
+        with np.errstate(divide="ignore"):
+            thr = cur_cost - T * np.log(np.array(us))
+        bounds = np.maximum(_loosest_bounds(thr, cur_cost), thr).tolist()
+    costs = pool.evaluate(segs, moves, bounds)
+    count_evals(segs.problem, n)
+    best_move, best_cost = None, cur_cost
+    for k, move in enumerate(moves):
+        c = costs[k]
+        u = us[k] if us else None
+        if c is BOUND_EXCEEDED or c > _drawn_bound(u, cur_cost, best_cost, T):
+            continue  # BOUND_EXCEEDED in the serial loop too
+        if _accept_drawn(cur_cost, best_cost, c, T, u):
+            if tabu is not None and segs.candidate_hash(move) in tabu:
+                continue
+            best_move, best_cost = move, c
+    return best_move, best_cost
+
+def _vnd_with_sa(parent, problem, rng, T0=0.02, max_passes=2, with_hash=False):
+    """
+    VND over (2-opt, relocate, swap) with simulated-annealing acceptance.
+    By default candidates are costed through route-segment summaries
+    (evrp.segments): O(1) per move, exact LL only for touched routes that
+    need charging, and a solution is built only for accepted moves. Each
+    candidate is evaluated against the SA acceptance threshold drawn up
+    front, so losers are abandoned as soon as they exceed it. Moves that
+    overload a route are skipped in O(1) (see SolutionSegments.capacity_ok;
+    problem.capacity_penalty prices them instead). An overloaded start under
+    hard capacity is searched with the excess priced (_repair_penalty), so
+    the VND can walk it back under capacity instead of facing inf everywhere. With
+    problem.surrogate_top_k set, each neighborhood is ranked by the LL
+    surrogate (evrp.surrogate) and only its top-k moves are evaluated. With
+    problem.tabu_tenure > 0, moves leading to one of the last visited
+    solutions (by Zobrist hash, across calls) are skipped. Without the
+    surrogate, 2-opt neighborhoods of at least problem.two_opt_vector_min
+    moves (default 500) are scanned vectorized (_two_opt_scan), and with
+    problem.vnd_workers > 1 relocate / swap neighborhoods of at least
+    problem.vnd_parallel_min moves (default 2000) are scored in a process
+    pool (_parallel_scan); both give the serial result for a fixed seed. Set
+    problem.use_segments = False to score every cloned candidate with full_cost.
+    With with_hash=True, returns (routes, Zobrist solution hash); the hash is
+    the one SolutionSegments keeps up to date per applied move, so callers
+    can key caches without rehashing the solution.
+    """
+    if not getattr(problem, "use_segments", True):
+        out = _vnd_with_sa_full(parent, problem, rng, T0, max_passes)
+        return (out, solution_hash(out)) if with_hash else out
+
+    top_k = getattr(problem, "surrogate_top_k", None)
+    surrogate = get_surrogate(problem) if top_k else None
+    segs = SolutionSegments(as_routes(parent), problem, surrogate=surrogate)
+    repairing = segs.hard_capacity and segs.overloaded()
+    if repairing:
+        segs = SolutionSegments(segs.sol, problem, surrogate=surrogate,
+                                capacity_penalty=_repair_penalty(problem))
+    current, cur_cost = segs.sol, segs.total
+    tabu = _tabu_memory(problem)
+    if tabu is not None:
+        _tabu_add(tabu, segs.solution_hash, problem.tabu_tenure)
+    neighborhoods = (_two_opt_once, _relocate_once, _swap_once)
+    vector_min = getattr(problem, "two_opt_vector_min", 500)
+    pool = None if repairing else neighborhood_pool(problem)  # workers score with the problem's capacity rule
+    parallel_min = getattr(problem, "vnd_parallel_min", 2000)
+
+    T = T0
+    for _ in range(max_passes):
+        improved = False
+        for gen in neighborhoods:
+            best_move, best_cost = None, cur_cost
+            if (gen is _two_opt_once and not top_k and cur_cost < math.inf
+                    and _n_two_opt(current) >= vector_min):
+                best_move, best_cost = _two_opt_scan(segs, cur_cost, T, rng, tabu)
+                moves = ()
+            else:
+                # overloaded moves are dropped on the tracked route loads,
+                # before any SA draw, distance or LL work
+                moves = filter(segs.capacity_ok, _MOVES[gen](current))
+                if top_k:
+                    moves = _screen_moves(segs, moves, top_k)
+                elif pool is not None and cur_cost < math.inf:
+                    moves = list(moves)
+                    if len(moves) >= parallel_min:
+                        best_move, best_cost = _parallel_scan(pool, segs, moves, cur_cost, T, rng, tabu)
+                        moves = ()
+            for move in moves:
+                u, bound = _draw_threshold(cur_cost, best_cost, T, rng)
+                c = segs.evaluate(move, upper_bound=bound)
+                if c is not BOUND_EXCEEDED and _accept_drawn(cur_cost, best_cost, c, T, u):
+                    # tabu check only for moves that would be taken
+                    if tabu is not None and segs.candidate_hash(move) in tabu:
+                        continue
+                    best_move, best_cost = move, c
+            if best_move is not None and best_cost < cur_cost:
+                current = segs.apply(best_move)
+                cur_cost = segs.total
+                improved = True
+                if tabu is not None:
+                    _tabu_add(tabu, segs.solution_hash, problem.tabu_tenure)
+            T *= 0.8
+        if not improved: break
+    return (current, segs.solution_hash) if with_hash else current
+
+def _vnd_with_sa_full(parent, problem, rng, T0=0.02, max_passes=2):
+    current = as_routes(parent)
     cur_cost = full_cost(current, problem)
     neighborhoods = (_two_opt_once, _relocate_once, _swap_once)
 
@@ -61,8 +339,9 @@ def _vnd_with_sa(parent, problem, rng, T0=0.02, max_passes=2):
         for gen in neighborhoods:
             best_local, best_cost = current, cur_cost
             for cand in gen(current, problem, rng):
-                c = full_cost(cand, problem)
-                if c < best_cost or _accept(cur_cost, c, T, rng):
+                u, bound = _draw_threshold(cur_cost, best_cost, T, rng)
+                c = full_cost(cand, problem, upper_bound=bound)
+                if c is not BOUND_EXCEEDED and _accept_drawn(cur_cost, best_cost, c, T, u):
                     best_local, best_cost = cand, c
             if best_cost < cur_cost:
                 current, cur_cost = best_local, best_cost
@@ -71,8 +350,8 @@ def _vnd_with_sa(parent, problem, rng, T0=0.02, max_passes=2):
         if not improved: break
     return current
 
-def apply_ul_operator(parent, problem, rng=random, n_candidates: int = 8):
-    return _vnd_with_sa(parent, problem, rng, T0=0.02, max_passes=2)
+def apply_ul_operator(parent, problem, rng=random, n_candidates: int = 8, with_hash=False):
+    return _vnd_with_sa(parent, problem, rng, T0=0.02, max_passes=2, with_hash=with_hash)
 
 def apply_ul_operator_guided(parent, ll_hint_cost, problem, rng=random, n_candidates: int = 8):
     return _vnd_with_sa(parent, problem, rng, T0=0.02, max_passes=2)
@@ -1,17 +1,26 @@
 import math
 import random
+import time
+from collections import OrderedDict
 from types import SimpleNamespace
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 
-import np
+import numpy as np
 
 from evrp.data import Problem
 from evrp.solution import generate_initial_solution, quick_repair
-from evrp.costs import full_cost
+from evrp.constructive import savings_solution, sweep_solution
+from evrp.costs import full_cost, BOUND_EXCEEDED, eval_count
+from evrp.ll_batch import full_cost_batch
+from evrp.split import decode, to_giant_tour
+from evrp.zobrist import solution_hash
 from . import heuristics
+from .crossover import recombine
 from .elite import update_elite_archive, cluster_elite_archive
 from .operators import _vnd_with_sa
-from .q_learning import get_best_action, update as q_update, decay_epsilon
+from .parallel import close_pool
+from .surrogate import get_surrogate
+from .q_learning import AdaptiveSelector, discretize_state
 
 ACTIONS = ["H1", "H2", "H3", "H4"]
 
@@ -24,15 +33,93 @@ def _safe_cost(sol, problem: Problem) -> float:
     return c
 
 
-def initialize_algorithm(problem: Problem, pop_size: int, rng):
+def _population_costs(sols, problem: Problem, cache: "OrderedDict[int, float]", upper_bound=None,
+                      max_size: Optional[int] = None, keys: Optional[List[int]] = None) -> List[float]:
+    """
+    full_cost_batch with a Zobrist-keyed fitness cache: only solutions not
+    seen before are evaluated. Bounded (non-exact) results are not cached.
+    The cache is LRU: hits move to the end and, with max_size, the least
+    recently used entries are dropped once it grows past it. `keys` are the
+    solution hashes when the caller already has them (e.g. from the VND).
+    """
+    if keys is None:
+        keys = [solution_hash(s) for s in sols]
+    miss = [k for k, h in enumerate(keys) if h not in cache]
+    if miss:
+        fresh = full_cost_batch([sols[k] for k in miss], problem, upper_bound=upper_bound)
+        for k, c in zip(miss, fresh):
+            if c is BOUND_EXCEEDED:
+                continue
+            cache[keys[k]] = c
+    else:
+        fresh = []
+    out = [cache.get(h) for h in keys]
+    for h in keys:
+        if h in cache:
+            cache.move_to_end(h)
+    for k, c in zip(miss, fresh):
+        if c is BOUND_EXCEEDED:
+            out[k] = c
+    if max_size is not None:
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+    return out
+
+
+def _survivors(combined, combined_costs, pop_size: int, dedup: bool,
+               keys: Optional[List[int]] = None) -> List[int]:
+    """
+    (μ + λ) cut: indices of the pop_size best solutions. With dedup, copies
+    of an already selected solution (same Zobrist hash, `keys` when given)
+    are only used when there are not enough distinct solutions to fill the
+    population.
+    """
+    order = sorted(range(len(combined)), key=lambda i: combined_costs[i])
+    if not dedup:
+        return order[:pop_size]
+    if keys is None:
+        keys = [solution_hash(s) for s in combined]
+    seen, unique, dupes = set(), [], []
+    for i in order:
+        h = keys[i]
+        (dupes if h in seen else unique).append(i)
+        seen.add(h)
+    return (unique + dupes)[:pop_size]
+
+
+def _unzip(pairs) -> Tuple[list, list]:
+    """[(routes, hash), ...] -> ([routes, ...], [hash, ...])."""
+    return [p[0] for p in pairs], [p[1] for p in pairs]
+
+
+def _random_solution(problem: Problem, rng: random.Random):
+    """Round-robin random solution re-cut by the distance-only fleet split (respects capacity)."""
+    return decode(to_giant_tour(generate_initial_solution(problem, rng), problem), problem, ll=False)
+
+
+def initialize_algorithm(problem: Problem, pop_size: int, rng, init_method: str = "mixed"):
     """
     Initialize population, elite archive, and clustering structures.
     Used for metric-driven hyper-heuristic.
+    init_method: "mixed" cycles randomized savings / sweep / random
+    solutions; "random" keeps the random generator only. Random solutions
+    are a shuffled customer order cut into capacity-feasible routes.
     """
+    if init_method == "mixed":
+        builders = (
+            lambda: savings_solution(problem, rng),
+            lambda: sweep_solution(problem, rng),
+            lambda: _random_solution(problem, rng),
+        )
+    elif init_method == "random":
+        builders = (lambda: _random_solution(problem, rng),)
+    else:
+        raise ValueError(f"Unknown init_method: {init_method!r}")
+
     # --- 1) Initial population ---
     P = []
-    for _ in range(pop_size):
-        sol = generate_initial_solution(problem)
+    for k in range(pop_size):
+        sol = builders[k % len(builders)]()
         sol = quick_repair(sol, problem)
         P.append(sol)
 
@@ -80,11 +167,32 @@ def main_optimization_metrics(problem: Problem, cfg: SimpleNamespace, rng: rando
     Adaptive hyper-heuristic for bi-level optimization (aligned with framework diagram).
     """
 
+    # Optional budget on solution evaluations (evrp.costs.count_evals)
+    eval_budget = getattr(cfg, "eval_budget", None)
+    evals0 = eval_count(problem)
+
+    # Optional live HTTP metrics (evrp.livemetrics.LiveMetrics)
+    live = getattr(cfg, "live_metrics", None)
+    if live is not None:
+        live.attach(problem)
+
+    # Optional memory profiling (evrp.memprof.MemoryProfiler)
+    mem_prof = getattr(cfg, "mem_profiler", None)
+    if mem_prof is not None:
+        mem_prof.begin("init")
+
     # === Initialization ===
-    (P, elite, centroids, best_c, best_s) = initialize_algorithm(problem, cfg.pop_size, rng)
+    (P, elite, centroids, best_c, best_s) = initialize_algorithm(
+        problem, cfg.pop_size, rng, getattr(cfg, "init_method", "mixed"))
 
     # 1. Evaluate initial population (solve LL for each)
-    costs_P = [full_cost(s, problem) for s in P]
+    cost_cache: "OrderedDict[int, float]" = OrderedDict()
+    cache_size = getattr(cfg, "cost_cache_size", 50_000)
+    dedup = getattr(cfg, "dedup", True)
+    # Zobrist keys of P, hashed once here and then carried along: the VND
+    # returns the hash it maintains per move (fitness cache and dedup keys)
+    keys_P = [solution_hash(s) for s in P]
+    costs_P = _population_costs(P, problem, cost_cache, max_size=cache_size, keys=keys_P)
     fitness = [1.0 / (1.0 + c) if math.isfinite(c) else 0.0 for c in costs_P]
     best_idx = min(range(len(costs_P)), key=lambda i: costs_P[i])
     best_c, best_s = costs_P[best_idx], P[best_idx]
@@ -96,22 +204,52 @@ def main_optimization_metrics(problem: Problem, cfg: SimpleNamespace, rng: rando
     alpha_thresh   = getattr(cfg, "alpha", 0.01)
     term_thresh    = getattr(cfg, "term_threshold", 1e-4)
 
+    # Heuristic selection: fixed threshold tree, or learned from the
+    # improvement per second (wall time) each heuristic delivers on this instance
+    selector_mode = getattr(cfg, "selector", "tree")
+    selector = None
+    if selector_mode != "tree":
+        selector = AdaptiveSelector(
+            ACTIONS, mode=selector_mode,
+            lr=getattr(cfg, "lr", 0.1), gamma=getattr(cfg, "gamma", 0.9),
+            eps_start=getattr(cfg, "eps_start", 0.8), eps_min=getattr(cfg, "eps_min", 0.05),
+            decay=getattr(cfg, "decay", 0.995),
+        )
+
+    # Optional recombination of the mating pool (evrp.crossover)
+    crossover = getattr(cfg, "crossover", None)
+    crossover_rate = getattr(cfg, "crossover_rate", 0.5)
+
+    # Optional structured log (evrp.runlog.RunLogger)
+    run_logger = getattr(cfg, "run_logger", None)
+    if mem_prof is not None:
+        mem_prof.begin("search")
+
     # === Main optimization loop ===
     for gen in range(cfg.max_gens):
+        t_gen = time.perf_counter()
         # 2. Upper-level selection (tournament)
-        M = []
+        M, keys_M = [], []
         tsize = max(1, min(getattr(cfg, "tournament_size", 2), len(P)))
         for _ in range(len(P)):
             idxs = rng.sample(range(len(P)), tsize)
             winner = max(idxs, key=lambda i: fitness[i])
             M.append(P[winner])
-
-        # 3. Apply upper-level perturbation to generate offspring Q_t
+            keys_M.append(keys_P[winner])
+
+        # 3. Apply upper-level perturbation to generate offspring Q_t: with
+        #    cfg.crossover ("ox" / "erx", evrp.crossover) a crossover_rate share
+        #    of the pool is recombined instead of going through the VND
+        n_cross = int(round(crossover_rate * len(M))) if crossover else 0
+        children = recombine(M, problem, rng, method=crossover, n_children=n_cross) if n_cross else []
+        rest, keys_rest = M[n_cross:], keys_M[n_cross:]
         if getattr(cfg, "use_local_search", True):
-            M = [_vnd_with_sa(parent, problem, rng) for parent in M]
+            rest, keys_rest = _unzip([_vnd_with_sa(parent, problem, rng, with_hash=True) for parent in rest])
+        M = children + rest
+        keys_M = [solution_hash(s) for s in children] + keys_rest
 
         # 4. Compute convergence metrics for Q_t (after perturbation)
-        costs_M = [full_cost(s, problem) for s in M]
+        costs_M = _population_costs(M, problem, cost_cache, max_size=cache_size, keys=keys_M)
         fitness_M = [1.0 / (1.0 + c) if math.isfinite(c) else 0.0 for c in costs_M]
         div = population_diversity([np.array(flatten_solution(s)) for s in M])
         conv = population_convergence(fitness_M)
@@ -121,7 +259,10 @@ def main_optimization_metrics(problem: Problem, cfg: SimpleNamespace, rng: rando
         weak_div  = div < div_threshold
 
         # 5. Decide heuristic according to convergence/diversity tree
-        if not converged:
+        state = discretize_state(conv, div, delta_fit, conv_threshold, div_threshold)
+        if selector is not None:
+            action = selector.select(state, rng)
+        elif not converged:
             action = "H1"
         else:
             if weak_div:
@@ -133,37 +274,54 @@ def main_optimization_metrics(problem: Problem, cfg: SimpleNamespace, rng: rando
                 action = "H3"
 
         # 6. Apply selected heuristic
-        P_new = []
+        t_heur = time.perf_counter()
+        P_new, keys_new = [], []
         for parent in M:
+            # every heuristic returns its child already repaired, with its hash
             if action == "H1":
-                child = heuristics.heuristic_h1_full_hierarchical(parent, elite, centroids, problem, rng)
+                child, h = heuristics.heuristic_h1_full_hierarchical(parent, elite, centroids, problem, rng,
+                                                                     with_hash=True)
                 # Cluster + archive update only for H1
                 update_elite_archive(elite, child, full_cost(child, problem))
-                centroids = cluster_elite_archive(elite)
+                centroids = cluster_elite_archive(elite, rng=rng)
 
             elif action == "H2":
-                child = heuristics.heuristic_h2_selective_ll(parent, elite, problem, rng)
+                child, h = heuristics.heuristic_h2_selective_ll(parent, elite, problem, rng, with_hash=True)
             elif action == "H3":
-                child = heuristics.heuristic_h3_relaxed_ll(parent, problem, rng)
+                child, h = heuristics.heuristic_h3_relaxed_ll(parent, problem, rng, with_hash=True)
             elif action == "H4" and elite and centroids:
-                child = heuristics.heuristic_h4_similarity_based(parent, centroids, elite, problem, rng)
+                child, h = heuristics.heuristic_h4_similarity_based(parent, centroids, elite, problem, rng,
+                                                                    with_hash=True)
             else:
-                child = heuristics.heuristic_h1_full_hierarchical(parent, elite, centroids, problem, rng)
+                child, h = heuristics.heuristic_h1_full_hierarchical(parent, elite, centroids, problem, rng,
+                                                                     with_hash=True)
 
-            child = quick_repair(child, problem)
             P_new.append(child)
-
-        # 7. Evaluate offspring
-        costs_new = [full_cost(c, problem) for c in P_new]
+            keys_new.append(h)
+        t_heur_s = time.perf_counter() - t_heur
+
+        # 7. Evaluate offspring (bounded: an offspring worse than every parent
+        #    cannot survive the (μ + λ) cut, so its LL pass is skipped)
+        t_eval = time.perf_counter()
+        costs_new = _population_costs(P_new, problem, cost_cache, upper_bound=max(costs_P),
+                                      max_size=cache_size, keys=keys_new)
+        t_eval = time.perf_counter() - t_eval
+        if selector is not None:
+            gain = sum(max(0.0, cm - cn) for cm, cn in zip(costs_M, costs_new)
+                       if math.isfinite(cm) and math.isfinite(cn))
+            scale = abs(best_c) if math.isfinite(best_c) and best_c else 1.0
+            selector.reward(state, action, gain / (scale * len(P_new)), time.perf_counter() - t_heur)
 
         # 8. Survivor selection (μ + λ)
         combined = P + P_new
         combined_costs = costs_P + costs_new
-        order = sorted(range(len(combined)), key=lambda i: combined_costs[i])
-        P = [combined[i] for i in order[:cfg.pop_size]]
+        combined_keys = keys_P + keys_new
+        keep = _survivors(combined, combined_costs, cfg.pop_size, dedup, keys=combined_keys)
+        P = [combined[i] for i in keep]
+        keys_P = [combined_keys[i] for i in keep]
 
         # Update metrics and best solution
-        costs_P = [full_cost(s, problem) for s in P]
+        costs_P = [combined_costs[i] for i in keep]
         fitness = [1.0 / (1.0 + c) if math.isfinite(c) else 0.0 for c in costs_P]
         best_idx = min(range(len(costs_P)), key=lambda i: costs_P[i])
         best_c, best_s = costs_P[best_idx], P[best_idx]
@@ -172,16 +330,41 @@ def main_optimization_metrics(problem: Problem, cfg: SimpleNamespace, rng: rando
         # 9. Conditional post-heuristic perturbation
         if weak_div and delta_fit < alpha_thresh:
             print("[INFO] Diversity collapsed → applying post-heuristic perturbation")
-            P = [_vnd_with_sa(sol, problem, rng) for sol in P]
+            P, keys_P = _unzip([_vnd_with_sa(sol, problem, rng, with_hash=True) for sol in P])
 
         # 10. Logging and termination
         bc = f"{best_c:.2f}" if math.isfinite(best_c) else "inf"
         print(f"[gen {gen:03d}] best={bc} div={div:.3f} conv={conv:.3f} Δf={delta_fit:.4f} act={action}")
+        if run_logger is not None:
+            run_logger.generation(gen, best_c, div, conv, delta_fit, action,
+                                  t_gen=time.perf_counter() - t_gen, t_heur=t_heur_s, t_eval=t_eval)
+        if live is not None:
+            live.generation(gen, best_c, action)
+        if mem_prof is not None:
+            mem_prof.generation(gen, population=P, elite=elite, cost_cache=cost_cache,
+                                history=best_history, problem=problem)
 
         if delta_fit < term_thresh:
             print(f">>> Early convergence detected at generation {gen}.")
             break
+        if eval_budget is not None and eval_count(problem) - evals0 >= eval_budget:
+            print(f">>> Evaluation budget reached at generation {gen}.")
+            break
+
+    if mem_prof is not None:
+        mem_prof.end()
+    if live is not None:
+        live.finish(best_c)
+
+    if getattr(problem, "surrogate_top_k", None):
+        print(get_surrogate(problem).report())
+
+    if selector is not None:
+        selector.finish()
+        for act, st in selector.summary().items():
+            print(f"[selector] {act}: uses={st['uses']} time={st['time_s']:.2f}s gain/s={st['gain_per_s']:.4g}")
 
+    close_pool(problem)
     return best_s, best_c
 def flatten_solution(sol):
     """Flatten multi-route solution for metric computation."""
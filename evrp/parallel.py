@@ -0,0 +1,154 @@
+# evrp/parallel.py
+from __future__ import annotations
+
+import atexit
+import copy
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .data import Problem
+
+# ---------------------------
+# Worker side
+# ---------------------------
+# Each worker holds a copy of the problem (with its own LL route memo) and the
+# SolutionSegments of the last solution it was sent, keyed by its Zobrist
+# hash, so every chunk of one VND neighborhood reuses the same summaries.
+
+_STATE: Dict[str, object] = {}
+
+
+def _init_worker(problem: Problem) -> None:
+    _STATE["problem"] = problem
+    _STATE["key"] = None
+    _STATE["segs"] = None
+
+
+def _eval_chunk(key: int, sol: List[List[int]], moves: Sequence[tuple], bounds: Sequence[float]):
+    """
+    Exact cost of each move against its bound (BOUND_EXCEEDED survives the
+    trip back), plus the LL memo entries computed for this chunk so the
+    parent can reuse them.
+    """
+    from .segments import SolutionSegments, route_ll_cache
+
+    problem = _STATE["problem"]
+    if _STATE["key"] != key:
+        _STATE["segs"] = SolutionSegments(sol, problem)
+        _STATE["key"] = key
+    segs = _STATE["segs"]
+    segs.ll_cache = cache = _RecordingCache(route_ll_cache(problem))
+    out = [segs.evaluate(move, upper_bound=bound) for move, bound in zip(moves, bounds)]
+    if segs.store is not None:
+        segs.store.flush()  # pool workers exit without running atexit hooks
+    return out, cache.new
+
+
+class _RecordingCache:
+    """LL memo view that remembers the entries added through it."""
+
+    def __init__(self, base: dict):
+        self.base = base
+        self.new: List[Tuple[int, float]] = []
+
+    def get(self, key, default=None):
+        return self.base.get(key, default)
+
+    def __setitem__(self, key, value) -> None:
+        self.base[key] = value
+        self.new.append((key, value))
+
+
+# ---------------------------
+# Parent side
+# ---------------------------
+
+class NeighborhoodPool:
+    """
+    Process pool scoring chunks of one VND neighborhood concurrently.
+    Moves are grouped by the route pair they touch (the routes a worker must
+    look at), groups are packed into about 4 chunks per worker, and costs
+    come back in move order, so the caller can replay the serial acceptance
+    rule and get the serial result.
+    """
+
+    def __init__(self, problem: Problem, workers: int):
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(_portable(problem),))
+
+    def evaluate(self, segs, moves: Sequence[tuple], bounds: Sequence[float]) -> List[float]:
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for k, m in enumerate(moves):
+            key = (m[1], m[1]) if m[0] == "2opt" else ((m[1], m[4]) if m[0] == "oropt" else (m[1], m[3]))
+            groups.setdefault(key, []).append(k)
+        target = max(1, math.ceil(len(moves) / (4 * self.workers)))
+        chunks, cur = [], []
+        for idx in groups.values():
+            cur.extend(idx)
+            if len(cur) >= target:
+                chunks.append(cur)
+                cur = []
+        if cur:
+            chunks.append(cur)
+
+        key = segs.solution_hash
+        futures = [self.pool.submit(_eval_chunk, key, segs.sol, [moves[k] for k in c], [bounds[k] for k in c])
+                   for c in chunks]
+        costs: List[float] = [0.0] * len(moves)
+        for c, fut in zip(chunks, futures):
+            vals, new = fut.result()
+            for k, v in zip(c, vals):
+                costs[k] = v
+            segs.ll_cache.update(new)
+        return costs
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+
+def _portable(problem: Problem) -> Problem:
+    """Shallow copy without per-run caches (LL memo, tabu, pools)."""
+    p = copy.copy(problem)
+    for attr in [a for a in vars(p) if a.startswith("_") and a != "_distance_array"]:
+        delattr(p, attr)
+    return p
+
+
+_POOLS: Dict[int, Tuple[Problem, NeighborhoodPool]] = {}
+
+
+def neighborhood_pool(problem: Problem) -> Optional[NeighborhoodPool]:
+    """
+    The pool for problem.vnd_workers processes (None when unset or <= 1),
+    started on first use and kept until close_pool(problem) (called when
+    main_optimization_metrics returns) or interpreter exit.
+    """
+    workers = getattr(problem, "vnd_workers", 0) or 0
+    if workers <= 1:
+        return None
+    entry = _POOLS.get(id(problem))
+    if entry is not None and entry[0] is not problem:
+        entry[1].close()        # the id was reused by a new problem object
+        entry = None
+    if entry is None:
+        entry = _POOLS[id(problem)] = (problem, NeighborhoodPool(problem, workers))
+    return entry[1]
+
+
+def close_pool(problem: Problem) -> None:
+    """Shut down the pool started for `problem`, if any."""
+    entry = _POOLS.get(id(problem))
+    if entry is not None and entry[0] is problem:
+        del _POOLS[id(problem)]
+        entry[1].close()
+
+
+def close_pools() -> None:
+    for _, pool in _POOLS.values():
+        pool.close()
+    _POOLS.clear()
+
+
+atexit.register(close_pools)
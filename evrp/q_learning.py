@@ -1,31 +1,117 @@
+import numpy as np
 
 
+def decay_epsilon(eps, eps_min, decay):
+    new_eps = eps * decay
+    return eps_min if new_eps < eps_min else new_eps
+
+
+# ---------------------------
+# Adaptive heuristic selection
+# ---------------------------
 
-def get_best_action(Q, state, actions):
-    if state not in Q or not Q[state]:
-        return actions[0]
-    return max(Q[state].items(), key=lambda kv: kv[1])[0]
+# Δf buckets (relative best-cost improvement per generation): stalled / slow / fast
+DELTA_BINS = (1e-3, 1e-2)
 
-def update(Q, state, action, cost, next_state, alpha, gamma, actions):
+
+def discretize_state(conv, div, delta_f, conv_threshold, div_threshold, delta_bins=DELTA_BINS):
     """
-    Q-learning update for cost minimization (inf/nan safe).
-    Lower cost = better.
+    Map (conv, div, Δf) to an integer state in [0, 27): each metric gets three
+    buckets, split at half and at the full threshold for conv/div and at
+    `delta_bins` for Δf.
     """
-    import math
-    if not math.isfinite(cost):
-        return  # skip invalid updates
+    def bucket(x, lo, hi):
+        return 0 if x < lo else (1 if x < hi else 2)
 
-    old_value = Q.get((state, action), 0.0)
-    next_min = min(Q.get((next_state, a), float('inf')) for a in actions)
-    if not math.isfinite(next_min):
-        next_min = 0.0
+    c = bucket(conv, 0.5 * conv_threshold, conv_threshold)
+    d = bucket(div, 0.5 * div_threshold, div_threshold)
+    f = bucket(delta_f, delta_bins[0], delta_bins[1])
+    return (c * 3 + d) * 3 + f
 
-    target = cost + gamma * next_min
-    if not math.isfinite(target):
-        return
 
-    Q[(state, action)] = old_value + alpha * (target - old_value)
+class AdaptiveSelector:
+    """
+    Performance-aware heuristic selector. Every application of an action is
+    rewarded by the relative cost improvement it produced per second of wall
+    time (wall, not process CPU time: with problem.vnd_workers the VND runs
+    in worker processes the parent's CPU clock does not see).
 
-def decay_epsilon(eps, eps_min, decay):
-    new_eps = eps * decay
-    return eps_min if new_eps < eps_min else new_eps
+    mode="qlearning": ε-greedy over a NumPy Q-table (27 states × actions),
+        Q[s,a] += lr * (r + gamma * max Q[s'] - Q[s,a]); ε decays per update.
+    mode="roulette": ALNS-style adaptive weights, ignoring the state;
+        w[a] = (1 - rho) * w[a] + rho * r, and actions are drawn ∝ w.
+    """
+
+    N_STATES = 27
+
+    def __init__(self, actions, mode="qlearning", lr=0.1, gamma=0.9,
+                 eps_start=0.8, eps_min=0.05, decay=0.995, rho=0.2, w_min=1e-3):
+        if mode not in ("qlearning", "roulette"):
+            raise ValueError(f"Unknown selector mode: {mode!r}")
+        self.actions = list(actions)
+        self.mode = mode
+        self.lr, self.gamma = lr, gamma
+        self.eps, self.eps_min, self.decay = eps_start, eps_min, decay
+        self.rho, self.w_min = rho, w_min
+        n_a = len(self.actions)
+        self.Q = np.zeros((self.N_STATES, n_a))
+        self.weights = np.ones(n_a)
+        self.counts = np.zeros(n_a, dtype=np.int64)
+        self.time_s = np.zeros(n_a)
+        self.gain = np.zeros(n_a)
+        self._pending = None  # (state, action index, reward) awaiting next state
+
+    def select(self, state, rng):
+        n_a = len(self.actions)
+        if self.mode == "roulette":
+            p = self.weights / self.weights.sum()
+            a = int(np.searchsorted(np.cumsum(p), rng.random() * (1.0 - 1e-12), side="right"))
+        elif rng.random() < self.eps:
+            a = rng.randrange(n_a)
+        else:
+            row = self.Q[state]
+            best = np.flatnonzero(row == row.max())
+            a = int(best[rng.randrange(len(best))])
+        return self.actions[min(a, n_a - 1)]
+
+    def reward(self, state, action, improvement, seconds, next_state=None):
+        """
+        Record one application of `action` from `state`: `improvement` is the
+        relative cost gain it produced, `seconds` the wall time it took. The Q
+        update is applied once the next state is known (next call to
+        `reward` or `finish`).
+        """
+        a = self.actions.index(action)
+        r = max(0.0, improvement) / max(seconds, 1e-6)
+        self.counts[a] += 1
+        self.time_s[a] += seconds
+        self.gain[a] += max(0.0, improvement)
+        if self.mode == "roulette":
+            self.weights[a] = max(self.w_min, (1.0 - self.rho) * self.weights[a] + self.rho * r)
+            return
+        self._flush(state)
+        self._pending = (state, a, r)
+
+    def finish(self):
+        """Apply the last pending update as terminal."""
+        self._flush(None)
+
+    def _flush(self, next_state):
+        if self._pending is None:
+            return
+        s, a, r = self._pending
+        target = r if next_state is None else r + self.gamma * self.Q[next_state].max()
+        self.Q[s, a] += self.lr * (target - self.Q[s, a])
+        self.eps = decay_epsilon(self.eps, self.eps_min, self.decay)
+        self._pending = None
+
+    def summary(self):
+        """Per-action usage, wall time and gain per second."""
+        return {
+            act: {
+                "uses": int(self.counts[k]),
+                "time_s": float(self.time_s[k]),
+                "gain_per_s": float(self.gain[k] / self.time_s[k]) if self.time_s[k] > 0 else 0.0,
+            }
+            for k, act in enumerate(self.actions)
+        }
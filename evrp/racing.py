@@ -0,0 +1,290 @@
+# evrp/racing.py
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# ---------------------------
+# Distributions (no SciPy)
+# ---------------------------
+
+def _gammainc_upper(a: float, x: float) -> float:
+    """Regularized upper incomplete gamma Q(a, x)."""
+    if x <= 0.0:
+        return 1.0
+    if x < a + 1.0:
+        term = total = 1.0 / a
+        ap = a
+        for _ in range(500):
+            ap += 1.0
+            term *= x / ap
+            total += term
+            if abs(term) < abs(total) * 1e-14:
+                break
+        return max(0.0, 1.0 - total * math.exp(-x + a * math.log(x) - math.lgamma(a)))
+    # continued fraction (Lentz)
+    b = x + 1.0 - a
+    c = 1.0 / 1e-300
+    d = 1.0 / b
+    h = d
+    for i in range(1, 500):
+        an = -i * (i - a)
+        b += 2.0
+        d = an * d + b
+        d = 1e-300 if abs(d) < 1e-300 else d
+        c = b + an / c
+        c = 1e-300 if abs(c) < 1e-300 else c
+        d = 1.0 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-14:
+            break
+    return math.exp(-x + a * math.log(x) - math.lgamma(a)) * h
+
+
+def chi2_sf(x: float, df: int) -> float:
+    return _gammainc_upper(0.5 * df, 0.5 * x)
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (1e-300 if abs(d) < 1e-300 else d)
+    h = d
+    for m in range(1, 500):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (1e-300 if abs(d) < 1e-300 else d)
+        c = 1.0 + aa / c
+        c = 1e-300 if abs(c) < 1e-300 else c
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (1e-300 if abs(d) < 1e-300 else d)
+        c = 1.0 + aa / c
+        c = 1e-300 if abs(c) < 1e-300 else c
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-14:
+            break
+    return h
+
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                     + a * math.log(x) + b * math.log(1.0 - x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def t_sf(t: float, df: float) -> float:
+    """P(T > t) for Student's t with df degrees of freedom."""
+    p = 0.5 * _betainc(0.5 * df, 0.5, df / (df + t * t))
+    return p if t >= 0 else 1.0 - p
+
+
+def t_ppf(q: float, df: float) -> float:
+    """Quantile of Student's t (bisection on t_sf)."""
+    lo, hi = -1e3, 1e3
+    for _ in range(200):
+        mid = 0.5 * (lo + hi)
+        if 1.0 - t_sf(mid, df) < q:
+            lo = mid
+        else:
+            hi = mid
+    return 0.5 * (lo + hi)
+
+
+# ---------------------------
+# Elimination tests
+# ---------------------------
+
+def _ranks(row: Sequence[float]) -> List[float]:
+    """Average ranks (1 = best), ties share their mean rank; inf ranks last."""
+    order = sorted(range(len(row)), key=lambda i: row[i])
+    ranks = [0.0] * len(row)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and row[order[j + 1]] == row[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = 0.5 * (i + j) + 1.0
+        i = j + 1
+    return ranks
+
+
+def friedman_eliminate(costs: List[List[float]], alpha: float = 0.05) -> Tuple[List[int], float]:
+    """
+    F-Race step. `costs` is blocks x configs. Runs the Friedman test on the
+    within-block ranks; if it rejects, drops every config whose rank sum is
+    worse than the best one by more than the Conover post-hoc critical
+    difference. Returns (indices of survivors, p-value).
+    """
+    n, k = len(costs), len(costs[0])
+    if k < 2 or n < 2:
+        return list(range(k)), 1.0
+    R = [_ranks(row) for row in costs]
+    Rj = [sum(R[b][j] for b in range(n)) for j in range(k)]
+    A = sum(r * r for row in R for r in row)
+    C = n * k * (k + 1) ** 2 / 4.0
+    if A - C <= 1e-12:  # every block fully tied
+        return list(range(k)), 1.0
+    T = (k - 1) * sum((r - n * (k + 1) / 2.0) ** 2 for r in Rj) / (A - C)
+    p = chi2_sf(T, k - 1)
+    if p >= alpha:
+        return list(range(k)), p
+    df = (n - 1) * (k - 1)
+    crit = t_ppf(1.0 - alpha / 2.0, df) * math.sqrt(
+        max(0.0, 2.0 * n * (A - C) / df * (1.0 - T / (n * (k - 1)))))
+    best = min(Rj)
+    return [j for j in range(k) if Rj[j] - best <= crit], p
+
+
+def ttest_eliminate(costs: List[List[float]], alpha: float = 0.05) -> Tuple[List[int], float]:
+    """
+    Paired t-test of every config against the best one (lowest mean of
+    per-block relative costs); configs significantly worse are dropped.
+    Returns (survivors, smallest p-value).
+    """
+    n, k = len(costs), len(costs[0])
+    if k < 2 or n < 2:
+        return list(range(k)), 1.0
+    rel = []
+    for row in costs:
+        finite = [c for c in row if math.isfinite(c)]
+        lo = min(finite) if finite else 1.0
+        hi = max(finite) if finite else 1.0
+        rel.append([(c if math.isfinite(c) else 2.0 * hi) / max(lo, 1e-12) for c in row])
+    means = [sum(rel[b][j] for b in range(n)) / n for j in range(k)]
+    best = min(range(k), key=lambda j: means[j])
+    keep, p_min = [], 1.0
+    for j in range(k):
+        if j == best:
+            keep.append(j)
+            continue
+        d = [rel[b][j] - rel[b][best] for b in range(n)]
+        md = sum(d) / n
+        sd = math.sqrt(sum((x - md) ** 2 for x in d) / (n - 1))
+        if sd <= 1e-12:
+            p = 0.0 if md > 0 else 1.0
+        else:
+            p = t_sf(md / (sd / math.sqrt(n)), n - 1)
+        p_min = min(p_min, p)
+        if p >= alpha:
+            keep.append(j)
+    return keep, p_min
+
+
+def welch_ttest(a: Sequence[float], b: Sequence[float]) -> Tuple[float, float]:
+    """
+    Welch's t statistic for mean(a) - mean(b) and the one-sided p-value of
+    H1: mean(a) > mean(b). Returns (t, p).
+    """
+    na, nb = len(a), len(b)
+    if na < 2 or nb < 2:
+        return 0.0, 1.0
+    ma, mb = sum(a) / na, sum(b) / nb
+    va = sum((x - ma) ** 2 for x in a) / (na - 1)
+    vb = sum((x - mb) ** 2 for x in b) / (nb - 1)
+    se2 = va / na + vb / nb
+    if se2 <= 1e-300:
+        return (math.inf, 0.0) if ma > mb else (0.0, 1.0)
+    t = (ma - mb) / math.sqrt(se2)
+    df = se2 ** 2 / ((va / na) ** 2 / (na - 1) + (vb / nb) ** 2 / (nb - 1) or 1e-300)
+    return t, t_sf(t, df)
+
+
+# ---------------------------
+# Race driver
+# ---------------------------
+
+Evaluator = Callable[[List[Tuple[Dict[str, Any], str, int]]], List[Tuple[float, float]]]
+
+
+def race(
+    configs: List[Dict[str, Any]],
+    blocks: Sequence[Tuple[str, int]],
+    evaluate: Evaluator,
+    test: str = "friedman",
+    alpha: float = 0.05,
+    first_test: int = 3,
+    min_survivors: int = 1,
+    budget: Optional[int] = None,
+    log: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """
+    Race `configs` over `blocks` ((instance, seed) pairs, in order). At each
+    step every alive config is run on the next block (one batched call to
+    `evaluate`, which returns (cost, cpu_seconds) per job and may run them in
+    parallel); from block `first_test` on, the chosen test eliminates the
+    configs that are significantly worse. Stops when blocks or the run budget
+    are exhausted or only `min_survivors` remain.
+    """
+    eliminate = friedman_eliminate if test == "friedman" else ttest_eliminate
+    alive = list(range(len(configs)))
+    costs: List[Dict[int, float]] = []      # per block: config idx -> cost
+    cpu = [0.0] * len(configs)
+    runs = [0] * len(configs)
+    used = 0
+    for b, (inst, seed) in enumerate(blocks):
+        if budget is not None and used + len(alive) > budget:
+            log(f"[race] budget exhausted after {used} runs")
+            break
+        results = evaluate([(configs[j], inst, seed) for j in alive])
+        row = {}
+        for j, (c, t) in zip(alive, results):
+            row[j] = c
+            cpu[j] += t
+            runs[j] += 1
+        costs.append(row)
+        used += len(alive)
+        if b + 1 >= first_test and len(alive) > min_survivors:
+            matrix = [[blk[j] for j in alive] for blk in costs]
+            keep, p = eliminate(matrix, alpha)
+            if len(keep) < min_survivors:
+                mean_rank = _mean_ranks(matrix)
+                keep = sorted(range(len(alive)), key=lambda i: mean_rank[i])[:min_survivors]
+            dropped = len(alive) - len(keep)
+            alive = [alive[i] for i in keep]
+            log(f"[race] block {b + 1} ({inst}, seed {seed}): p={p:.4f} "
+                f"dropped={dropped} alive={len(alive)} runs={used}")
+        if len(alive) <= min_survivors:
+            break
+
+    matrix = [[blk[j] for j in alive] for blk in costs]
+    mean_rank = _mean_ranks(matrix) if matrix else [0.0] * len(alive)
+    survivors = []
+    for i, j in enumerate(alive):
+        vals = [blk[j] for blk in costs]
+        finite = [v for v in vals if math.isfinite(v)]
+        survivors.append({
+            "config": configs[j],
+            "mean_rank": mean_rank[i],
+            "mean_cost": sum(finite) / len(finite) if finite else math.inf,
+            "runs": runs[j],
+            "cpu_s": cpu[j],
+        })
+    survivors.sort(key=lambda s: s["mean_rank"])
+    return {
+        "survivors": survivors,
+        "blocks": len(costs),
+        "runs": used,
+        "cpu_s": sum(cpu),
+        "cpu_s_eliminated": sum(cpu[j] for j in range(len(configs)) if j not in alive),
+        "grid_runs": len(configs) * len(blocks),
+    }
+
+
+def _mean_ranks(matrix: List[List[float]]) -> List[float]:
+    R = [_ranks(row) for row in matrix]
+    n = len(R)
+    return [sum(R[b][j] for b in range(n)) / n for j in range(len(matrix[0]))]
+
@@ -0,0 +1,112 @@
+# evrp/results.py
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# ---------------------------
+# SQLite results store
+# ---------------------------
+# One row per (instance, cfg_hash, seed). A job is marked 'running' before it
+# starts and 'done' / 'failed' when it ends, so an interrupted batch can be
+# resumed by skipping the 'done' keys. Aggregates are plain SQL over the table.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    instance   TEXT    NOT NULL,
+    cfg_hash   TEXT    NOT NULL,
+    seed       INTEGER NOT NULL,
+    status     TEXT    NOT NULL,
+    best_cost  REAL,
+    cpu_time   REAL,
+    cfg_json   TEXT,
+    extra_json TEXT,
+    started    REAL,
+    finished   REAL,
+    PRIMARY KEY (instance, cfg_hash, seed)
+);
+CREATE INDEX IF NOT EXISTS runs_status ON runs (status);
+"""
+
+
+def cfg_hash(cfg: Dict[str, Any]) -> str:
+    """Stable short hash of a configuration dict (key order does not matter)."""
+    blob = json.dumps(cfg, sort_keys=True, default=str).encode()
+    return hashlib.sha1(blob).hexdigest()[:16]
+
+
+class ResultsStore:
+    def __init__(self, path: str = "results.sqlite"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    # --- job lifecycle ---
+
+    def is_done(self, instance: str, chash: str, seed: int) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM runs WHERE instance=? AND cfg_hash=? AND seed=? AND status='done'",
+            (instance, chash, seed)).fetchone()
+        return row is not None
+
+    def pending(self, jobs: Iterable[Tuple[str, str, int]]) -> List[Tuple[str, str, int]]:
+        """Filter (instance, cfg_hash, seed) keys down to those without a 'done' row."""
+        done = set(self.conn.execute(
+            "SELECT instance, cfg_hash, seed FROM runs WHERE status='done'").fetchall())
+        return [j for j in jobs if tuple(j) not in done]
+
+    def start(self, instance: str, cfg: Dict[str, Any], seed: int) -> str:
+        chash = cfg_hash(cfg)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO runs (instance, cfg_hash, seed, status, cfg_json, started) "
+                "VALUES (?, ?, ?, 'running', ?, ?)",
+                (instance, chash, seed, json.dumps(cfg, sort_keys=True, default=str), time.time()))
+        return chash
+
+    def finish(self, instance: str, chash: str, seed: int, best_cost: Optional[float],
+               cpu_time: Optional[float], **extra) -> None:
+        status = "done" if best_cost is not None else "failed"
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET status=?, best_cost=?, cpu_time=?, extra_json=?, finished=? "
+                "WHERE instance=? AND cfg_hash=? AND seed=?",
+                (status, best_cost, cpu_time, json.dumps(extra, default=str) if extra else None,
+                 time.time(), instance, chash, seed))
+
+    # --- queries ---
+
+    def summary(self, chash: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Best / mean / worst cost and mean CPU time per (instance, cfg_hash) over finished runs."""
+        sql = ("SELECT instance, cfg_hash, COUNT(*), MIN(best_cost), AVG(best_cost), MAX(best_cost), "
+               "AVG(cpu_time) FROM runs WHERE status='done'")
+        args: tuple = ()
+        if chash is not None:
+            sql += " AND cfg_hash=?"
+            args = (chash,)
+        sql += " GROUP BY instance, cfg_hash ORDER BY instance, cfg_hash"
+        keys = ("instance", "cfg_hash", "runs", "best", "mean", "worst", "avg_time")
+        return [dict(zip(keys, row)) for row in self.conn.execute(sql, args)]
+
+    def costs(self, instance: str, chash: str) -> Dict[int, float]:
+        """seed -> best cost of finished runs."""
+        return dict(self.conn.execute(
+            "SELECT seed, best_cost FROM runs WHERE instance=? AND cfg_hash=? AND status='done'",
+            (instance, chash)).fetchall())
+
+    def progress(self) -> Dict[str, int]:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM runs GROUP BY status").fetchall())
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,162 @@
+# evrp/route_store.py
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .data import Problem
+
+# ---------------------------
+# Persistent route-cost store
+# ---------------------------
+# LL (charging) cost of single routes, shared across runs, seeds and worker
+# processes through one SQLite file in WAL mode. Rows are keyed by an
+# instance fingerprint (geometry, stations and every parameter the LL solver
+# reads) and the Zobrist route hash, so a changed energy setting never reads
+# stale costs. Lookups are single-row primary-key reads; new costs and hit
+# timestamps are buffered and written in one transaction per `flush_every`
+# entries. The row count is tracked approximately (other processes insert
+# too); once it passes `max_entries` the table is counted and the least
+# recently used rows are evicted down to 90% of the limit.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS route_cost (
+    fp    TEXT    NOT NULL,
+    h     INTEGER NOT NULL,
+    cost  REAL    NOT NULL,
+    used  REAL    NOT NULL,
+    PRIMARY KEY (fp, h)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS route_cost_used ON route_cost (used);
+"""
+
+_LL_PARAMS = ("energy_capacity", "energy_consumption", "init_soc_ratio", "energy_cost", "waiting_cost",
+              "k_nearest_stations", "station_energy_price", "station_wait_cost", "station_detour_km",
+              "has_time_windows", "ready_time", "due_time", "service_duration", "speed", "charge_rate",
+              "fixed_charge_time_h", "station_charge_rate", "station_wait_time")
+
+
+def problem_fingerprint(problem: Problem) -> str:
+    """Hash of everything the LL solver's result depends on."""
+    payload = {
+        "coords": problem.coords,
+        "depot": problem.depot,
+        "stations": sorted(problem.stations or ()),
+        "params": {k: getattr(problem, k, None) for k in _LL_PARAMS},
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha1(blob).hexdigest()[:20]
+
+
+def _signed(h: int) -> int:
+    # SQLite integers are signed 64-bit
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+class RouteCostStore:
+    def __init__(self, path: str, fingerprint: str, max_entries: int = 5_000_000,
+                 flush_every: int = 500, timeout: float = 30.0):
+        self.path = path
+        self.fp = fingerprint
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self.conn = sqlite3.connect(path, timeout=timeout)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self._pending: Dict[int, float] = {}
+        self._touched: List[int] = []
+        self._count = self.conn.execute("SELECT COUNT(*) FROM route_cost").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, h: int) -> Optional[float]:
+        c = self._pending.get(h)
+        if c is not None:
+            self.hits += 1
+            return c
+        row = self.conn.execute("SELECT cost FROM route_cost WHERE fp=? AND h=?",
+                                (self.fp, _signed(h))).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append(h)
+        if len(self._touched) >= self.flush_every:
+            self.flush()
+        return row[0]
+
+    def put(self, h: int, cost: float) -> None:
+        self._pending[h] = cost
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending and not self._touched:
+            return
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO route_cost (fp, h, cost, used) VALUES (?, ?, ?, ?)",
+                [(self.fp, _signed(h), c, now) for h, c in self._pending.items()])
+            self.conn.executemany("UPDATE route_cost SET used=? WHERE fp=? AND h=?",
+                                  [(now, self.fp, _signed(h)) for h in self._touched])
+        self._count += len(self._pending)
+        self._pending.clear()
+        self._touched.clear()
+        if self._count > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        n = self.conn.execute("SELECT COUNT(*) FROM route_cost").fetchone()[0]
+        self._count = n
+        if n <= self.max_entries:
+            return
+        drop = n - int(0.9 * self.max_entries)
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM route_cost WHERE (fp, h) IN "
+                "(SELECT fp, h FROM route_cost ORDER BY used LIMIT ?)", (drop,))
+        self._count = n - drop
+
+    def stats(self) -> Tuple[int, int]:
+        return self.hits, self.misses
+
+    def close(self) -> None:
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+    def __enter__(self) -> "RouteCostStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def route_cost_store(problem: Problem) -> Optional[RouteCostStore]:
+    """
+    The store at problem.route_cache_db (None when unset), opened once per
+    process and cached on the problem; problem.route_cache_max_entries caps
+    its size. Buffered entries are flushed at interpreter exit.
+    """
+    path = getattr(problem, "route_cache_db", None)
+    if not path:
+        return None
+    store = getattr(problem, "_route_store", None)
+    if store is not None and store.path != path:
+        store.close()
+        store = None
+    if store is None:
+        store = RouteCostStore(path, problem_fingerprint(problem),
+                               max_entries=getattr(problem, "route_cache_max_entries", 5_000_000))
+        problem._route_store = store
+        atexit.register(store.close)
+    return store
@@ -0,0 +1,166 @@
+# evrp/runlog.py
+from __future__ import annotations
+
+import csv
+import json
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+# ---------------------------
+# Structured run logger
+# ---------------------------
+# One record per generation plus a final record per run, written as JSONL
+# (one object per line) or CSV (fixed columns, anything else packed into a
+# JSON "extra" column). Records are buffered in memory and written when the
+# buffer holds `flush_every` records or `flush_interval` seconds have passed,
+# so logging adds no per-generation I/O to the search loop.
+
+CSV_FIELDS = ["run_id", "kind", "gen", "best", "div", "conv", "delta_fit", "action",
+              "t_gen", "t_heur", "t_eval", "elapsed", "extra"]
+
+
+def _json_safe(v):
+    if isinstance(v, float) and not math.isfinite(v):
+        return None if math.isnan(v) else ("inf" if v > 0 else "-inf")
+    if isinstance(v, dict):
+        return {k: _json_safe(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_json_safe(x) for x in v]
+    if hasattr(v, "item"):  # NumPy scalars
+        return _json_safe(v.item())
+    return v
+
+
+class RunLogger:
+    """
+    Buffered JSONL/CSV writer for run metrics.
+    The format follows the file extension (.csv -> CSV, anything else -> JSONL)
+    unless `fmt` is given. Files are appended to, so several runs (seeds,
+    instances) can share one log; `run_id` and the fields in `meta` are
+    stamped on every record to tell them apart.
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None, flush_every: int = 50,
+                 flush_interval: float = 5.0, run_id: Optional[str] = None,
+                 meta: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.fmt = fmt or ("csv" if path.endswith(".csv") else "jsonl")
+        if self.fmt not in ("jsonl", "csv"):
+            raise ValueError(f"Unknown run log format: {self.fmt!r}")
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.run_id = run_id or f"{os.getpid()}-{int(time.time() * 1000)}"
+        self.meta = dict(meta or {})
+        self._buf: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self._t0 = time.perf_counter()
+
+    # --- records ---
+
+    def log(self, kind: str, **fields) -> None:
+        rec = {"run_id": self.run_id, "kind": kind, **self.meta, **fields}
+        rec.setdefault("elapsed", time.perf_counter() - self._t0)
+        self._buf.append(rec)
+        if (len(self._buf) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def generation(self, gen: int, best: float, div: float, conv: float, delta_fit: float,
+                   action: str, **timings) -> None:
+        self.log("gen", gen=gen, best=best, div=div, conv=conv, delta_fit=delta_fit,
+                 action=action, **timings)
+
+    def final(self, best: float, routes, routes_with_stations=None, **fields) -> None:
+        self.log("final", best=best, routes=[list(r) for r in routes],
+                 routes_with_stations=routes_with_stations, **fields)
+
+    def bind(self, **fields) -> "BoundRunLogger":
+        """A view of this logger that stamps `fields` (e.g. part=3) on every record."""
+        return BoundRunLogger(self, fields)
+
+    # --- I/O ---
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buf:
+            return
+        recs, self._buf = self._buf, []
+        if self.fmt == "jsonl":
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(_json_safe(r)) + "\n" for r in recs))
+            return
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            if new_file:
+                w.writeheader()
+            for r in recs:
+                row = {k: r.get(k) for k in CSV_FIELDS if k != "extra"}
+                extra = {k: v for k, v in r.items() if k not in CSV_FIELDS}
+                row["extra"] = json.dumps(_json_safe(extra)) if extra else ""
+                w.writerow(row)
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BoundRunLogger:
+    """Records go to the parent RunLogger with extra fields stamped on (see RunLogger.bind)."""
+
+    def __init__(self, parent: RunLogger, fields: Dict[str, Any]):
+        self.parent = parent
+        self.fields = dict(fields)
+
+    def log(self, kind: str, **fields) -> None:
+        self.parent.log(kind, **{**self.fields, **fields})
+
+    generation = RunLogger.generation
+    final = RunLogger.final
+
+    def bind(self, **fields) -> "BoundRunLogger":
+        return BoundRunLogger(self.parent, {**self.fields, **fields})
+
+    def flush(self) -> None:
+        self.parent.flush()
+
+
+FLOAT_FIELDS = ("best", "div", "conv", "delta_fit", "t_gen", "t_heur", "t_eval", "elapsed")
+
+
+def load_run_log(path: str) -> List[Dict[str, Any]]:
+    """
+    Read a run log back into a list of records (both formats). Numeric
+    fields come back as floats either way, including the "inf" / "-inf"
+    strings _json_safe writes for non-finite values.
+    """
+    if path.endswith(".csv"):
+        out = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                extra = row.pop("extra", "")
+                rec = {k: v for k, v in row.items() if v != ""}
+                for k in ("gen",):
+                    if k in rec:
+                        rec[k] = int(rec[k])
+                for k in FLOAT_FIELDS:
+                    if k in rec:
+                        rec[k] = float(rec[k])
+                if extra:
+                    rec.update(json.loads(extra))
+                out.append(rec)
+        return out
+    with open(path, encoding="utf-8") as f:
+        out = [json.loads(line) for line in f if line.strip()]
+    for rec in out:
+        for k in FLOAT_FIELDS:
+            if isinstance(rec.get(k), str):
+                rec[k] = float(rec[k])
+    return out
@@ -0,0 +1,613 @@
+# evrp/segments.py
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .costs import BOUND_EXCEEDED, count_evals
+from .data import Problem, distance_array
+from .route_store import route_cost_store
+from .timewindows import time_windows
+from .zobrist import MASK64, arc_key, combine, replace_routes, route_hash, route_prefix_keys
+
+# ---------------------------
+# Move descriptors
+# ---------------------------
+# ("2opt", r, i, j)           reverse route r between positions i..j (inclusive)
+# ("relocate", a, i, b, j)    pop a[i], insert it at index j of route b (after the pop)
+# ("swap", a, i, b, j)        exchange a[i] and b[j]
+# ("oropt", a, i, L, b, j)    move the chain a[i:i+L] to index j of route b (after removal)
+
+Move = Tuple
+
+
+def apply_move(sol: List[List[int]], move: Move) -> List[List[int]]:
+    """Return a new solution with `move` applied; untouched routes are shared."""
+    kind = move[0]
+    new = list(sol)
+    if kind == "2opt":
+        _, r, i, j = move
+        route = sol[r]
+        new[r] = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+    elif kind == "relocate":
+        _, a, i, b, j = move
+        ra = sol[a][:]
+        node = ra.pop(i)
+        rb = ra if a == b else sol[b][:]
+        rb.insert(j, node)
+        new[a], new[b] = ra, rb
+    elif kind == "swap":
+        _, a, i, b, j = move
+        ra = sol[a][:]
+        rb = ra if a == b else sol[b][:]
+        ra[i], rb[j] = rb[j], ra[i]
+        new[a], new[b] = ra, rb
+    elif kind == "oropt":
+        _, a, i, L, b, j = move
+        ra = sol[a][:]
+        chain = ra[i:i + L]
+        del ra[i:i + L]
+        rb = ra if a == b else sol[b][:]
+        rb[j:j] = chain
+        new[a], new[b] = ra, rb
+    else:
+        raise ValueError(f"Unknown move type: {kind!r}")
+    return new
+
+
+def touched_routes(move: Move) -> Tuple[int, ...]:
+    """Indices of the routes a move modifies."""
+    if move[0] == "2opt":
+        return (move[1],)
+    a, b = (move[1], move[3]) if move[0] != "oropt" else (move[1], move[4])
+    return (a,) if a == b else (a, b)
+
+
+# ---------------------------
+# Per-route summaries
+# ---------------------------
+
+class RouteSummary:
+    """
+    Prefix data of one route, built in O(m):
+      cum[k]   distance from route[0] to route[k]
+      rcum[k]  same, driving the arcs backwards (for reversed chains)
+      load[k]  demand served on route[0..k]
+    plus totals, the minimum SoC margin (init SoC minus energy of the route
+    driven without charging) and the first leg where that margin goes negative.
+    With time windows (`tw`, evrp.timewindows) also the prefix service starts
+    `begin` and the latest starts `latest` of the route driven without charging.
+    Zobrist prefix keys (evrp.zobrist) are built on first use.
+    """
+
+    __slots__ = ("route", "cum", "rcum", "load", "dist", "total_load",
+                 "min_margin", "first_depletion", "ll_cost", "begin", "latest", "_keys")
+
+    def __init__(self, route: List[int], D, demands: Dict[int, int], alpha: float, init_soc: float,
+                 tw=None):
+        self.route = route
+        cum = [0.0]
+        rcum = [0.0]
+        load = [demands.get(route[0], 0)] if route else []
+        first = -1
+        for t in range(len(route) - 1):
+            a, b = route[t], route[t + 1]
+            cum.append(cum[-1] + D[a][b])
+            rcum.append(rcum[-1] + D[b][a])
+            load.append(load[-1] + demands.get(b, 0))
+            if first < 0 and alpha * cum[-1] > init_soc:
+                first = t
+        self.cum = cum
+        self.rcum = rcum
+        self.load = load
+        self.dist = cum[-1]
+        self.total_load = load[-1] if load else 0
+        self.min_margin = init_soc - alpha * self.dist
+        self.first_depletion = first
+        self.ll_cost: Optional[float] = None
+        self.begin = tw.begin_times(route) if tw is not None else None
+        self.latest = tw.latest_starts(route) if tw is not None else None
+        self._keys = None
+
+    @property
+    def needs_charging(self) -> bool:
+        return self.first_depletion >= 0
+
+    @property
+    def on_time(self) -> bool:
+        """Time windows hold when driven without charging (always True without windows)."""
+        return self.begin is None or not self.route or self.begin[-1] != float("inf")
+
+    @property
+    def keys(self) -> Tuple[List[int], List[int]]:
+        """Forward/backward arc-key prefix sums (F, B)."""
+        if self._keys is None:
+            self._keys = route_prefix_keys(self.route)
+        return self._keys
+
+    @property
+    def hash(self) -> int:
+        return self.keys[0][-1]
+
+
+def route_ll_cache(problem: Problem) -> dict:
+    """
+    Route-hash -> LL cost memo shared by every SolutionSegments of a run.
+    Cleared wholesale once it holds problem.ll_cache_size entries.
+    """
+    cache = getattr(problem, "_ll_route_cache", None)
+    if cache is None or len(cache) >= getattr(problem, "ll_cache_size", 200_000):
+        cache = {}
+        problem._ll_route_cache = cache
+    return cache
+
+
+def ll_cache_stats(problem: Problem) -> Tuple[int, int]:
+    """(hits, misses) of the route LL memo over the run (misses include store reads)."""
+    return getattr(problem, "_ll_hits", 0), getattr(problem, "_ll_misses", 0)
+
+
+class SolutionSegments:
+    """
+    Route summaries of a solution plus the per-route cost decomposition
+        full_cost(sol) = sum_r (dist_r + LL_r)
+    A candidate move is costed by concatenating summaries: the distance and
+    load of every touched route are obtained in O(1); a touched route whose
+    energy stays within the initial SoC has LL cost 0 and needs no solver
+    call. Only routes that need a charging decision go to the exact LL
+    solver (memoized per route, and across runs in the on-disk store of
+    evrp.route_store when problem.route_cache_db is set). With a `surrogate`
+    (evrp.surrogate), exact LL results train it and `estimate` ranks moves
+    without any LL call.
+    With time windows, touched routes are first checked by splicing the moved
+    nodes between a kept prefix and suffix (see time_feasible). Route loads
+    are tracked per route, so an overloaded move is rejected in O(1) before
+    any distance or LL work (capacity_ok); with problem.capacity_penalty set
+    (or a `capacity_penalty` override), the overload is priced into the route
+    cost instead (costs.overload_cost).
+    """
+
+    def __init__(self, sol: List[List[int]], problem: Problem, ll_cache: Optional[dict] = None,
+                 surrogate=None, capacity_penalty: Optional[float] = None):
+        self.problem = problem
+        self.D = problem.distance_matrix
+        self.demands = problem.demands or {}
+        self.alpha = getattr(problem, "energy_consumption", 1.0)
+        self.init_soc = (getattr(problem, "init_soc_ratio", 1.0) or 1.0) * problem.energy_capacity
+        self.ll_cache = route_ll_cache(problem) if ll_cache is None else ll_cache
+        self.store = route_cost_store(problem)
+        self.ll_calls = 0
+        self.surrogate = surrogate
+        self.tw = time_windows(problem)
+        self.Q = problem.capacity
+        self.penalty = capacity_penalty or getattr(problem, "capacity_penalty", None)
+        self.hard_capacity = not self.penalty
+        self._sol_hash = None
+        self.sol = sol
+        self.routes = [self._summary(r) for r in sol]
+        self.route_costs = [self._route_cost(s) for s in self.routes]
+        self._refresh_total()
+
+    # --- construction / exact costs ---
+    def _summary(self, route: List[int]) -> RouteSummary:
+        return RouteSummary(route, self.D, self.demands, self.alpha, self.init_soc, self.tw)
+
+    def _ll_cost(self, route: List[int], dist: Optional[float] = None, key: Optional[int] = None) -> float:
+        key = route_hash(route) if key is None else key
+        c = self.ll_cache.get(key)
+        if c is not None:
+            self.problem._ll_hits = getattr(self.problem, "_ll_hits", 0) + 1
+        else:
+            self.problem._ll_misses = getattr(self.problem, "_ll_misses", 0) + 1
+            c = self.store.get(key) if self.store is not None else None
+            if c is None:
+                from evrp.heuristics import solve_ll
+                self.ll_calls += 1
+                ok, _, c, _ = solve_ll(route, self.problem)
+                c = c if ok else float("inf")
+                if self.store is not None:
+                    self.store.put(key, c)
+            self.ll_cache[key] = c
+            if self.surrogate is not None and dist is not None:
+                self.surrogate.observe(dist, c)
+        return c
+
+    def _route_cost(self, s: RouteSummary) -> float:
+        if s.ll_cost is None:
+            if s.needs_charging:
+                s.ll_cost = self._ll_cost(s.route, s.dist, s.hash)
+            else:
+                s.ll_cost = 0.0 if s.on_time else float("inf")
+        return s.dist + s.ll_cost + self._overload(s.total_load)
+
+    def _overload(self, load: float) -> float:
+        if load <= self.Q + 1e-9:
+            return 0.0
+        return (load - self.Q) * self.penalty if self.penalty else float("inf")
+
+    def overloaded(self) -> bool:
+        return any(s.total_load > self.Q + 1e-9 for s in self.routes)
+
+    def _refresh_total(self) -> None:
+        # finite part and number of infeasible routes, so a candidate can be
+        # costed without touching the untouched routes
+        self._finite = sum(c for c in self.route_costs if c != float("inf"))
+        self._n_inf = sum(1 for c in self.route_costs if c == float("inf"))
+
+    @property
+    def total(self) -> float:
+        return float("inf") if self._n_inf else self._finite
+
+    def apply(self, move: Move, new_sol: Optional[List[List[int]]] = None) -> List[List[int]]:
+        """Apply a move and refresh only the touched route summaries."""
+        new_sol = apply_move(self.sol, move) if new_sol is None else new_sol
+        old_hashes, new_hashes = [], []
+        for r in touched_routes(move):
+            old_hashes.append(self.routes[r].hash)
+            self.routes[r] = self._summary(new_sol[r])
+            new_hashes.append(self.routes[r].hash)
+            self.route_costs[r] = self._route_cost(self.routes[r])
+        self.sol = new_sol
+        if self._sol_hash is not None:   # O(#routes touched), kept for tabu and fitness-cache keys
+            self._sol_hash = replace_routes(self._sol_hash, old_hashes, new_hashes)
+        self._refresh_total()
+        return new_sol
+
+    # --- O(1) concatenation ---
+    def _chain(self, s: RouteSummary, i: int, j: int, reverse: bool = False) -> float:
+        """Internal distance of route[i..j] (inclusive), optionally driven backwards."""
+        return (s.rcum[j] - s.rcum[i]) if reverse else (s.cum[j] - s.cum[i])
+
+    def move_delta(self, move: Move) -> List[Tuple[int, float, int]]:
+        """
+        New (route index, distance, load) for every route touched by `move`,
+        each computed in constant time from the summaries.
+        """
+        D = self.D
+        kind = move[0]
+        if kind == "2opt":
+            _, r, i, j = move
+            s = self.routes[r]
+            L = s.route
+            d = (s.cum[i - 1] + D[L[i - 1]][L[j]] + self._chain(s, i, j, reverse=True)
+                 + D[L[i]][L[j + 1]] + s.dist - s.cum[j + 1])
+            return [(r, d, s.total_load)]
+
+        if kind in ("relocate", "oropt"):
+            if kind == "relocate":
+                _, a, i, b, j = move
+                n_chain = 1
+            else:
+                _, a, i, n_chain, b, j = move
+            sa = self.routes[a]
+            A = sa.route
+            k = i + n_chain - 1
+            inner = self._chain(sa, i, k)
+            q = sa.load[k] - (sa.load[i - 1] if i > 0 else 0)
+            d_removed = sa.dist - D[A[i - 1]][A[i]] - inner - D[A[k]][A[k + 1]] + D[A[i - 1]][A[k + 1]]
+            head, tail = A[i], A[k]
+            if a == b:
+                def node(t):  # route a after removing the chain
+                    return A[t] if t < i else A[t + n_chain]
+                u, v = node(j - 1), node(j)
+                d = d_removed - D[u][v] + D[u][head] + inner + D[tail][v]
+                return [(a, d, sa.total_load)]
+            sb = self.routes[b]
+            B = sb.route
+            u, v = B[j - 1], B[j]
+            d_b = sb.dist - D[u][v] + D[u][head] + inner + D[tail][v]
+            return [(a, d_removed, sa.total_load - q), (b, d_b, sb.total_load + q)]
+
+        if kind == "swap":
+            _, a, i, b, j = move
+            if a == b:
+                s = self.routes[a]
+                L = s.route
+                if i == j:
+                    return [(a, s.dist, s.total_load)]
+
+                def node(t):
+                    return L[j] if t == i else (L[i] if t == j else L[t])
+                arcs = {i - 1, i, j - 1, j}
+                d = s.dist
+                for t in arcs:
+                    d += D[node(t)][node(t + 1)] - D[L[t]][L[t + 1]]
+                return [(a, d, s.total_load)]
+            sa, sb = self.routes[a], self.routes[b]
+            A, B = sa.route, sb.route
+            x, y = A[i], B[j]
+            d_a = sa.dist - D[A[i - 1]][x] - D[x][A[i + 1]] + D[A[i - 1]][y] + D[y][A[i + 1]]
+            d_b = sb.dist - D[B[j - 1]][y] - D[y][B[j + 1]] + D[B[j - 1]][x] + D[x][B[j + 1]]
+            qx, qy = self.demands.get(x, 0), self.demands.get(y, 0)
+            return [(a, d_a, sa.total_load - qx + qy), (b, d_b, sb.total_load - qy + qx)]
+
+        raise ValueError(f"Unknown move type: {kind!r}")
+
+    def two_opt_bounds(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Every 2-opt move of the solution (in operators._two_opt_moves order)
+        as arrays (r, i, j), a cost bound `lb` and an `exact` mask. The
+        move_delta distances of all (i, j) pairs of a route are computed at
+        once by fancy indexing into the distance matrix, in the same operation
+        order, so for charge-free routes without time windows lb equals
+        evaluate() bit for bit (exact=True). For the others the LL cost is
+        replaced by the energy-deficit bound of surrogate.ll_lower_bound, so
+        lb never exceeds the exact cost.
+        """
+        from .surrogate import _station_bounds
+        sb = _station_bounds(self.problem)
+        Dn = distance_array(self.problem)
+        out_r, out_i, out_j, out_lb, out_exact = [], [], [], [], []
+        for r, s in enumerate(self.routes):
+            m = len(s.route)
+            if m < 4:
+                continue
+            I, J = np.triu_indices(m - 2, k=1)
+            I += 1
+            J += 1
+            L = np.asarray(s.route)
+            cum, rcum = np.asarray(s.cum), np.asarray(s.rcum)
+            d = (cum[I - 1] + Dn[L[I - 1], L[J]] + (rcum[J] - rcum[I])
+                 + Dn[L[I], L[J + 1]] + s.dist - cum[J + 1])
+            deficit = sb["alpha"] * d - sb["init_soc"]
+            stops = np.ceil(deficit / sb["bmax"] - 1e-12)
+            ll = np.where(deficit > 0.0, sb["price"] * deficit + stops * (sb["wait"] + sb["detour"]), 0.0)
+            base = self._finite - self.route_costs[r]
+            out_lb.append(base + (d + self._overload(s.total_load)) + ll)
+            out_exact.append(deficit <= 0.0 if self.tw is None else np.zeros(len(I), dtype=bool))
+            out_r.append(np.full(len(I), r))
+            out_i.append(I)
+            out_j.append(J)
+        if not out_lb:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty, np.zeros(0), np.zeros(0, dtype=bool)
+        return (np.concatenate(out_r), np.concatenate(out_i), np.concatenate(out_j),
+                np.concatenate(out_lb), np.concatenate(out_exact))
+
+    # --- capacity ---
+    def move_loads(self, move: Move) -> List[Tuple[int, int]]:
+        """New (route index, load) of the routes whose load `move` changes, in O(1)."""
+        kind = move[0]
+        if kind == "2opt":
+            return []
+        if kind in ("relocate", "oropt"):
+            if kind == "relocate":
+                _, a, i, b, j = move
+                n_chain = 1
+            else:
+                _, a, i, n_chain, b, j = move
+            if a == b:
+                return []
+            sa, sb = self.routes[a], self.routes[b]
+            k = i + n_chain - 1
+            q = sa.load[k] - (sa.load[i - 1] if i > 0 else 0)
+            return [(a, sa.total_load - q), (b, sb.total_load + q)]
+        if kind == "swap":
+            _, a, i, b, j = move
+            if a == b:
+                return []
+            sa, sb = self.routes[a], self.routes[b]
+            dq = self.demands.get(sb.route[j], 0) - self.demands.get(sa.route[i], 0)
+            return [(a, sa.total_load + dq), (b, sb.total_load - dq)]
+        raise ValueError(f"Unknown move type: {kind!r}")
+
+    def capacity_ok(self, move: Move) -> bool:
+        """
+        False when `move` overloads a route under hard capacity, or adds load
+        to an already overloaded one (always True with a penalty).
+        """
+        if not self.hard_capacity:
+            return True
+        Q = self.Q
+        for r, load in self.move_loads(move):
+            if load > Q and load > self.routes[r].total_load:
+                return False
+        return True
+
+    # --- time windows ---
+    def _splice(self, s: RouteSummary, p: int, middle, q: int, t: Optional[RouteSummary] = None) -> bool:
+        """s.route[:p+1] + middle + t.route[q:] (t defaults to s) meets every window."""
+        t = s if t is None else t
+        return self.tw.splice(s.route[p], s.begin[p], middle, t.route[q], t.latest[q])
+
+    def time_feasible(self, move: Move) -> bool:
+        """
+        True when every route touched by `move` meets its time windows driven
+        without charging (exact for charge-free routes, a necessary condition
+        otherwise since stops only add time). Inter-route moves, relocate and
+        swap cost O(1) (chains are at most a few nodes); 2-opt and intra-route
+        shifts walk only the reversed or shifted stretch.
+        """
+        if self.tw is None:
+            return True
+        kind = move[0]
+        if kind == "2opt":
+            _, r, i, j = move
+            s = self.routes[r]
+            return self._splice(s, i - 1, s.route[i:j + 1][::-1], j + 1)
+
+        if kind in ("relocate", "oropt"):
+            if kind == "relocate":
+                _, a, i, b, j = move
+                n_chain = 1
+            else:
+                _, a, i, n_chain, b, j = move
+            sa = self.routes[a]
+            A = sa.route
+            k = i + n_chain - 1
+            chain = A[i:k + 1]
+            if a == b:
+                if j <= i:  # chain moves before A[j:i]
+                    return self._splice(sa, j - 1, chain + A[j:i], k + 1)
+                return self._splice(sa, i - 1, A[k + 1:j + n_chain] + chain, j + n_chain)
+            sb = self.routes[b]
+            return self._splice(sa, i - 1, (), k + 1) and self._splice(sb, j - 1, chain, j)
+
+        if kind == "swap":
+            _, a, i, b, j = move
+            if a == b:
+                if i == j:
+                    return self.routes[a].on_time
+                i, j = min(i, j), max(i, j)
+                s = self.routes[a]
+                L = s.route
+                return self._splice(s, i - 1, [L[j]] + L[i + 1:j] + [L[i]], j + 1)
+            sa, sb = self.routes[a], self.routes[b]
+            return (self._splice(sa, i - 1, (sb.route[j],), i + 1)
+                    and self._splice(sb, j - 1, (sa.route[i],), j + 1))
+
+        raise ValueError(f"Unknown move type: {kind!r}")
+
+    # --- O(1) hashing ---
+    def _move_arcs(self, move: Move):
+        """
+        Per touched route: (r, removed arcs, added arcs, chain adjustment).
+        The adjustment accounts for a chain's internal arcs in O(1):
+        ("rev", r, i, j) reverses route[i..j] in place, ("out", a, i, k) /
+        ("in", a, i, k) move chain a[i..k] out of / into the route. Chains
+        relocated within the same route keep their internal arcs (None).
+        """
+        kind = move[0]
+        if kind == "2opt":
+            _, r, i, j = move
+            L = self.routes[r].route
+            return [(r, [(L[i - 1], L[i]), (L[j], L[j + 1])],
+                     [(L[i - 1], L[j]), (L[i], L[j + 1])], ("rev", r, i, j))]
+        if kind in ("relocate", "oropt"):
+            if kind == "relocate":
+                _, a, i, b, j = move
+                n_chain = 1
+            else:
+                _, a, i, n_chain, b, j = move
+            A = self.routes[a].route
+            k = i + n_chain - 1
+            head, tail = A[i], A[k]
+            rem_a = [(A[i - 1], head), (tail, A[k + 1])]
+            add_a = [(A[i - 1], A[k + 1])]
+            if a == b:
+                def node(t):
+                    return A[t] if t < i else A[t + n_chain]
+                u, v = node(j - 1), node(j)
+                return [(a, rem_a + [(u, v)], add_a + [(u, head), (tail, v)], None)]
+            B = self.routes[b].route
+            u, v = B[j - 1], B[j]
+            return [(a, rem_a, add_a, ("out", a, i, k)),
+                    (b, [(u, v)], [(u, head), (tail, v)], ("in", a, i, k))]
+        if kind == "swap":
+            _, a, i, b, j = move
+            if a == b:
+                L = self.routes[a].route
+                if i == j:
+                    return [(a, [], [], None)]
+
+                def node(t):
+                    return L[j] if t == i else (L[i] if t == j else L[t])
+                ts = {i - 1, i, j - 1, j}
+                return [(a, [(L[t], L[t + 1]) for t in ts], [(node(t), node(t + 1)) for t in ts], None)]
+            A, B = self.routes[a].route, self.routes[b].route
+            x, y = A[i], B[j]
+            return [(a, [(A[i - 1], x), (x, A[i + 1])], [(A[i - 1], y), (y, A[i + 1])], None),
+                    (b, [(B[j - 1], y), (y, B[j + 1])], [(B[j - 1], x), (x, B[j + 1])], None)]
+        raise ValueError(f"Unknown move type: {kind!r}")
+
+    def move_hashes(self, move: Move) -> List[Tuple[int, int]]:
+        """New (route index, Zobrist route hash) for every route touched by `move`."""
+        out = []
+        for r, removed, added, chain in self._move_arcs(move):
+            h = self.routes[r].hash
+            for a, b in added:
+                h += arc_key(a, b)
+            for a, b in removed:
+                h -= arc_key(a, b)
+            if chain is not None:
+                kind, src, i, j = chain
+                F, B = self.routes[src].keys
+                if kind == "rev":
+                    h += (B[j] - B[i]) - (F[j] - F[i])
+                elif kind == "out":
+                    h -= F[j] - F[i]
+                else:
+                    h += F[j] - F[i]
+            out.append((r, h & MASK64))
+        return out
+
+    @property
+    def solution_hash(self) -> int:
+        if self._sol_hash is None:
+            self._sol_hash = combine([s.hash for s in self.routes])
+        return self._sol_hash
+
+    def candidate_hash(self, move: Move) -> int:
+        """Zobrist hash of the solution after `move`, without building it."""
+        new = self.move_hashes(move)
+        return replace_routes(self.solution_hash, [self.routes[r].hash for r, _ in new], [h for _, h in new])
+
+    def needs_ll(self, new_dist: float) -> bool:
+        """True when a route of this length cannot be driven without charging."""
+        return self.alpha * new_dist > self.init_soc
+
+    def evaluate(self, move: Move, upper_bound: Optional[float] = None) -> float:
+        """
+        Full cost of the solution after `move`. Charge-free touched routes are
+        costed in O(1); the others are built and sent to the exact LL solver,
+        longest first. With `upper_bound`, returns BOUND_EXCEEDED as soon as
+        the partial cost exceeds it.
+        """
+        if not self.capacity_ok(move):
+            return float("inf")
+        count_evals(self.problem)
+        if not self.time_feasible(move):
+            return float("inf")
+        touched = self.move_delta(move)
+        total, n_inf = self._finite, self._n_inf
+        for r, d, load in touched:
+            c = self.route_costs[r]
+            if c == float("inf"):
+                n_inf -= 1
+            else:
+                total -= c
+            total += d + self._overload(load)
+        if n_inf:
+            return float("inf")
+        if upper_bound is not None and total > upper_bound:
+            return BOUND_EXCEEDED
+
+        new_sol = None
+        hashes = None
+        for r, d, _ in sorted(touched, key=lambda t: -t[1]):
+            if not self.needs_ll(d):
+                break
+            if hashes is None:
+                hashes = dict(self.move_hashes(move))
+            c = self.ll_cache.get(hashes[r])
+            if c is None:
+                if new_sol is None:
+                    new_sol = apply_move(self.sol, move)
+                c = self._ll_cost(new_sol[r], d, hashes[r])
+            else:
+                self.problem._ll_hits = getattr(self.problem, "_ll_hits", 0) + 1
+            total += c
+            if upper_bound is not None and total > upper_bound:
+                return BOUND_EXCEEDED
+        return total
+
+    def estimate(self, move: Move) -> float:
+        """
+        Surrogate cost of the solution after `move`: like evaluate, but the LL
+        cost of touched routes that need charging comes from the surrogate
+        instead of the exact solver. No route is built.
+        """
+        if not (self.capacity_ok(move) and self.time_feasible(move)):
+            return float("inf")
+        total, n_inf = self._finite, self._n_inf
+        for r, d, load in self.move_delta(move):
+            c = self.route_costs[r]
+            if c == float("inf"):
+                n_inf -= 1
+            else:
+                total -= c
+            total += d + self._overload(load)
+            if self.needs_ll(d):
+                total += self.surrogate.predict(d)
+        return float("inf") if n_inf else total
@@ -1,13 +1,22 @@
-from typing import List
+import random
+from array import array
+from typing import List, Optional
 from .data import Problem
 
-def clone_solution(sol): return [r[:] for r in sol]
+def clone_solution(sol):
+    if isinstance(sol, Solution): return sol.clone()
+    return [r[:] for r in sol]
+def as_routes(sol) -> List[List[int]]:
+    """Mutable list-of-lists copy; convert compact Solutions once at operator entry."""
+    if isinstance(sol, Solution): return sol.to_routes()
+    return [list(r) for r in sol]
 def hash_solution(sol) -> int: return hash(tuple(tuple(r) for r in sol))
 
-def generate_initial_solution(problem: Problem) -> List[List[int]]:
-    import random
+def generate_initial_solution(problem: Problem, rng: Optional[random.Random] = None) -> List[List[int]]:
+    """Shuffled customers dealt round-robin over the fleet (rng: the run's generator)."""
+    rng = rng or random
     customers = (problem.customers or [])[:]
-    random.shuffle(customers)
+    rng.shuffle(customers)
     routes = [[] for _ in range(problem.vehicles)]
     for i, c in enumerate(customers):
         routes[i % problem.vehicles].append(c)
@@ -24,3 +33,134 @@ def quick_repair(solution, problem: Problem):
             route = route + [problem.depot]
         repaired.append(route)
     return repaired
+
+
+# ---------------------------
+# Compact solution type
+# ---------------------------
+
+
+class Solution:
+    """
+    Array-backed solution: all routes stored back to back in one array('i')
+    plus route offsets (route r is nodes[offsets[r]:offsets[r+1]]).
+
+    clone() is O(1) copy-on-write: the buffers are shared until one side is
+    modified. The cost (set by whoever evaluates it) and the Zobrist hash are
+    cached and dropped on modification. Iterating / indexing yields
+    read-only route tuples, so read-only code written for the list-of-lists
+    format keeps working; routes change only through set_route /
+    with_routes. Operators that edit routes in place take as_routes(sol)
+    first (one conversion, not one list per route access).
+    """
+
+    __slots__ = ("_nodes", "_offsets", "_shared", "_cost", "_hash")
+
+    def __init__(self, nodes: array = None, offsets: array = None):
+        self._nodes = nodes if nodes is not None else array("i")
+        self._offsets = offsets if offsets is not None else array("i", [0])
+        self._shared = False
+        self._cost = None
+        self._hash = None
+
+    # --- adapters ---
+    @classmethod
+    def from_routes(cls, routes) -> "Solution":
+        if isinstance(routes, Solution):
+            return routes.clone()
+        nodes = array("i")
+        offsets = array("i", [0])
+        for r in routes:
+            nodes.extend(r)
+            offsets.append(len(nodes))
+        return cls(nodes, offsets)
+
+    def to_routes(self) -> List[List[int]]:
+        n, o = self._nodes, self._offsets
+        return [n[o[k]:o[k + 1]].tolist() for k in range(len(o) - 1)]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, r):
+        if isinstance(r, slice):
+            return [self[k] for k in range(*r.indices(len(self)))]
+        if r < 0:
+            r += len(self)
+        if not 0 <= r < len(self):
+            raise IndexError("route index out of range")
+        return tuple(self._nodes[self._offsets[r]:self._offsets[r + 1]])
+
+    def __iter__(self):
+        n, o = self._nodes, self._offsets
+        for k in range(len(o) - 1):
+            yield tuple(n[o[k]:o[k + 1]])
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Solution):
+            return self._offsets == other._offsets and self._nodes == other._nodes
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return self.hash
+
+    def __repr__(self) -> str:
+        return f"Solution({self.to_routes()!r})"
+
+    # --- cheap clone / copy-on-write ---
+    def clone(self) -> "Solution":
+        other = Solution(self._nodes, self._offsets)
+        other._cost, other._hash = self._cost, self._hash
+        self._shared = other._shared = True
+        return other
+
+    def _own(self) -> None:
+        if self._shared:
+            self._nodes = array("i", self._nodes)
+            self._offsets = array("i", self._offsets)
+            self._shared = False
+        self._cost = None
+        self._hash = None
+
+    def set_route(self, r: int, route) -> None:
+        """Replace route r in place (copies the buffers first if shared)."""
+        self._own()
+        o = self._offsets
+        start, end = o[r], o[r + 1]
+        self._nodes[start:end] = array("i", route)
+        delta = len(route) - (end - start)
+        if delta:
+            for k in range(r + 1, len(o)):
+                o[k] += delta
+
+    def with_routes(self, changes) -> "Solution":
+        """New solution with {route index: route} replaced; self is untouched."""
+        other = self.clone()
+        for r, route in sorted(changes.items()):
+            other.set_route(r, route)
+        return other
+
+    # --- cached attributes ---
+    @property
+    def cost(self):
+        return self._cost
+
+    @cost.setter
+    def cost(self, value) -> None:
+        self._cost = value
+
+    @property
+    def hash(self) -> int:
+        if self._hash is None:
+            from .zobrist import solution_hash
+            self._hash = solution_hash(self)
+        return self._hash
+
+    @property
+    def nodes(self) -> array:
+        """Flat node buffer (read-only view by convention)."""
+        return self._nodes
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self._nodes) + len(self._offsets)) * self._nodes.itemsize
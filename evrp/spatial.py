@@ -0,0 +1,141 @@
+# evrp/spatial.py
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .data import Problem
+
+# ---------------------------
+# Uniform grid index
+# ---------------------------
+# Points are bucketed into square cells (about `per_cell` points per cell on
+# average). k-NN scans rings of cells around the query cell and stops once the
+# k-th best distance is within the ring radius; a radius query only visits the
+# cells overlapping the query disc. Both are O(k) / O(answer) on evenly spread
+# instances, instead of a full scan of a distance-matrix row.
+
+class GridIndex:
+    def __init__(self, ids: Iterable[int], coords: Sequence[Tuple[float, float]], per_cell: float = 2.0):
+        self.ids = list(ids)
+        self.coords = coords
+        if not self.ids:
+            self.x0 = self.y0 = 0.0
+            self.cell = 1.0
+            self.nx = self.ny = 1
+            self.cells: Dict[Tuple[int, int], List[int]] = {}
+            return
+        xs = [coords[i][0] for i in self.ids]
+        ys = [coords[i][1] for i in self.ids]
+        self.x0, self.y0 = min(xs), min(ys)
+        w, h = max(xs) - self.x0, max(ys) - self.y0
+        area = max(w * h, 1e-12)
+        self.cell = max(math.sqrt(area * per_cell / len(self.ids)), max(w, h) / 1024.0, 1e-9)
+        self.nx = int(w / self.cell) + 1
+        self.ny = int(h / self.cell) + 1
+        self.cells = {}
+        for i in self.ids:
+            self.cells.setdefault(self._cell_of(coords[i][0], coords[i][1]), []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _cell_of(self, x: float, y: float) -> Tuple[int, int]:
+        return int((x - self.x0) // self.cell), int((y - self.y0) // self.cell)
+
+    def _ring(self, cx: int, cy: int, r: int):
+        if r == 0:
+            yield cx, cy
+            return
+        for gx in range(cx - r, cx + r + 1):
+            yield gx, cy - r
+            yield gx, cy + r
+        for gy in range(cy - r + 1, cy + r):
+            yield cx - r, gy
+            yield cx + r, gy
+
+    def knn(self, x: float, y: float, k: int, exclude: Optional[int] = None) -> List[Tuple[float, int]]:
+        """The k nearest points to (x, y) as (distance, id), nearest first."""
+        if k <= 0 or not self.ids:
+            return []
+        cx, cy = self._cell_of(x, y)
+        # rings needed to cover the whole grid from the query cell
+        r_max = max(abs(cx), abs(cx - self.nx + 1), abs(cy), abs(cy - self.ny + 1))
+        heap: List[Tuple[float, int]] = []   # max-heap of (-d, id)
+        coords = self.coords
+        for r in range(r_max + 1):
+            for cell in self._ring(cx, cy, r):
+                for i in self.cells.get(cell, ()):
+                    if i == exclude:
+                        continue
+                    d = math.hypot(coords[i][0] - x, coords[i][1] - y)
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d, i))
+                    elif d < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d, i))
+            # every unvisited point is at least r * cell away
+            if len(heap) == k and -heap[0][0] <= r * self.cell:
+                break
+        return sorted((-d, i) for d, i in heap)
+
+    def radius(self, x: float, y: float, r: float, exclude: Optional[int] = None) -> List[Tuple[float, int]]:
+        """All points within distance r of (x, y) as (distance, id), nearest first."""
+        if not self.ids:
+            return []
+        gx0, gy0 = self._cell_of(x - r, y - r)
+        gx1, gy1 = self._cell_of(x + r, y + r)
+        gx0, gy0 = max(gx0, 0), max(gy0, 0)
+        gx1, gy1 = min(gx1, self.nx - 1), min(gy1, self.ny - 1)
+        out = []
+        coords = self.coords
+        for gx in range(gx0, gx1 + 1):
+            for gy in range(gy0, gy1 + 1):
+                for i in self.cells.get((gx, gy), ()):
+                    if i == exclude:
+                        continue
+                    d = math.hypot(coords[i][0] - x, coords[i][1] - y)
+                    if d <= r:
+                        out.append((d, i))
+        out.sort()
+        return out
+
+
+# ---------------------------
+# Per-problem indexes
+# ---------------------------
+
+def spatial_index(problem: Problem, kind: str = "stations") -> GridIndex:
+    """Grid index over the problem's stations or customers, built once per problem."""
+    cache = getattr(problem, "_spatial_index", None)
+    if cache is None:
+        cache = problem._spatial_index = {}
+    ids = problem.stations if kind == "stations" else problem.customers
+    key = (kind, len(ids or ()), id(problem.coords))
+    idx = cache.get(kind)
+    if idx is None or idx[0] != key:
+        idx = cache[kind] = (key, GridIndex(ids or [], problem.coords))
+    return idx[1]
+
+
+def nearest_stations(problem: Problem, node: int, k: int, max_dist: Optional[float] = None) -> List[int]:
+    """Up to k stations nearest to `node`, optionally only those within max_dist."""
+    x, y = problem.coords[node]
+    idx = spatial_index(problem, "stations")
+    if max_dist is None:
+        hits = idx.knn(x, y, k)
+    else:
+        hits = idx.radius(x, y, max_dist)[:k]
+    return [i for _, i in hits]
+
+
+def nearest_customers(problem: Problem, node: int, k: int) -> List[int]:
+    """The k customers nearest to `node` (itself excluded)."""
+    x, y = problem.coords[node]
+    return [i for _, i in spatial_index(problem, "customers").knn(x, y, k, exclude=node)]
+
+
+def neighbor_lists(problem: Problem, k: int) -> Dict[int, List[int]]:
+    """k nearest customers of every customer and of the depot, without a dense matrix."""
+    nodes = [problem.depot] + list(problem.customers or [])
+    return {i: nearest_customers(problem, i, k) for i in nodes}
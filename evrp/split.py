@@ -0,0 +1,223 @@
+# evrp/split.py
+from __future__ import annotations
+
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .data import Problem, distance_array
+from .ll_batch import solve_ll_batch
+
+# ---------------------------
+# Giant-tour chromosome
+# ---------------------------
+# A giant tour is the flat permutation of customers obtained by concatenating
+# the routes and dropping depots/stations. It is cheap to clone, hash and
+# recombine; `decode` cuts it back into routes.
+
+def to_giant_tour(sol: List[List[int]], problem: Problem) -> List[int]:
+    """Concatenate the customers of all routes (depots and stations removed)."""
+    customers = set(problem.customers)
+    return [node for route in sol for node in route if node in customers]
+
+
+def _demand_prefix(tour: Sequence[int], problem: Problem) -> np.ndarray:
+    demands = problem.demands or {}
+    q = np.fromiter((demands.get(c, 0) for c in tour), dtype=np.float64, count=len(tour))
+    if len(q) and q.max() > problem.capacity:
+        raise ValueError("A customer demand exceeds the vehicle capacity.")
+    return np.concatenate(([0.0], np.cumsum(q)))
+
+
+def _max_reach(load: np.ndarray, capacity: float) -> np.ndarray:
+    """reach[i] = largest j such that customers i+1..j fit in one vehicle."""
+    return np.searchsorted(load, load + capacity + 1e-9, side="right") - 1
+
+
+# ---------------------------
+# Prins split (Bellman on the auxiliary DAG)
+# ---------------------------
+
+def _route_costs_from(i: int, j_max: int, tour: np.ndarray, problem: Problem, ll: bool = True) -> np.ndarray:
+    """
+    Full cost (distance + LL) of the routes depot -> t[i+1..j] -> depot for
+    j = i+1..j_max, evaluated in one batched LL call. inf when LL-infeasible.
+    With ll=False only the distance is returned (no LL call).
+    """
+    seg = tour[i:j_max]
+    if not ll:
+        D = distance_array(problem)
+        depot = problem.depot
+        inner = np.concatenate(([0.0], np.cumsum(D[seg[:-1], seg[1:]])))
+        return D[depot, seg[0]] + inner + D[seg, depot]
+    L = len(seg)
+    depot = problem.depot
+    cols = np.arange(L)
+    R = np.zeros((L, L + 2), dtype=np.int32)
+    R[:, 0] = depot
+    R[:, 1:L + 1] = np.where(cols[None, :] <= cols[:, None], seg[None, :], 0)
+    R[cols, cols + 2] = depot
+    lengths = (cols + 3).astype(np.int32)
+
+    D = distance_array(problem)
+    dist = D[R[:, :-1], R[:, 1:]].sum(axis=1)
+    ok, ll_cost, _ = solve_ll_batch(R, problem, lengths)
+    return np.where(ok, dist + ll_cost, np.inf)
+
+
+def split(tour: Sequence[int], problem: Problem, max_routes: Optional[int] = None,
+          ll: bool = True) -> Tuple[float, List[List[int]]]:
+    """
+    Optimal split of a giant tour into capacity- and energy-feasible routes
+    (Prins 2004). Arc (i, j) of the auxiliary DAG is the route serving
+    t[i+1..j]; its weight is distance + exact LL cost. With `max_routes` the
+    fleet-limited layered variant is used; with ll=False arcs weigh distance
+    only (capacity still holds, charging is left to the evaluation). Returns
+    (cost, routes); cost is inf and routes empty when no feasible split exists.
+    """
+    n = len(tour)
+    if n == 0:
+        return 0.0, []
+    t = np.asarray(tour, dtype=np.int32)
+    reach = _max_reach(_demand_prefix(tour, problem), problem.capacity)
+
+    arcs = [_route_costs_from(i, int(reach[i]), t, problem, ll) for i in range(n)]
+
+    if max_routes is None:
+        V = np.full(n + 1, np.inf)
+        V[0] = 0.0
+        pred = np.full(n + 1, -1, dtype=np.int64)
+        for i in range(n):
+            if not np.isfinite(V[i]):
+                continue
+            cand = V[i] + arcs[i]
+            js = np.arange(i + 1, i + 1 + len(cand))
+            better = cand < V[js]
+            V[js[better]] = cand[better]
+            pred[js[better]] = i
+        best = V[n]
+        cuts = pred
+    else:
+        K = max(1, int(max_routes))
+        V = np.full((K + 1, n + 1), np.inf)
+        V[0, 0] = 0.0
+        P = np.full((K + 1, n + 1), -1, dtype=np.int64)
+        for k in range(K):
+            for i in range(n):
+                if not np.isfinite(V[k, i]):
+                    continue
+                cand = V[k, i] + arcs[i]
+                js = np.arange(i + 1, i + 1 + len(cand))
+                better = cand < V[k + 1, js]
+                V[k + 1, js[better]] = cand[better]
+                P[k + 1, js[better]] = i
+        k_best = int(np.argmin(V[:, n]))
+        best = V[k_best, n]
+        cuts = None
+
+    if not np.isfinite(best):
+        return float("inf"), []
+
+    routes: List[List[int]] = []
+    j = n
+    if cuts is not None:
+        while j > 0:
+            i = int(cuts[j])
+            routes.append([problem.depot] + list(tour[i:j]) + [problem.depot])
+            j = i
+    else:
+        k = k_best
+        while j > 0:
+            i = int(P[k, j])
+            routes.append([problem.depot] + list(tour[i:j]) + [problem.depot])
+            j, k = i, k - 1
+    routes.reverse()
+    return float(best), routes
+
+
+# ---------------------------
+# Linear split (Vidal 2016, deque-based)
+# ---------------------------
+
+def split_linear(tour: Sequence[int], problem: Problem) -> Tuple[float, List[List[int]]]:
+    """
+    O(n) split for the UL objective (distance, hard capacity, unlimited fleet)
+    using the monotone-deque formulation. Charging costs are not part of the
+    arc weights, so this is the fast decoder; use `split` when the LL cost
+    should drive where routes are cut. Returns (ul_cost, routes).
+    """
+    n = len(tour)
+    if n == 0:
+        return 0.0, []
+    D = problem.distance_matrix
+    depot = problem.depot
+    load = _demand_prefix(tour, problem).tolist()
+    Q = problem.capacity
+
+    # node k (1-based) = tour[k-1]; dist[k] = distance along tour from node 1 to node k
+    d0 = [0.0] + [D[depot][c] for c in tour]
+    dist = [0.0, 0.0]
+    for k in range(1, n):
+        dist.append(dist[-1] + D[tour[k - 1]][tour[k]])
+
+    p = [float("inf")] * (n + 1)
+    pred = [0] * (n + 1)
+    p[0] = 0.0
+
+    def f(i: int) -> float:
+        # potential of label i when opening a route at node i+1
+        return p[i] + d0[i + 1] - dist[i + 1]
+
+    dq = deque([0])
+    for j in range(1, n + 1):
+        i = dq[0]
+        p[j] = f(i) + dist[j] + d0[j]
+        pred[j] = i
+        if j < n:
+            # j dominates every label at the back with a worse potential
+            if not (load[dq[-1]] == load[j] and f(dq[-1]) <= f(j)):
+                while dq and f(j) <= f(dq[-1]):
+                    dq.pop()
+                dq.append(j)
+            while load[j + 1] - load[dq[0]] > Q + 1e-9:
+                dq.popleft()
+
+    routes: List[List[int]] = []
+    j = n
+    while j > 0:
+        i = pred[j]
+        routes.append([depot] + list(tour[i:j]) + [depot])
+        j = i
+    routes.reverse()
+    return p[n], routes
+
+
+# ---------------------------
+# Decoder
+# ---------------------------
+
+def decode(tour: Sequence[int], problem: Problem, linear: bool = False, ll: bool = True) -> List[List[int]]:
+    """
+    Cut a giant tour into routes in the optimizer's format: one route per
+    vehicle, unused vehicles as [depot, depot]. The fleet-limited exact split
+    is tried first; if the fleet is too small, the unlimited split is used.
+    ll=False cuts on distance only (see split).
+    """
+    tour = list(tour)
+    if linear:
+        _, routes = split_linear(tour, problem)
+    else:
+        cost, routes = split(tour, problem, max_routes=problem.vehicles, ll=ll)
+        if not routes and tour:
+            cost, routes = split(tour, problem, ll=ll)
+        if not routes and tour:
+            _, routes = split_linear(tour, problem)
+    while len(routes) < problem.vehicles:
+        routes.append([problem.depot, problem.depot])
+    return routes
+
+
+def resplit(sol: List[List[int]], problem: Problem, linear: bool = False) -> List[List[int]]:
+    """Re-cut an existing solution optimally along its own customer order."""
+    return decode(to_giant_tour(sol, problem), problem, linear=linear)
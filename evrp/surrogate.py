@@ -0,0 +1,131 @@
+# evrp/surrogate.py
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+import numpy as np
+
+from .data import Problem
+
+# ---------------------------
+# Energy-deficit lower bound
+# ---------------------------
+
+def ll_lower_bound(dist: float, problem: Problem) -> float:
+    """
+    Lower bound on the LL (charging) cost of a route of length `dist`.
+    Any detour through a station is at least as long as the direct leg, so
+    the energy bought is at least the deficit alpha*dist - init SoC, and each
+    charge-to-full stop buys at most B_max. Hence
+        LB = min price * deficit + ceil(deficit / B_max) * (min wait + min detour)
+    """
+    s = _station_bounds(problem)
+    deficit = s["alpha"] * dist - s["init_soc"]
+    if deficit <= 0.0:
+        return 0.0
+    stops = math.ceil(deficit / s["bmax"] - 1e-12)
+    return s["price"] * deficit + stops * (s["wait"] + s["detour"])
+
+
+def _station_bounds(problem: Problem) -> dict:
+    key = (problem.energy_capacity, getattr(problem, "energy_consumption", 1.0),
+           getattr(problem, "init_soc_ratio", 1.0), getattr(problem, "energy_cost", 0.0),
+           getattr(problem, "waiting_cost", 0.0), len(problem.stations or ()))
+    cached = getattr(problem, "_ll_bound_params", None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    stations = problem.stations or []
+    price_map = getattr(problem, "station_energy_price", {}) or {}
+    wait_map = getattr(problem, "station_wait_cost", {}) or {}
+    detour_map = getattr(problem, "station_detour_km", {}) or {}
+    price_def = getattr(problem, "energy_cost", 0.0)
+    wait_def = getattr(problem, "waiting_cost", 0.0)
+    bmax = problem.energy_capacity
+    out = {
+        "alpha": getattr(problem, "energy_consumption", 1.0),
+        "bmax": bmax,
+        "init_soc": (getattr(problem, "init_soc_ratio", 1.0) or 1.0) * bmax,
+        "price": min((price_map.get(b, price_def) for b in stations), default=price_def),
+        "wait": min((wait_map.get(b, wait_def) for b in stations), default=wait_def),
+        "detour": min((detour_map.get(b, 0.0) for b in stations), default=0.0),
+    }
+    problem._ll_bound_params = (key, out)
+    return out
+
+
+# ---------------------------
+# Online-refined surrogate
+# ---------------------------
+
+class LLSurrogate:
+    """
+    Cheap LL cost estimate for routes that need charging: the energy-deficit
+    lower bound, refined by a small ridge regression on
+    (1, deficit, stop lower bound, dist) trained online on exact LL results.
+    Also keeps the accuracy / savings counters reported at the end of a run.
+    """
+
+    def __init__(self, problem: Problem, ridge: float = 1e-3, refit_every: int = 16, min_samples: int = 8):
+        self.problem = problem
+        self.ridge = ridge
+        self.refit_every = refit_every
+        self.min_samples = min_samples
+        self.XtX = np.zeros((4, 4))
+        self.Xty = np.zeros(4)
+        self.w: Optional[np.ndarray] = None
+        self.n_samples = 0
+        self.abs_err = 0.0
+        self.rel_err = 0.0
+        self.n_candidates = 0
+        self.n_exact = 0
+
+    def _features(self, dist: float) -> np.ndarray:
+        s = _station_bounds(self.problem)
+        deficit = max(0.0, s["alpha"] * dist - s["init_soc"])
+        stops = math.ceil(deficit / s["bmax"] - 1e-12) if deficit > 0 else 0
+        return np.array([1.0, deficit, float(stops), dist])
+
+    def predict(self, dist: float) -> float:
+        x = self._features(dist)
+        if x[1] <= 0.0:
+            return 0.0
+        lb = ll_lower_bound(dist, self.problem)
+        if self.w is None:
+            return lb
+        return max(lb, float(x @ self.w))
+
+    def observe(self, dist: float, ll_cost: float) -> None:
+        """Feed one exact LL result (routes that needed charging only)."""
+        if not math.isfinite(ll_cost):
+            return
+        pred = self.predict(dist)
+        self.abs_err += abs(pred - ll_cost)
+        self.rel_err += abs(pred - ll_cost) / max(abs(ll_cost), 1e-9)
+        x = self._features(dist)
+        self.XtX += np.outer(x, x)
+        self.Xty += x * ll_cost
+        self.n_samples += 1
+        if self.n_samples >= self.min_samples and self.n_samples % self.refit_every == 0:
+            A = self.XtX + self.ridge * np.eye(4)
+            self.w = np.linalg.solve(A, self.Xty)
+
+    def record_screening(self, n_candidates: int, n_exact: int) -> None:
+        self.n_candidates += n_candidates
+        self.n_exact += n_exact
+
+    def report(self) -> str:
+        n = max(self.n_samples, 1)
+        saved = 1.0 - self.n_exact / self.n_candidates if self.n_candidates else 0.0
+        return (f"[surrogate] samples={self.n_samples} MAE={self.abs_err / n:.3f} "
+                f"MRE={100.0 * self.rel_err / n:.1f}% candidates={self.n_candidates} "
+                f"exact={self.n_exact} saved={100.0 * saved:.1f}%")
+
+
+def get_surrogate(problem: Problem) -> LLSurrogate:
+    """The surrogate attached to a problem (created on first use, shared across VND calls)."""
+    sur = getattr(problem, "_ll_surrogate", None)
+    if sur is None:
+        sur = LLSurrogate(problem)
+        problem._ll_surrogate = sur
+    return sur
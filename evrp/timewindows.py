@@ -0,0 +1,130 @@
+# evrp/timewindows.py
+from __future__ import annotations
+
+from typing import Iterable, List, Optional
+
+from .data import Problem
+
+INF = float("inf")
+EPS = 1e-9
+
+# ---------------------------
+# Time-window data
+# ---------------------------
+# Travel time is distance / problem.speed (1.0 when unset, i.e. time in
+# distance units). A route starts at the depot's ready time; service at a node
+# begins at max(arrival, ready) and must begin no later than its due time.
+# A charging stop adds station_wait_time + fixed_charge_time_h + energy / rate.
+#
+# Per route two arrays make move checks cheap:
+#   begin[k]   earliest service start at route[k] (prefix arrival times),
+#              inf once an earlier node is late
+#   latest[k]  latest service start at route[k] that keeps route[k:]
+#              feasible (forward time slack at k = latest[k] - begin[k]),
+#              -inf when route[k:] is infeasible whatever the start
+# A move that keeps a prefix and a suffix of routes and splices a few nodes in
+# between is feasible iff the splice, started at begin[p] of the prefix end,
+# reaches the suffix head no later than its latest start.
+
+class TimeWindows:
+    def __init__(self, problem: Problem):
+        n = len(problem.coords)
+        self.D = problem.distance_matrix
+        self.depot = problem.depot
+        self.inv_speed = 1.0 / (getattr(problem, "speed", None) or 1.0)
+        self.ready = [0.0] * n
+        self.due = [INF] * n
+        self.service = [0.0] * n
+        for i, v in (problem.ready_time or {}).items():
+            self.ready[i] = float(v)
+        for i, v in (problem.due_time or {}).items():
+            self.due[i] = float(v)
+        for i, v in (problem.service_duration or {}).items():
+            self.service[i] = float(v)
+        self.fixed_charge = getattr(problem, "fixed_charge_time_h", 0.0) or 0.0
+        self.rate_map = getattr(problem, "station_charge_rate", {}) or {}
+        self.rate_def = getattr(problem, "charge_rate", None)
+        self.wait_map = getattr(problem, "station_wait_time", {}) or {}
+
+    def travel(self, i: int, j: int, extra_km: float = 0.0) -> float:
+        return (self.D[i][j] + extra_km) * self.inv_speed
+
+    def charge_time(self, b: int, energy: float) -> float:
+        """Hours spent at station b to recharge `energy` (no rate: only the fixed overheads)."""
+        rate = self.rate_map.get(b, self.rate_def)
+        t = self.wait_map.get(b, 0.0) + self.fixed_charge
+        return t + energy / rate if rate else t
+
+    def begin_times(self, route: List[int]) -> List[float]:
+        if not route:
+            return []
+        ready, due, svc, D, inv = self.ready, self.due, self.service, self.D, self.inv_speed
+        t = ready[route[0]]
+        out = [t]
+        for k in range(1, len(route)):
+            i, j = route[k - 1], route[k]
+            t = t + svc[i] + D[i][j] * inv
+            if t < ready[j]:
+                t = ready[j]
+            if t > due[j] + EPS:
+                out.extend([INF] * (len(route) - k))
+                break
+            out.append(t)
+        return out
+
+    def latest_starts(self, route: List[int]) -> List[float]:
+        m = len(route)
+        if not m:
+            return []
+        ready, due, svc, D, inv = self.ready, self.due, self.service, self.D, self.inv_speed
+        out = [0.0] * m
+        lt = due[route[-1]]
+        out[-1] = lt if ready[route[-1]] <= lt + EPS else -INF
+        for k in range(m - 2, -1, -1):
+            i, j = route[k], route[k + 1]
+            lt = min(due[i], out[k + 1] - svc[i] - D[i][j] * inv)
+            out[k] = lt if ready[i] <= lt + EPS else -INF
+        return out
+
+    def feasible(self, route: List[int]) -> bool:
+        return not route or self.begin_times(route)[-1] < INF
+
+    def splice(self, u: int, t: float, middle: Iterable[int], v: int, latest_v: float) -> bool:
+        """
+        Start service at node u at time t, visit `middle`, then arrive at v:
+        feasible iff every middle node is on time and v starts by latest_v.
+        """
+        ready, due, svc, D, inv = self.ready, self.due, self.service, self.D, self.inv_speed
+        if t == INF:
+            return False
+        for x in middle:
+            t = t + svc[u] + D[u][x] * inv
+            if t < ready[x]:
+                t = ready[x]
+            if t > due[x] + EPS:
+                return False
+            u = x
+        t = t + svc[u] + D[u][v] * inv
+        if t < ready[v]:
+            t = ready[v]
+        return t <= latest_v + EPS
+
+
+def time_windows(problem: Problem) -> Optional[TimeWindows]:
+    """
+    TimeWindows of the problem, None when it has no time windows. Built once
+    and cached on the problem; rebuilt if the distance matrix was replaced.
+    """
+    if not getattr(problem, "has_time_windows", False):
+        return None
+    cached = getattr(problem, "_time_windows", None)
+    if cached is not None and cached.D is problem.distance_matrix:
+        return cached
+    problem._time_windows = TimeWindows(problem)
+    return problem._time_windows
+
+
+def route_time_feasible(route: List[int], problem: Problem) -> bool:
+    """Time-window check of a route driven without charging stops."""
+    tw = time_windows(problem)
+    return tw is None or tw.feasible(route)
@@ -0,0 +1,72 @@
+# evrp/zobrist.py
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+# ---------------------------
+# 64-bit Zobrist-style keys
+# ---------------------------
+# Every directed arc (i, j) gets a pseudo-random 64-bit key (splitmix64 of the
+# pair, so no n×n table is stored). A route hashes to the sum of its arc keys
+# mod 2^64 and a solution to the sum of the mixed route hashes, which makes
+# the solution hash independent of route order. Because both levels are sums,
+# a move changes them by adding/subtracting a constant number of keys, so the
+# hash of a neighbor is O(1) given per-route prefix sums (see evrp.segments).
+
+MASK64 = (1 << 64) - 1
+
+
+def mix64(x: int) -> int:
+    """splitmix64 finalizer."""
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def arc_key(i: int, j: int) -> int:
+    return mix64((i << 32) | j)
+
+
+def route_hash(route: Sequence[int]) -> int:
+    h = 0
+    for t in range(len(route) - 1):
+        h += arc_key(route[t], route[t + 1])
+    return h & MASK64
+
+
+def route_prefix_keys(route: Sequence[int]) -> Tuple[List[int], List[int]]:
+    """
+    Prefix sums (mod 2^64) of the forward and backward arc keys:
+      F[k] = sum_{t<k} key(route[t], route[t+1])
+      B[k] = sum_{t<k} key(route[t+1], route[t])
+    """
+    F = [0]
+    B = [0]
+    for t in range(len(route) - 1):
+        a, b = route[t], route[t + 1]
+        F.append((F[-1] + arc_key(a, b)) & MASK64)
+        B.append((B[-1] + arc_key(b, a)) & MASK64)
+    return F, B
+
+
+def combine(route_hashes: Sequence[int]) -> int:
+    """Solution hash from route hashes (order independent)."""
+    h = 0
+    for rh in route_hashes:
+        h += mix64(rh)
+    return h & MASK64
+
+
+def solution_hash(sol: Sequence[Sequence[int]]) -> int:
+    return combine([route_hash(r) for r in sol])
+
+
+def replace_routes(sol_hash: int, old_route_hashes: Sequence[int], new_route_hashes: Sequence[int]) -> int:
+    """Solution hash after swapping some route hashes, in O(#routes changed)."""
+    h = sol_hash
+    for rh in old_route_hashes:
+        h -= mix64(rh)
+    for rh in new_route_hashes:
+        h += mix64(rh)
+    return h & MASK64
@@ -0,0 +1,48 @@
+# scripts/generate_instances.py
+"""
+Write a suite of seeded synthetic .evrp instances for load / scaling tests.
+
+    python -m scripts.generate_instances --sizes 100 500 1000 5000 --layouts uniform clustered \
+        --station-density 0.05 --demand small_large --seeds 1 2 --out instances_synth
+
+Point run_all_instances.py (INSTANCE_DIR) or scripts.race at the output directory.
+"""
+
+import argparse
+import os
+import time
+
+from evrp.generators import generate_problem, write_evrp
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000],
+                    help="number of customers per instance")
+    ap.add_argument("--layouts", nargs="+", default=["uniform"], choices=["uniform", "clustered", "mixed"])
+    ap.add_argument("--station-density", type=float, default=0.05, help="stations per customer")
+    ap.add_argument("--demand", default="uniform", choices=["uniform", "unitary", "small_large"])
+    ap.add_argument("--demand-range", type=int, nargs=2, default=[1, 100])
+    ap.add_argument("--route-size", type=int, default=10, help="average customers per route (sets capacity)")
+    ap.add_argument("--side", type=float, default=400.0, help="side of the square area")
+    ap.add_argument("--seeds", type=int, nargs="+", default=[42])
+    ap.add_argument("--out", default="instances_synth")
+    args = ap.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for n in args.sizes:
+        for layout in args.layouts:
+            for seed in args.seeds:
+                t0 = time.perf_counter()
+                problem = generate_problem(
+                    n, station_density=args.station_density, layout=layout, demand=args.demand,
+                    demand_range=tuple(args.demand_range), route_size=args.route_size,
+                    side=args.side, seed=seed, with_matrix=False)
+                path = write_evrp(problem, os.path.join(args.out, problem.name + ".evrp"))
+                print(f"{path}: {n} customers, {len(problem.stations)} stations, "
+                      f"k={problem.vehicles}, Q={problem.capacity}, B={problem.energy_capacity:g} "
+                      f"({time.perf_counter() - t0:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
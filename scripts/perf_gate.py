@@ -0,0 +1,185 @@
+# scripts/perf_gate.py
+"""
+Performance regression gate.
+
+Runs a pinned set of instances with fixed seeds and a fixed budget of
+solution evaluations, repeated --repeats times, and measures per trial
+  - throughput: solution evaluations per second (evrp.costs.count_evals)
+  - time-to-target: seconds until the best cost reaches the baseline target
+    (the baseline's median final cost on that instance)
+`record` writes them to a baseline JSON (commit it); `check` reruns the same
+trials and exits 1 when throughput dropped or time-to-target grew by more
+than --tolerance with a one-sided Welch t-test p < --alpha. `sanity` exits 1
+when a short run from each initialization method ends without a feasible
+(finite-cost) solution.
+
+    python -m scripts.perf_gate record --out perf_baseline.json
+    python -m scripts.perf_gate check --baseline perf_baseline.json
+    python -m scripts.perf_gate sanity
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+from evrp.costs import eval_count
+from evrp.optimize import main_optimization_metrics
+from evrp.racing import welch_ttest
+from scripts.run_instance import load_problem
+
+PINNED = ["instance/E-n29-k4-s7.evrp", "instance/E-n35-k3-s5.evrp", "instance/E-n60-k5-s9.evrp"]
+
+
+class _Trace:
+    """Duck-typed run logger: keeps (elapsed, best) per generation."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.points = []
+
+    def generation(self, gen, best, *args, **kwargs):
+        self.points.append((time.perf_counter() - self.t0, best))
+
+
+def run_trial(instance, seed, budget, pop, max_gens, init_method="mixed"):
+    problem = load_problem(instance)
+    cfg = SimpleNamespace(max_gens=max_gens, pop_size=pop, tournament_size=2, eps_start=0.8,
+                          eps_min=0.05, decay=0.995, alpha=0.1, lr=0.1, gamma=0.9, eval_budget=budget,
+                          init_method=init_method)
+    cfg.run_logger = trace = _Trace()
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        _, best = main_optimization_metrics(problem, cfg, random.Random(seed))
+        wall = time.perf_counter() - t0
+    evals = eval_count(problem)
+    return {"seed": seed, "wall_s": wall, "evals": evals, "throughput": evals / wall,
+            "final_cost": best, "trace": trace.points}
+
+
+def time_to_target(trace, target, censor):
+    for t, best in trace:
+        if best <= target + 1e-9:
+            return t
+    return censor
+
+
+def run_suite(instances, seeds, repeats, budget, pop, max_gens):
+    out = {}
+    for inst in instances:
+        trials = []
+        for _ in range(repeats):
+            for seed in seeds:
+                trials.append(run_trial(inst, seed, budget, pop, max_gens))
+        out[os.path.basename(inst)] = {"path": inst, "trials": trials}
+        tp = [t["throughput"] for t in trials]
+        print(f"{os.path.basename(inst)}: {len(trials)} trials, "
+              f"throughput={statistics.mean(tp):.0f} evals/s, "
+              f"evals={trials[0]['evals']}, cost={statistics.median(t['final_cost'] for t in trials):.2f}")
+    return out
+
+
+def _summarize(trials, target):
+    censor = 2.0 * max(t["wall_s"] for t in trials)
+    return ([t["throughput"] for t in trials],
+            [time_to_target(t["trace"], target, censor) for t in trials])
+
+
+def record(args):
+    suite = run_suite(args.instances, args.seeds, args.repeats, args.budget, args.pop, args.max_gens)
+    baseline = {
+        "meta": {"python": sys.version.split()[0], "platform": platform.platform(),
+                 "seeds": args.seeds, "repeats": args.repeats, "budget": args.budget,
+                 "pop": args.pop, "max_gens": args.max_gens, "recorded": time.strftime("%Y-%m-%d %H:%M:%S")},
+        "instances": {},
+    }
+    for name, data in suite.items():
+        finite = [t["final_cost"] for t in data["trials"] if math.isfinite(t["final_cost"])]
+        target = statistics.median(finite) if finite else math.inf
+        tp, ttt = _summarize(data["trials"], target)
+        baseline["instances"][name] = {"path": data["path"], "target": target,
+                                       "throughput": tp, "ttt": ttt,
+                                       "evals": [t["evals"] for t in data["trials"]]}
+    with open(args.out, "w") as f:
+        json.dump(baseline, f, indent=2)
+    print(f"Baseline written to {args.out}")
+
+
+def check(args):
+    with open(args.baseline) as f:
+        base = json.load(f)
+    meta = base["meta"]
+    instances = [v["path"] for v in base["instances"].values()]
+    suite = run_suite(instances, meta["seeds"], meta["repeats"], meta["budget"], meta["pop"], meta["max_gens"])
+
+    failed = False
+    print(f"\n{'instance':<24}{'metric':<16}{'baseline':>12}{'current':>12}{'change':>9}{'p':>9}")
+    for name, data in suite.items():
+        b = base["instances"][name]
+        tp, ttt = _summarize(data["trials"], b["target"])
+        # throughput regression: baseline > current; time-to-target: current > baseline
+        for metric, bv, cv, worse in (("evals/s", b["throughput"], tp, (b["throughput"], tp)),
+                                      ("time-to-target", b["ttt"], ttt, (ttt, b["ttt"]))):
+            mb, mc = statistics.mean(bv), statistics.mean(cv)
+            change = (mc - mb) / mb if mb else 0.0
+            _, p = welch_ttest(*worse)
+            slower = (-change if metric == "evals/s" else change) > args.tolerance
+            regress = slower and p < args.alpha
+            failed |= regress
+            flag = "  REGRESSION" if regress else ""
+            print(f"{name:<24}{metric:<16}{mb:>12.3f}{mc:>12.3f}{100 * change:>+8.1f}%{p:>9.4f}{flag}")
+        if [t["evals"] for t in data["trials"]] != b["evals"]:
+            print(f"{name:<24}note: evaluation counts differ from the baseline (search behavior changed)")
+    print("\nFAIL: significant slowdown" if failed else "\nOK: no significant slowdown")
+    sys.exit(1 if failed else 0)
+
+
+def sanity(args):
+    failed = False
+    for inst in args.instances:
+        for method in ("random", "mixed"):
+            for seed in args.seeds:
+                cost = run_trial(inst, seed, args.budget, args.pop, args.max_gens, method)["final_cost"]
+                bad = not math.isfinite(cost)
+                failed |= bad
+                print(f"{os.path.basename(inst):<24}{method:<8}seed {seed}: {cost:.2f}{'  INFEASIBLE' if bad else ''}")
+    print("\nFAIL: run ended infeasible" if failed else "\nOK: every run feasible")
+    sys.exit(1 if failed else 0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    pr = sub.add_parser("record")
+    pr.add_argument("--instances", nargs="+", default=PINNED)
+    pr.add_argument("--seeds", type=int, nargs="+", default=[1, 2, 3])
+    pr.add_argument("--repeats", type=int, default=2, help="repetitions of every (instance, seed)")
+    pr.add_argument("--budget", type=int, default=100000,
+                    help="solution evaluations per trial (checked once per generation)")
+    pr.add_argument("--pop", type=int, default=20)
+    pr.add_argument("--max-gens", type=int, default=1000)
+    pr.add_argument("--out", default="perf_baseline.json")
+    pc = sub.add_parser("check")
+    pc.add_argument("--baseline", default="perf_baseline.json")
+    pc.add_argument("--tolerance", type=float, default=0.10, help="relative slowdown ignored as noise")
+    pc.add_argument("--alpha", type=float, default=0.05)
+    ps = sub.add_parser("sanity")
+    ps.add_argument("--instances", nargs="+", default=PINNED)
+    ps.add_argument("--seeds", type=int, nargs="+", default=[1, 2, 3])
+    ps.add_argument("--budget", type=int, default=20000)
+    ps.add_argument("--pop", type=int, default=10)
+    ps.add_argument("--max-gens", type=int, default=50)
+    args = ap.parse_args()
+    {"record": record, "check": check, "sanity": sanity}[args.cmd](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# scripts/race.py
+"""
+Statistical racing (F-Race style) of solver configurations.
+
+Every alive configuration is run on the next (instance, seed) block in
+parallel; after --first-test blocks, configurations that are significantly
+worse (Friedman + Conover post-hoc, or paired t-test against the best) are
+dropped, so the CPU budget goes to the contenders.
+
+    python -m scripts.race --instances instance/E-n29-k4-s7.evrp instance/E-n30-k3-s7.evrp \
+        --param pop_size=20,50,100 --param conv_threshold=0.04,0.08 --param max_gens=50 \
+        --seeds 10 --workers 4 --out race.json
+
+Configurations are the cartesian product of the --param lists (or a JSON list
+given with --configs). With --db, finished runs are read from / written to the
+SQLite results store, so a race can be resumed or extended.
+"""
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from evrp.racing import race
+from evrp.results import ResultsStore, cfg_hash
+from scripts.solver_daemon import solve_job
+
+
+def _parse_value(v):
+    for cast in (int, float):
+        try:
+            return cast(v)
+        except ValueError:
+            pass
+    return v
+
+
+def build_configs(params, configs_file=None):
+    if configs_file:
+        with open(configs_file) as f:
+            return json.load(f)
+    names, values = [], []
+    for p in params or []:
+        name, _, vals = p.partition("=")
+        names.append(name)
+        values.append([_parse_value(v) for v in vals.split(",")])
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def make_evaluator(pool, store=None):
+    def evaluate(batch):
+        out = [None] * len(batch)
+        todo = []
+        for k, (cfg, inst, seed) in enumerate(batch):
+            key = os.path.basename(inst)
+            if store is not None:
+                cached = store.costs(key, cfg_hash(cfg)).get(seed)
+                if cached is not None:
+                    out[k] = (cached, 0.0)
+                    continue
+                store.start(key, cfg, seed)
+            todo.append(k)
+        jobs = [{"instance": batch[k][1], "seed": batch[k][2], "cfg": batch[k][0]} for k in todo]
+        for k, res in zip(todo, pool.map(solve_job, jobs)):
+            cfg, inst, seed = batch[k]
+            cost = res["best_cost"] if res["ok"] else float("inf")
+            out[k] = (cost, res["cpu_s"])   # the job's own CPU time, not pool wall time
+            if store is not None:
+                store.finish(os.path.basename(inst), cfg_hash(cfg), seed,
+                             cost if res["ok"] else None, res["cpu_s"])
+        return out
+    return evaluate
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--instances", nargs="+", required=True)
+    ap.add_argument("--param", action="append", help="name=v1,v2,... (repeatable)")
+    ap.add_argument("--configs", default=None, help="JSON file with a list of cfg dicts")
+    ap.add_argument("--seeds", type=int, default=10, help="seeds per instance")
+    ap.add_argument("--test", choices=["friedman", "ttest"], default="friedman")
+    ap.add_argument("--alpha", type=float, default=0.05, help="significance level")
+    ap.add_argument("--first-test", type=int, default=3, help="blocks before the first elimination")
+    ap.add_argument("--min-survivors", type=int, default=1)
+    ap.add_argument("--budget", type=int, default=None, help="max number of solver runs")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--db", default=None, help="SQLite results store to reuse/record runs")
+    ap.add_argument("--out", default=None, help="write the race summary as JSON")
+    args = ap.parse_args()
+
+    configs = build_configs(args.param, args.configs)
+    if not configs:
+        ap.error("give --param or --configs")
+    # seed-major order: every instance is visited before a seed is repeated
+    blocks = [(inst, seed) for seed in range(1, args.seeds + 1) for inst in args.instances]
+    print(f"[race] {len(configs)} configs x {len(blocks)} blocks (grid = {len(configs) * len(blocks)} runs)")
+
+    store = ResultsStore(args.db) if args.db else None
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            summary = race(configs, blocks, make_evaluator(pool, store), test=args.test,
+                           alpha=args.alpha, first_test=args.first_test,
+                           min_survivors=args.min_survivors, budget=args.budget)
+    finally:
+        if store is not None:
+            store.close()
+
+    print(f"[race] {summary['runs']}/{summary['grid_runs']} runs, cpu={summary['cpu_s']:.1f}s "
+          f"({summary['cpu_s_eliminated']:.1f}s on eliminated configs)")
+    for s in summary["survivors"]:
+        print(f"  rank={s['mean_rank']:.2f} cost={s['mean_cost']:.2f} runs={s['runs']} "
+              f"cpu={s['cpu_s']:.1f}s {json.dumps(s['config'])}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
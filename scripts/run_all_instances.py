@@ -1,32 +1,51 @@
 import os
 import subprocess
 import re
-import statistics
+import sys
 import time
 
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from evrp.results import ResultsStore, cfg_hash
+
 # === CONFIGURATION ===
 INSTANCE_DIR = "instances"     # path to your .evrp files
 RUNS_PER_INSTANCE = 12
+SEEDS = range(1, RUNS_PER_INSTANCE + 1)
 OUTPUT_FILE = "results_summary.txt"
+RESULTS_DB = "results.sqlite"  # finished (instance, cfg, seed) jobs are skipped on rerun
 PYTHON_CMD = "python"          # or "python3" depending on your setup
 SCRIPT = "scripts/run_instance.py"
 MAX_GENS = 200                 # or adjust as needed
 POP = 50
+MEM_PROFILE = False            # pass --mem-profile; peak RSS is stored with each run
+RUN_LOG = None                 # e.g. "runs.jsonl": structured per-generation/final records (evrp.runlog)
+ROUTE_CACHE_DB = None          # e.g. "route_costs.sqlite": LL route costs shared by all runs (evrp.route_store)
 
 # === REGEX to extract data from output ===
-COST_PATTERN = re.compile(r"best\s*=\s*([0-9]+\.[0-9]+)")
+COST_PATTERN = re.compile(r"Best cost:\s*([0-9]+\.[0-9]+)")
 TIME_PATTERN = re.compile(r"CPU\s*time\s*[:=]\s*([0-9]+\.[0-9]+)")
+RSS_PATTERN = re.compile(r"peak RSS:\s*([0-9]+\.[0-9]+)\s*MB")
 
 # === MAIN ===
-def run_instance(instance_path):
+def run_instance(instance_path, seed):
     cmd = [
         PYTHON_CMD, SCRIPT,
         "--instance", instance_path,
         "--max-gens", str(MAX_GENS),
-        "--pop", str(POP)
+        "--pop", str(POP),
+        "--seed", str(seed),
     ]
+    if RUN_LOG:
+        cmd += ["--log", RUN_LOG]
+    if MEM_PROFILE:
+        cmd += ["--mem-profile"]
+    if ROUTE_CACHE_DB:
+        cmd += ["--route-cache", ROUTE_CACHE_DB]
     start_time = time.time()
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    # the child runs scripts/run_instance.py as a file, so it needs the repo root to import evrp
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env)
     elapsed = time.time() - start_time
 
     # Try to extract best cost from stdout
@@ -38,47 +57,56 @@ def run_instance(instance_path):
     match_time = TIME_PATTERN.search(out)
     cpu_time = float(match_time.group(1)) if match_time else elapsed
 
-    return best_cost, cpu_time
+    match_rss = RSS_PATTERN.search(out)
+    peak_rss = float(match_rss.group(1)) if match_rss else None
+
+    return best_cost, cpu_time, peak_rss
 
 
 def main():
-    instances = [f for f in os.listdir(INSTANCE_DIR) if f.endswith(".evrp")]
+    instances = sorted(f for f in os.listdir(INSTANCE_DIR) if f.endswith(".evrp"))
     if not instances:
         print("No .evrp instances found in", INSTANCE_DIR)
         return
 
-    with open(OUTPUT_FILE, "w") as f_out:
-        f_out.write("=== EVRP Benchmark Summary ===\n\n")
+    cfg = {"max_gens": MAX_GENS, "pop_size": POP}
+    chash = cfg_hash(cfg)
+    with ResultsStore(RESULTS_DB) as store:
         for instance in instances:
             print(f"Running {instance} ...")
-            costs, times = [], []
-            for r in range(RUNS_PER_INSTANCE):
-                cost, t = run_instance(os.path.join(INSTANCE_DIR, instance))
+            for seed in SEEDS:
+                if store.is_done(instance, chash, seed):
+                    print(f"  Seed {seed}: done, skipped")
+                    continue
+                store.start(instance, cfg, seed)
+                cost, t, rss = run_instance(os.path.join(INSTANCE_DIR, instance), seed)
+                store.finish(instance, chash, seed, cost, t, **({"peak_rss_mb": rss} if rss is not None else {}))
                 if cost is not None:
-                    costs.append(cost)
-                    times.append(t)
-                    print(f"  Run {r+1}/{RUNS_PER_INSTANCE}: cost={cost:.2f}, time={t:.2f}s")
+                    print(f"  Seed {seed}: cost={cost:.2f}, time={t:.2f}s")
                 else:
-                    print(f"  Run {r+1}: ❌ no cost detected")
+                    print(f"  Seed {seed}: ❌ no cost detected")
 
-            if costs:
-                best = min(costs)
-                worst = max(costs)
-                mean = statistics.mean(costs)
-                avg_time = statistics.mean(times)
+        # Aggregates come straight from SQL over every finished run
+        rows = {r["instance"]: r for r in store.summary(chash)}
+        with open(OUTPUT_FILE, "w") as f_out:
+            f_out.write("=== EVRP Benchmark Summary ===\n\n")
+            for instance in instances:
+                r = rows.get(instance)
+                if r is None:
+                    f_out.write(f"Instance: {instance} — No valid results.\n\n")
+                    continue
                 summary = (
                     f"Instance: {instance}\n"
-                    f"  Best cost   : {best:.2f}\n"
-                    f"  Mean cost   : {mean:.2f}\n"
-                    f"  Worst cost  : {worst:.2f}\n"
-                    f"  Avg CPU time: {avg_time:.2f} s\n\n"
+                    f"  Runs        : {r['runs']}\n"
+                    f"  Best cost   : {r['best']:.2f}\n"
+                    f"  Mean cost   : {r['mean']:.2f}\n"
+                    f"  Worst cost  : {r['worst']:.2f}\n"
+                    f"  Avg CPU time: {r['avg_time']:.2f} s\n\n"
                 )
                 print(summary)
                 f_out.write(summary)
-            else:
-                f_out.write(f"Instance: {instance} — No valid results.\n\n")
 
-    print("\n✅ Results saved to:", OUTPUT_FILE)
+    print("\n✅ Results saved to:", OUTPUT_FILE, "and", RESULTS_DB)
 
 
 if __name__ == "__main__":
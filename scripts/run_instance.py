@@ -6,6 +6,11 @@ from types import SimpleNamespace
 from evrp.data import load_evrp, apply_defaults
 from evrp.optimize import main_optimization_metrics
 from evrp.heuristics import solve_ll_with_trace, solve_ll,get_used_stations
+from evrp.runlog import RunLogger
+from evrp.decompose import decompose_solve
+from evrp.memprof import MemoryProfiler, peak_rss_mb
+from evrp.livemetrics import LiveMetrics
+import os
 import time
 import math
 import numpy as np
@@ -46,6 +51,45 @@ def print_routes_with_recharges(problem, sol):
         print(f"R{r_idx}: " + " -> ".join(tokens))
 
 
+def routes_with_recharges(problem, sol):
+    """Routes as node lists with the LL-inserted stations inline."""
+    ok, _, _, traces = solve_ll(sol, problem, return_trace=True)
+    out = []
+    for route, tr in zip(sol, traces):
+        nodes = [route[0]]
+        for leg in tr:
+            if leg["stop"] is not None:
+                nodes.append(leg["stop"])
+            nodes.append(leg["j"])
+        out.append(nodes)
+    return out
+
+
+def load_problem(instance_path, waiting_cost=None, energy_cost=None, charge_rate=None, speed=None):
+    """Load an instance and apply the experiment's energy/cost constants and overrides."""
+    problem = load_evrp(instance_path)
+    problem = apply_defaults(problem)
+
+    # Global constants (stations from data; no decoration/randomization)
+    problem.energy_capacity = 100.0  # Bmax
+    problem.energy_consumption = 1/6  # alpha (kWh/km)
+    problem.init_soc_ratio = 1.0
+    # Waiting cost per recharge event (wbk) — use per-station map or fallback:
+    problem.waiting_cost = 5.0  # used as per-visit default w_bk
+    problem.energy_cost = 4.22  # $/kWh default r_bk
+
+    # Allow CLI overrides
+    if waiting_cost is not None:
+        problem.waiting_cost = waiting_cost
+    if energy_cost is not None:
+        problem.energy_cost = energy_cost
+    if charge_rate is not None:
+        problem.charge_rate = charge_rate
+    if speed is not None:
+        problem.speed = speed
+    return problem
+
+
 def main():
     start_time = time.perf_counter()
     ap = argparse.ArgumentParser()
@@ -56,9 +100,40 @@ def main():
     ap.add_argument("--eps-start", type=float, default=0.8)
     ap.add_argument("--eps-min", type=float, default=0.05)
     ap.add_argument("--decay", type=float, default=0.995)
-    ap.add_argument("--alpha", type=float, default=0.1)
+    ap.add_argument("--alpha", type=float, default=0.1,
+                    help="fitness-improvement threshold of the heuristic selection tree")
+    ap.add_argument("--lr", type=float, default=0.1, help="learning rate of the learned selectors")
     ap.add_argument("--gamma", type=float, default=0.9)
     ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--surrogate-top-k", type=int, default=None,
+                    help="rank each VND neighborhood with the LL surrogate and evaluate only the top k")
+    ap.add_argument("--tabu-tenure", type=int, default=0,
+                    help="skip VND moves back to the last N visited solutions (0 = off)")
+    ap.add_argument("--selector", choices=["tree", "qlearning", "roulette"], default="tree",
+                    help="heuristic selection: threshold tree, Q-learning or ALNS roulette")
+    ap.add_argument("--crossover", choices=["ox", "erx"], default=None,
+                    help="recombine part of the mating pool instead of running the VND on it (evrp.crossover)")
+    ap.add_argument("--crossover-rate", type=float, default=0.5,
+                    help="share of the mating pool recombined when --crossover is set")
+    ap.add_argument("--cost-cache-size", type=int, default=50_000,
+                    help="entries of the LRU fitness cache (by solution hash)")
+    ap.add_argument("--decompose", type=int, default=0,
+                    help="cluster-first route-second: number of parts (0 = off, -1 = auto by size)")
+    ap.add_argument("--workers", type=int, default=1, help="processes for solving decomposed parts")
+    ap.add_argument("--route-cache", default=None,
+                    help="SQLite file persisting route LL costs across runs (evrp.route_store)")
+    ap.add_argument("--vnd-workers", type=int, default=0,
+                    help="processes scoring large VND relocate/swap neighborhoods (0 = serial)")
+    ap.add_argument("--log", default=None,
+                    help="append structured run records to this file (.csv -> CSV, else JSONL)")
+    ap.add_argument("--mem-profile", action="store_true",
+                    help="record RSS and container sizes per generation (to --log if given)")
+    ap.add_argument("--mem-trace", action="store_true",
+                    help="with --mem-profile: also record tracemalloc top allocation sites per phase (slower)")
+    ap.add_argument("--metrics-port", type=int, default=None,
+                    help="serve live metrics on http://HOST:PORT/metrics (Prometheus) and /metrics.json")
+    ap.add_argument("--metrics-host", default="127.0.0.1", help="bind address of the live metrics endpoint")
+    ap.add_argument("--log-flush", type=float, default=5.0, help="run log flush interval in seconds")
     ap.add_argument("--waiting-cost", type=float, default=None, help="$/hour to monetize time (optional)")
     ap.add_argument("--energy-cost", type=float, default=None, help="fallback $/kWh (optional)")
     ap.add_argument("--charge-rate", type=float, default=None, help="fallback kW if a station lacks a rate (optional)")
@@ -71,26 +146,19 @@ def main():
         instance_path = args.instance
 
     print(f"Loading instance: {instance_path}")
-    problem = load_evrp(instance_path)
-    problem = apply_defaults(problem)
-
-    # Global constants (stations from data; no decoration/randomization)
-    problem.energy_capacity = 100.0  # Bmax
-    problem.energy_consumption = 1/6  # alpha (kWh/km)
-    problem.init_soc_ratio = 1.0
-    # Waiting cost per recharge event (wbk) — use per-station map or fallback:
-    problem.waiting_cost = 5.0  # used as per-visit default w_bk
-    problem.energy_cost = 4.22  # $/kWh default r_bk
-
-    # Allow CLI overrides
-    if args.waiting_cost is not None:
-        problem.waiting_cost = args.waiting_cost
-    if args.energy_cost is not None:
-        problem.energy_cost = args.energy_cost
-    if args.charge_rate is not None:
-        problem.charge_rate = args.charge_rate
-    if args.speed is not None:
-        problem.speed = args.speed
+    problem = load_problem(
+        instance_path,
+        waiting_cost=args.waiting_cost,
+        energy_cost=args.energy_cost,
+        charge_rate=args.charge_rate,
+        speed=args.speed,
+    )
+    if args.surrogate_top_k is not None:
+        problem.surrogate_top_k = args.surrogate_top_k
+    problem.tabu_tenure = args.tabu_tenure
+    problem.vnd_workers = args.vnd_workers
+    if args.route_cache:
+        problem.route_cache_db = args.route_cache
 
     cfg = SimpleNamespace(
         max_gens=args.max_gens,
@@ -100,12 +168,36 @@ def main():
         eps_min=args.eps_min,
         decay=args.decay,
         alpha=args.alpha,
+        lr=args.lr,
         gamma=args.gamma,
+        selector=args.selector,
+        crossover=args.crossover,
+        crossover_rate=args.crossover_rate,
+        cost_cache_size=args.cost_cache_size,
     )
+    run_logger = None
+    if args.log:
+        run_logger = RunLogger(args.log, flush_interval=args.log_flush,
+                               meta={"instance": os.path.basename(instance_path), "seed": args.seed})
+        cfg.run_logger = run_logger
+    mem_prof = None
+    if args.mem_profile:
+        mem_prof = MemoryProfiler(run_logger, trace=args.mem_trace).start()
+        cfg.mem_profiler = mem_prof
+    live = None
+    if args.metrics_port is not None:
+        live = LiveMetrics(args.metrics_port, args.metrics_host,
+                           meta={"instance": os.path.basename(instance_path), "seed": args.seed}).start()
+        cfg.live_metrics = live
+        print(f"Live metrics: http://{args.metrics_host}:{live.port}/metrics")
 
     rng = random.Random(args.seed)
 
-    best_sol, best_overall_cost = main_optimization_metrics(problem, cfg, rng)
+    if args.decompose:
+        best_sol, best_overall_cost = decompose_solve(
+            problem, cfg, rng, n_parts=None if args.decompose < 0 else args.decompose, workers=args.workers)
+    else:
+        best_sol, best_overall_cost = main_optimization_metrics(problem, cfg, rng)
 
     print("=== DONE ===")
     ok, ll_sol, total_cost, _ = solve_ll(best_sol, problem,return_trace=True)
@@ -144,6 +236,24 @@ def main():
     end_time = time.perf_counter()
     cpu_time = end_time - start_time
     print(f"CPU time: {cpu_time:.2f} seconds")  # easy to parse by regex
+    store = getattr(problem, "_route_store", None)
+    if store is not None:
+        hits, misses = store.stats()
+        print(f"Route cache: {hits} hits, {misses} misses ({store.path})")
+
+    if mem_prof is not None:
+        mem_prof.stop()
+        print(mem_prof.summary())
+
+    if run_logger is not None:
+        with_stations = routes_with_recharges(problem, best_sol) if best_sol else []
+        run_logger.final(best_overall_cost, best_sol or [], routes_with_stations=with_stations,
+                         used_stations=get_used_stations(with_stations, problem), cpu_time=cpu_time,
+                         peak_rss_mb=peak_rss_mb() if mem_prof is not None else None)
+        run_logger.close()
+
+    if live is not None:
+        live.close()
 
 
 
@@ -0,0 +1,284 @@
+# scripts/solver_daemon.py
+"""
+Long-lived solver service.
+
+Keeps parsed Problem objects (distance matrix, NumPy distance array, LL route
+memo) warm in a pool of worker processes and accepts solve jobs over a local
+HTTP API (localhost TCP or a Unix socket). Results are streamed back as
+newline-delimited JSON, one line per finished job.
+
+    python -m scripts.solver_daemon serve --port 8765 --workers 4 --preload instance/E-n29-k4-s7.evrp
+    python -m scripts.solver_daemon submit --instance instance/E-n29-k4-s7.evrp --seeds 1 2 3 --max-gens 50
+
+API
+    GET  /health      {"ok": true, "workers": N, "jobs_done": M}
+    POST /solve       {"jobs": [{"instance": path, "seed": 1, "cfg": {...}, "problem": {...}}, ...]}
+                      (a single job object is accepted too)
+
+`cfg` holds main_optimization_metrics settings (max_gens, pop_size, selector, ...);
+`problem` holds load_problem overrides (waiting_cost, energy_cost, charge_rate,
+speed) and per-run problem knobs (surrogate_top_k, tabu_tenure, use_segments,
+route_cache_db).
+"""
+
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import random
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from scripts.run_instance import load_problem
+
+# Overrides that change how the instance is built (part of the warm-cache key)
+LOAD_KEYS = ("waiting_cost", "energy_cost", "charge_rate", "speed")
+# Per-run knobs read from the problem by the optimizer
+RUN_KEYS = ("surrogate_top_k", "tabu_tenure", "use_segments", "route_cache_db")
+# Per-run state the optimizer leaves on the problem; reset so a job's result
+# does not depend on which jobs ran before it in the same worker
+RUN_STATE = ("_tabu", "_ll_surrogate")
+
+DEFAULT_CFG = dict(max_gens=500, pop_size=100, tournament_size=2, eps_start=0.8,
+                   eps_min=0.05, decay=0.995, alpha=0.1, lr=0.1, gamma=0.9, selector="tree")
+
+
+# ---------------------------
+# Worker side
+# ---------------------------
+
+_PROBLEMS = {}  # (abs path, load overrides) -> Problem, per worker process
+
+
+def _warm_problem(path, overrides):
+    from evrp.data import distance_array
+
+    key = (os.path.abspath(path), tuple(sorted((k, overrides[k]) for k in LOAD_KEYS if k in overrides)))
+    problem = _PROBLEMS.get(key)
+    if problem is None:
+        problem = load_problem(path, **{k: overrides[k] for k in LOAD_KEYS if k in overrides})
+        distance_array(problem)
+        _PROBLEMS[key] = problem
+    return problem
+
+
+def _init_worker(preload):
+    for path in preload:
+        _warm_problem(path, {})
+
+
+def _cpu_time() -> float:
+    """CPU seconds of this process plus its reaped children (the VND pool, closed when a run ends)."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def solve_job(job):
+    """Run one job in a worker; returns a JSON-serializable result dict."""
+    from evrp.optimize import main_optimization_metrics
+
+    t0, c0 = time.perf_counter(), _cpu_time()
+    overrides = job.get("problem", {}) or {}
+    try:
+        problem = _warm_problem(job["instance"], overrides)
+        for attr in RUN_STATE:
+            setattr(problem, attr, None)
+        for k in RUN_KEYS:
+            if k in overrides:
+                setattr(problem, k, overrides[k])
+            elif hasattr(problem, k):
+                delattr(problem, k)
+        cfg = SimpleNamespace(**{**DEFAULT_CFG, **(job.get("cfg", {}) or {})})
+        seed = int(job.get("seed", 42))
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            best_sol, best_cost = main_optimization_metrics(problem, cfg, random.Random(seed))
+        store = getattr(problem, "_route_store", None)
+        if store is not None:
+            store.flush()  # share this job's route costs with the other workers now
+        return {
+            "id": job.get("id"),
+            "instance": job["instance"],
+            "seed": seed,
+            "ok": True,
+            "best_cost": best_cost,
+            "routes": [list(r) for r in best_sol] if best_sol else [],
+            "wall_s": time.perf_counter() - t0,
+            "cpu_s": _cpu_time() - c0,
+            "pid": os.getpid(),
+            "log": log.getvalue() if job.get("return_log") else None,
+        }
+    except Exception as exc:  # report per job, keep the service alive
+        return {"id": job.get("id"), "instance": job.get("instance"), "seed": job.get("seed"),
+                "ok": False, "error": f"{type(exc).__name__}: {exc}", "wall_s": time.perf_counter() - t0,
+                "cpu_s": _cpu_time() - c0}
+
+
+# ---------------------------
+# Server side
+# ---------------------------
+
+class SolverHandler(BaseHTTPRequestHandler):
+    server_version = "evrp-solver/1.0"
+
+    def address_string(self):
+        # Unix sockets have no (host, port) client address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"ok": True, "workers": self.server.n_workers,
+                                  "jobs_done": self.server.jobs_done})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/solve":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            jobs = payload["jobs"] if isinstance(payload, dict) and "jobs" in payload else [payload]
+            for k, job in enumerate(jobs):
+                if "instance" not in job:
+                    raise ValueError(f"job {k} has no 'instance'")
+                job.setdefault("id", k)
+        except (ValueError, KeyError, TypeError) as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+
+        # Stream one NDJSON line per finished job; the connection closes at the end
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        futures = [self.server.pool.submit(solve_job, job) for job in jobs]
+        for fut in as_completed(futures):
+            result = fut.result()
+            with self.server.lock:
+                self.server.jobs_done += 1
+            self.wfile.write((json.dumps(result) + "\n").encode())
+            self.wfile.flush()
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(pool, n_workers, host="127.0.0.1", port=8765, unix_socket=None, verbose=False):
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = _UnixHTTPServer(unix_socket, SolverHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), SolverHandler)
+    server.pool = pool
+    server.n_workers = n_workers
+    server.jobs_done = 0
+    server.lock = threading.Lock()
+    server.verbose = verbose
+    return server
+
+
+def serve(args):
+    preload = list(args.preload or [])
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(preload,)) as pool:
+        server = make_server(pool, args.workers, args.host, args.port, args.unix_socket, args.verbose)
+        where = args.unix_socket or f"http://{args.host}:{args.port}"
+        print(f"Solver daemon listening on {where} with {args.workers} workers "
+              f"({len(preload)} instances preloaded)", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if args.unix_socket and os.path.exists(args.unix_socket):
+                os.unlink(args.unix_socket)
+
+
+# ---------------------------
+# Client
+# ---------------------------
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self._path)
+
+
+def submit_jobs(jobs, host="127.0.0.1", port=8765, unix_socket=None, timeout=None):
+    """Send jobs to a running daemon and yield result dicts as they stream back."""
+    conn = (_UnixHTTPConnection(unix_socket, timeout=timeout) if unix_socket
+            else http.client.HTTPConnection(host, port, timeout=timeout))
+    body = json.dumps({"jobs": jobs})
+    conn.request("POST", "/solve", body=body, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    if resp.status != 200:
+        raise RuntimeError(f"daemon returned {resp.status}: {resp.read().decode()}")
+    for line in resp:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+    conn.close()
+
+
+def submit(args):
+    cfg = {"max_gens": args.max_gens, "pop_size": args.pop}
+    jobs = [{"instance": inst, "seed": seed, "cfg": cfg}
+            for inst in args.instance for seed in args.seeds]
+    for res in submit_jobs(jobs, args.host, args.port, args.unix_socket):
+        if res["ok"]:
+            print(f"{res['instance']} seed={res['seed']} best={res['best_cost']:.2f} "
+                  f"time={res['wall_s']:.2f}s pid={res['pid']}", flush=True)
+        else:
+            print(f"{res['instance']} seed={res['seed']} ERROR {res['error']}", flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("serve", "submit"):
+        p = sub.add_parser(name)
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=8765)
+        p.add_argument("--unix-socket", default=None, help="listen/connect on a Unix socket instead of TCP")
+    ps = sub.choices["serve"]
+    ps.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ps.add_argument("--preload", nargs="*", help="instances to parse in every worker at startup")
+    ps.add_argument("--verbose", action="store_true")
+    pc = sub.choices["submit"]
+    pc.add_argument("--instance", nargs="+", required=True)
+    pc.add_argument("--seeds", type=int, nargs="+", default=[42])
+    pc.add_argument("--max-gens", type=int, default=500)
+    pc.add_argument("--pop", type=int, default=100)
+    args = ap.parse_args()
+    serve(args) if args.cmd == "serve" else submit(args)
+
+
+if __name__ == "__main__":
+    main()